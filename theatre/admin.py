@@ -21,9 +21,17 @@ class ReservationAdmin(admin.ModelAdmin):
     inlines = (TicketInline,)
 
 
+@admin.register(Performance)
+class PerformanceAdmin(admin.ModelAdmin):
+    list_select_related = ("play",)
+
+
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    list_select_related = ("performance__play",)
+
+
 admin.site.register(TheatreHall)
-admin.site.register(Ticket)
-admin.site.register(Performance)
 admin.site.register(Genre)
 admin.site.register(Actor)
 admin.site.register(Play)
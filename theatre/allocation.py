@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+
+DEFAULT_CENTER_BIAS = 1.0
+
+
+def free_intervals(
+    taken_seats: Iterable[Tuple[int, int]], rows: int, seats_in_row: int
+) -> dict:
+    """
+    Indexes the free seats of a hall as {row: [(first, last), ...]},
+    inclusive seat ranges in seat order. Seats outside the hall geometry
+    are ignored.
+    """
+    taken_by_row = defaultdict(list)
+    for row, seat in taken_seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            taken_by_row[row].append(seat)
+
+    intervals = {}
+    for row in range(1, rows + 1):
+        row_intervals = []
+        first = 1
+        for seat in sorted(taken_by_row.get(row, ())):
+            if seat > first:
+                row_intervals.append((first, seat - 1))
+            first = max(first, seat + 1)
+        if first <= seats_in_row:
+            row_intervals.append((first, seats_in_row))
+        intervals[row] = row_intervals
+
+    return intervals
+
+
+def find_best_block(
+    intervals: dict,
+    seats_in_row: int,
+    size: int,
+    row_from: int = 1,
+    row_to: Optional[int] = None,
+    center_bias: float = DEFAULT_CENTER_BIAS,
+) -> Optional[Tuple[int, int]]:
+    """
+    Returns (row, first seat) of the best block of `size` adjacent free
+    seats between `row_from` and `row_to`, or None. Front rows are better,
+    and so are blocks closer to the middle of the row; `center_bias`
+    weighs a block being off center by a whole half row against it being
+    a whole row range further back (0 only looks at the rows).
+    """
+    row_to = min(row_to or len(intervals), len(intervals))
+    row_span = max(row_to - row_from, 1)
+    half_row = max((seats_in_row - size) / 2, 1)
+    centered_first = (seats_in_row - size) / 2 + 1
+
+    best, best_score = None, None
+    for row in range(row_from, row_to + 1):
+        row_score = (row - row_from) / row_span
+        if best_score is not None and row_score > best_score:
+            # Later rows only score worse
+            break
+
+        for first, last in intervals[row]:
+            if last - first + 1 < size:
+                continue
+
+            # The free seat closest to the centered position, rounding
+            # towards the left on ties
+            start = min(max(first, int(centered_first)), last - size + 1)
+
+            score = (
+                row_score
+                + center_bias * abs(start - centered_first) / half_row
+            )
+            if best_score is None or score < best_score:
+                best, best_score = (row, start), score
+
+    return best
@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+async def aprefetch_many_to_many(instances, field_name: str) -> None:
+    """
+    Fills what `prefetch_related(field_name)` would cache on `instances`
+    with one async query on the through table, related objects in id
+    order. `aiterator()` refuses querysets with prefetches.
+    """
+    if not instances:
+        return
+
+    field = instances[0]._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    rows = (
+        field.remote_field.through.objects.filter(
+            **{f"{source}__in": [instance.pk for instance in instances]}
+        )
+        .select_related(target)
+        .order_by(f"{target}_id")
+    )
+
+    related = defaultdict(list)
+    async for row in rows:
+        related[getattr(row, f"{source}_id")].append(getattr(row, target))
+
+    for instance in instances:
+        queryset = getattr(instance, field_name).all()
+        queryset._result_cache = related[instance.pk]
+        queryset._prefetch_done = True
+        instance.__dict__.setdefault("_prefetched_objects_cache", {})[
+            field_name
+        ] = queryset
+
+
+class AsyncReadMixin:
+    """
+    Async `list` and `retrieve` of a viewset, for ASGI deployments.
+
+    `as_async_view("list")` builds an async Django view that reuses the
+    viewset's queryset, serializers and pagination, but reads through the
+    async ORM, so the event loop keeps serving other requests while
+    Postgres answers. Authentication, permissions and throttling run the
+    usual sync code in the request's thread. Responses are JSON only and
+    skip the response cache and ETags of the sync routes.
+
+    Viewsets load their relations in `aprefetch`.
+    """
+
+    async_renderer_classes = (JSONRenderer,)
+
+    @classmethod
+    def as_async_view(cls, action: str):
+        async def view(request, *args, **kwargs):
+            self = cls(action_map={"get": action})
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.renderer_classes = self.async_renderer_classes
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if self.action is None:
+                self.http_method_not_allowed(request, *args, **kwargs)
+
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        # Rendered here, Django would render a lazy response in a thread
+        self.response.render()
+
+        return HttpResponse(
+            self.response.content,
+            status=self.response.status_code,
+            headers=self.response.headers,
+        )
+
+    def get_async_queryset(self):
+        return self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        )
+
+    async def aprefetch(self, instances: list) -> None:
+        """Loads the relations the serializer reads, on the async ORM."""
+
+    async def aget_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_async_queryset()
+
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given "
+                f"query."
+            )
+
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.get_async_queryset()
+        page = None
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(
+                queryset, request, view=self
+            )
+
+        instances = (
+            page
+            if page is not None
+            else [instance async for instance in queryset]
+        )
+        await self.aprefetch(instances)
+        data = self.get_serializer(instances, many=True).data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        await self.aprefetch([instance])
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.conf import settings
+
+
+async def asgi_request(app, method, path, body=None, headers=()):
+    """
+    Sends one request straight to an ASGI application and returns
+    (status, response headers, seconds). `body` is JSON encoded.
+    """
+    path, _, query_string = path.partition("?")
+    request_headers = [(b"host", b"localhost"), *headers]
+    content = b""
+
+    if body is not None:
+        content = json.dumps(body).encode()
+        request_headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(content)).encode()),
+        ]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "root_path": "",
+        "headers": request_headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": content, "more_body": False}]
+    response = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Never disconnects, the handler cancels this when done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode().lower(): value.decode()
+                for name, value in message["headers"]
+            }
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return (
+        response["status"],
+        response["headers"],
+        time.perf_counter() - started,
+    )
+
+
+async def run_concurrently(send_request, concurrency, count):
+    """
+    Awaits `send_request()` `count` times keeping `concurrency` requests
+    in flight. Returns (results, elapsed seconds).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await send_request()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited() for _ in range(count)))
+    return results, time.perf_counter() - started
+
+
+def latency_percentiles(seconds) -> dict:
+    """p50, p95 and p99 of request timings, in milliseconds."""
+    timings = sorted(seconds)
+    if len(timings) == 1:
+        timings *= 2
+
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+def rest_framework_without_throttling() -> dict:
+    """REST_FRAMEWORK settings with every throttle rate switched off."""
+    return {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            scope: None
+            for scope in settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+        },
+    }
@@ -0,0 +1,230 @@
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from theatre.allocation import find_best_block, free_intervals
+from theatre.events import SEAT_TAKEN, publish_seats
+from theatre.exceptions import NoAdjacentSeats, SeatsUnavailable
+from theatre.models import Performance, Ticket
+
+SEAT_REPEATED_MESSAGE = "This seat is requested more than once."
+
+MAX_BOOKING_ATTEMPTS = 3
+# deadlock_detected, lock_not_available, serialization_failure
+RETRYABLE_SQLSTATES = ("40P01", "55P03", "40001")
+
+logger = logging.getLogger(__name__)
+
+
+def _seat_key(ticket: dict) -> tuple:
+    return ticket["performance"].id, ticket["row"], ticket["seat"]
+
+
+def _raise_ticket_errors(tickets: list, errors: dict):
+    """
+    Raises per-ticket errors in the same shape as a nested
+    `TicketSerializer(many=True)` does: one entry per requested ticket.
+    """
+    raise serializers.ValidationError(
+        {"tickets": [errors.get(index, {}) for index in range(len(tickets))]}
+    )
+
+
+def validate_tickets(tickets: list) -> None:
+    """
+    Validates seats against the hall geometry and against each other
+    without touching the database. Every performance is expected to
+    carry its `theatre_hall` already.
+    """
+    errors = {}
+
+    for index, ticket in enumerate(tickets):
+        try:
+            Ticket.validate_ticket(
+                ticket["row"],
+                ticket["seat"],
+                ticket["performance"].theatre_hall,
+                serializers.ValidationError,
+            )
+        except serializers.ValidationError as error:
+            errors[index] = error.detail
+
+    repeated = Counter(_seat_key(ticket) for ticket in tickets)
+    for index, ticket in enumerate(tickets):
+        if index not in errors and repeated[_seat_key(ticket)] > 1:
+            errors[index] = {"seat": [SEAT_REPEATED_MESSAGE]}
+
+    if errors:
+        _raise_ticket_errors(tickets, errors)
+
+
+def find_taken_seats(tickets: list) -> set:
+    """Returns the (performance_id, row, seat) keys already sold."""
+    seats_filter = Q()
+    for ticket in tickets:
+        seats_filter |= Q(
+            performance=ticket["performance"],
+            row=ticket["row"],
+            seat=ticket["seat"],
+        )
+
+    return set(
+        Ticket.objects.filter(seats_filter).values_list(
+            "performance_id", "row", "seat"
+        )
+    )
+
+
+def lock_performances(performance_ids) -> None:
+    """
+    Takes row locks on the performances (in id order, so concurrent
+    reservations spanning several performances cannot deadlock). Seats of
+    a performance are only claimed while holding its lock.
+    """
+    list(
+        Performance.objects.select_for_update()
+        .filter(pk__in=performance_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _lost_seats(tickets: list, taken: set) -> list:
+    return [
+        {
+            "performance": ticket["performance"].id,
+            "row": ticket["row"],
+            "seat": ticket["seat"],
+        }
+        for ticket in tickets
+        if _seat_key(ticket) in taken
+    ]
+
+
+def _insert_tickets(reservation, tickets: list) -> list:
+    created = Ticket.objects.bulk_create(
+        Ticket(reservation=reservation, **ticket) for ticket in tickets
+    )
+    Performance.objects.adjust_tickets_sold(
+        Counter(ticket["performance"].id for ticket in tickets)
+    )
+
+    seats_by_performance = defaultdict(list)
+    for ticket in tickets:
+        seats_by_performance[ticket["performance"].id].append(
+            (ticket["row"], ticket["seat"])
+        )
+    for performance_id, seats in seats_by_performance.items():
+        publish_seats(performance_id, SEAT_TAKEN, seats)
+
+    return created
+
+
+def _claim_seats(reservation, tickets: list) -> list:
+    lock_performances({ticket["performance"].id for ticket in tickets})
+
+    taken = find_taken_seats(tickets)
+    if taken:
+        raise SeatsUnavailable(_lost_seats(tickets, taken))
+
+    return _insert_tickets(reservation, tickets)
+
+
+def _seats_unavailable(tickets: list):
+    lost_seats = _lost_seats(tickets, find_taken_seats(tickets))
+    return SeatsUnavailable(lost_seats) if lost_seats else None
+
+
+def _claim_with_retries(claim, conflict_error) -> list:
+    """
+    Runs `claim` in a savepoint of its own, so a lost race does not roll
+    back the caller's transaction. Deadlocks and unique violations from
+    writers that bypass the locks are retried (and logged at INFO) a
+    bounded number of times; once they run out, the exception returned
+    by `conflict_error` is raised instead of the unique violation (which
+    is re-raised when it returns None).
+    """
+    for attempt in range(1, MAX_BOOKING_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return claim()
+        except IntegrityError as error:
+            if attempt == MAX_BOOKING_ATTEMPTS:
+                conflict = conflict_error()
+                if conflict is not None:
+                    raise conflict from error
+                raise
+            logger.info("Seat claim attempt %s failed: %s", attempt, error)
+        except OperationalError as error:
+            sqlstate = getattr(error.__cause__, "sqlstate", None)
+            if (
+                sqlstate not in RETRYABLE_SQLSTATES
+                or attempt == MAX_BOOKING_ATTEMPTS
+            ):
+                raise
+            logger.info("Seat claim attempt %s failed: %s", attempt, error)
+
+        time.sleep(random.uniform(0, 0.01 * attempt))
+
+
+def book_tickets(reservation, tickets: list) -> list:
+    """
+    Claims all seats of a reservation under the performance row locks,
+    inserts them with a single INSERT and bumps the `tickets_sold`
+    counters. `tickets` are validated ticket dicts (row, seat,
+    performance).
+
+    Seats sold to somebody else raise `SeatsUnavailable` (409) listing
+    them.
+    """
+    validate_tickets(tickets)
+
+    return _claim_with_retries(
+        lambda: _claim_seats(reservation, tickets),
+        lambda: _seats_unavailable(tickets),
+    )
+
+
+def _allocate_block(reservation, performance, size, preferences) -> list:
+    lock_performances([performance.id])
+
+    hall = performance.theatre_hall
+    intervals = free_intervals(
+        performance.tickets.values_list("row", "seat"),
+        hall.rows,
+        hall.seats_in_row,
+    )
+    block = find_best_block(intervals, hall.seats_in_row, size, **preferences)
+    if block is None:
+        raise NoAdjacentSeats()
+
+    row, first_seat = block
+    return _insert_tickets(
+        reservation,
+        [
+            {"performance": performance, "row": row, "seat": seat}
+            for seat in range(first_seat, first_seat + size)
+        ],
+    )
+
+
+def allocate_seats(reservation, performance, size: int, **preferences):
+    """
+    Picks the best block of `size` adjacent free seats of the performance
+    (see `theatre.allocation.find_best_block` for `preferences`) and
+    claims it for the reservation. The free seats are read under the
+    performance lock, so the block cannot be sold meanwhile.
+    `performance` is expected to carry its `theatre_hall` already.
+
+    Blocks still lost to writers bypassing the lock after the retries
+    raise `NoAdjacentSeats` (409) as well.
+    """
+    return _claim_with_retries(
+        lambda: _allocate_block(reservation, performance, size, preferences),
+        NoAdjacentSeats,
+    )
@@ -0,0 +1,144 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+RESPONSE_CACHE_ALIAS = "responses"
+VERSION_KEY_PREFIX = "theatre:model-version"
+RESPONSE_KEY_PREFIX = "theatre:response"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(model) -> str:
+    return f"{VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def bump_model_version(model) -> None:
+    """Invalidates every cached response that depends on `model`."""
+    cache = get_cache()
+    key = _version_key(model)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Seeded from the clock, so a counter lost to eviction or a
+        # restart never reuses a version an old response was cached under
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_model_version_on_commit(model, using=None) -> None:
+    """
+    Bumps now, so cached responses stop being read, and again once the
+    transaction commits. Responses built by concurrent reads in between
+    still saw the old rows, the second bump leaves them unread.
+    """
+    bump_model_version(model)
+    transaction.on_commit(lambda: bump_model_version(model), using=using)
+
+
+def get_model_versions(models) -> list:
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def record(view_name: str, outcome: str) -> None:
+    with _stats_lock:
+        _stats[(view_name, outcome)] += 1
+
+
+def get_stats() -> dict:
+    """Returns {view name: {"hit": n, "miss": n}} for this process."""
+    stats = {}
+
+    with _stats_lock:
+        for (view_name, outcome), count in _stats.items():
+            stats.setdefault(view_name, {"hit": 0, "miss": 0})[
+                outcome
+            ] = count
+
+    return stats
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+class CachedResponseMixin:
+    """
+    Caches `list` and `retrieve` responses of read-mostly viewsets.
+
+    The key covers the viewset, host, path, sorted query params and the
+    version counters of `cache_models`, which signals bump on every write,
+    so stale entries are never read, only left to expire.
+    """
+
+    cache_models = ()
+    cache_timeout = None
+
+    def get_cache_key(self, request) -> str:
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        versions = get_model_versions(self.cache_models)
+        raw_key = "|".join(
+            [
+                self.__class__.__name__,
+                request.get_host(),
+                request.path,
+                params,
+                *map(str, versions),
+            ]
+        )
+        digest = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+        return f"{RESPONSE_KEY_PREFIX}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        view_name = self.__class__.__name__
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+
+        if data is not None:
+            record(view_name, "hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        record(view_name, "miss")
+        response = handler(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            timeout = (
+                self.cache_timeout
+                if self.cache_timeout is not None
+                else cache.default_timeout
+            )
+            cache.set(key, response.data, timeout)
+
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
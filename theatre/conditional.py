@@ -0,0 +1,54 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Answers `If-None-Match` on `retrieve` with 304 before the object is
+    loaded or serialized. Views implement `get_etag_version()` returning
+    a cheap tuple that changes whenever the representation does (or None
+    when the object does not exist).
+    """
+
+    def get_etag_version(self):
+        raise NotImplementedError
+
+    def get_etag(self, request, version) -> str:
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        renderer_format = getattr(request, "accepted_renderer", None)
+        raw_etag = "|".join(
+            [
+                request.path,
+                params,
+                str(getattr(renderer_format, "format", "")),
+                *map(str, version),
+            ]
+        )
+        return quote_etag(hashlib.sha1(raw_etag.encode("utf-8")).hexdigest())
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            version = self.get_etag_version()
+        except (TypeError, ValueError):
+            version = None
+
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self.get_etag(request, version)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = super().retrieve(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+
+        return response
@@ -0,0 +1,478 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from faker import Faker
+
+from theatre.models import (
+    DEFAULT_PERFORMANCE_MINUTES,
+    SEARCH_CONFIG,
+    Actor,
+    Genre,
+    Performance,
+    PerformanceAvailability,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+CHUNK_SIZE = 5000
+GENRES = ["Comedy", "Drama", "Musical", "Tragedy", "Historical"]
+# Gap between two performances in the same hall, they must not overlap
+PERFORMANCE_SLOT = timedelta(minutes=DEFAULT_PERFORMANCE_MINUTES)
+
+BULK_CREATE = "bulk"
+COPY = "copy"
+INSERT_METHODS = (BULK_CREATE, COPY)
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Progress:
+    """
+    Counts inserted rows per stage and hands (stage, done, total,
+    rows/sec) to `report` after every chunk.
+    """
+
+    def __init__(self, report=None):
+        self.report = report
+        self.stage = None
+
+    def start(self, stage: str, total: int):
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def advance(self, rows: int):
+        self.done += rows
+        if self.report:
+            elapsed = time.perf_counter() - self.started
+            self.report(
+                self.stage,
+                self.done,
+                self.total,
+                self.done / elapsed if elapsed else 0.0,
+            )
+
+
+def bulk_insert(model, objects, progress=None, chunk_size=CHUNK_SIZE):
+    created = []
+    for chunk in chunked(objects, chunk_size):
+        created += model.objects.bulk_create(chunk)
+        if progress:
+            progress.advance(len(chunk))
+    return created
+
+
+def copy_rows(model, columns, rows) -> None:
+    """Streams rows into the model's table with COPY FROM STDIN."""
+    quote = connection.ops.quote_name
+    sql = (
+        f"COPY {quote(model._meta.db_table)} "
+        f"({', '.join(quote(column) for column in columns)}) FROM STDIN"
+    )
+
+    with connection.cursor() as cursor:
+        with cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def reserve_ids(model, count: int) -> list:
+    """Draws `count` ids from the model's sequence for rows COPY adds."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            [model._meta.db_table, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ticket_quotas(capacities: list, tickets: int, rng) -> list:
+    """
+    Spreads `tickets` over performances of the given capacities, never
+    above a capacity. Raises ValueError when they do not fit.
+    """
+    if tickets > sum(capacities):
+        raise ValueError(
+            f"{tickets} tickets do not fit into {sum(capacities)} seats"
+        )
+
+    quotas = [0] * len(capacities)
+    remaining = tickets
+    while remaining:
+        open_seats = [
+            index
+            for index, capacity in enumerate(capacities)
+            if quotas[index] < capacity
+        ]
+        share = max(1, remaining // len(open_seats))
+        for index in rng.sample(open_seats, len(open_seats)):
+            added = min(share, capacities[index] - quotas[index], remaining)
+            quotas[index] += added
+            remaining -= added
+            if not remaining:
+                break
+
+    return quotas
+
+
+def booked_seats(performances, rng):
+    """
+    Yields (performance_id, [(row, seat), ...]) groups of 1-4 seats for
+    (performance_id, seats_in_row, capacity, quota) tuples. Seats are
+    sampled without replacement, so they never collide.
+    """
+    for performance_id, seats_in_row, capacity, quota in performances:
+        seats = [
+            (index // seats_in_row + 1, index % seats_in_row + 1)
+            for index in rng.sample(range(capacity), quota)
+        ]
+
+        start = 0
+        while start < len(seats):
+            size = rng.randint(1, 4)
+            yield performance_id, seats[start:start + size]
+            start += size
+
+
+def insert_tickets(
+    performances,
+    user_ids,
+    seed=None,
+    method=COPY,
+    chunk_size=CHUNK_SIZE,
+    progress=None,
+) -> int:
+    """
+    Books the quota of every performance in reservations of 1-4 tickets
+    of random users, one transaction per chunk. Returns the number of
+    reservations.
+    """
+    rng = random.Random(seed)
+    reservations_count = 0
+
+    for batch in chunked(booked_seats(performances, rng), chunk_size):
+        with transaction.atomic():
+            if method == COPY:
+                reservation_ids = reserve_ids(Reservation, len(batch))
+                created_at = timezone.now()
+                copy_rows(
+                    Reservation,
+                    ("id", "created_at", "user_id"),
+                    (
+                        (reservation_id, created_at, rng.choice(user_ids))
+                        for reservation_id in reservation_ids
+                    ),
+                )
+                copy_rows(
+                    Ticket,
+                    ("row", "seat", "performance_id", "reservation_id"),
+                    (
+                        (row, seat, performance_id, reservation_id)
+                        for (performance_id, seats), reservation_id in zip(
+                            batch, reservation_ids
+                        )
+                        for row, seat in seats
+                    ),
+                )
+            else:
+                reservations = Reservation.objects.bulk_create(
+                    Reservation(user_id=rng.choice(user_ids)) for _ in batch
+                )
+                Ticket.objects.bulk_create(
+                    Ticket(
+                        row=row,
+                        seat=seat,
+                        performance_id=performance_id,
+                        reservation=reservation,
+                    )
+                    for (performance_id, seats), reservation in zip(
+                        batch, reservations
+                    )
+                    for row, seat in seats
+                )
+
+        reservations_count += len(batch)
+        if progress:
+            progress.advance(sum(len(seats) for _, seats in batch))
+
+    return reservations_count
+
+
+def _insert_tickets_worker(performances, user_ids, seed, method, chunk_size):
+    reservations = insert_tickets(
+        performances, user_ids, seed, method, chunk_size
+    )
+    return reservations, sum(quota for *_, quota in performances)
+
+
+def check_scale(*, halls, plays, actors, performances, users, tickets):
+    """
+    Raises ValueError for counts `generate_dataset` cannot produce, before
+    anything is inserted.
+    """
+    counts = {
+        "halls": halls,
+        "plays": plays,
+        "actors": actors,
+        "performances": performances,
+        "users": users,
+        "tickets": tickets,
+    }
+    negative = [name for name, count in counts.items() if count < 0]
+    if negative:
+        raise ValueError(f"Counts must not be negative: {', '.join(negative)}")
+
+    if performances and not (halls and plays):
+        raise ValueError("Performances need at least one hall and one play")
+    if tickets and not (performances and users):
+        raise ValueError("Tickets need at least one performance and one user")
+
+
+def generate_dataset(
+    *,
+    halls=5,
+    plays=50,
+    actors=100,
+    performances=200,
+    users=100,
+    tickets=10000,
+    password="password",
+    email_domain="example.com",
+    chunk_size=CHUNK_SIZE,
+    method=COPY,
+    workers=1,
+    seed=None,
+    report=None,
+) -> dict:
+    """
+    Inserts a synthetic catalogue: halls, genres, actors, plays with their
+    relations, performances on non-overlapping slots per hall, users
+    sharing one password hash, and reservations of 1-4 tickets.
+
+    Rows go in by chunks, with `bulk_create` or, for reservations and
+    tickets, with COPY (`method`). Seats are sampled per performance
+    without replacement, so no insert ever collides, and `tickets_sold`
+    is filled in directly. With `workers` > 1 tickets are inserted by
+    that many processes, each over its own connection. Every stage
+    commits on its own. `report(stage, done, total, rows_per_sec)` is
+    called after every chunk. Counts are validated by `check_scale`.
+
+    Returns the number of rows per model.
+    """
+    if method not in INSERT_METHODS:
+        raise ValueError(f"Unknown insert method: {method}")
+    check_scale(
+        halls=halls,
+        plays=plays,
+        actors=actors,
+        performances=performances,
+        users=users,
+        tickets=tickets,
+    )
+
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    progress = Progress(report)
+
+    with transaction.atomic():
+        progress.start("users", users)
+        password_hash = make_password(password)
+        user_ids = [
+            user.pk
+            for user in bulk_insert(
+                get_user_model(),
+                (
+                    get_user_model()(
+                        email=f"user{index}@{email_domain}",
+                        password=password_hash,
+                    )
+                    for index in range(users)
+                ),
+                progress,
+                chunk_size,
+            )
+        ]
+
+    with transaction.atomic():
+        progress.start("catalogue", halls + actors + plays)
+        hall_objects = bulk_insert(
+            TheatreHall,
+            (
+                TheatreHall(
+                    name=f"{fake.company()} hall",
+                    rows=rng.randint(10, 30),
+                    seats_in_row=rng.randint(15, 40),
+                )
+                for _ in range(halls)
+            ),
+            progress,
+            chunk_size,
+        )
+        Genre.objects.bulk_create(
+            (Genre(name=name) for name in GENRES), ignore_conflicts=True
+        )
+        genre_objects = list(Genre.objects.filter(name__in=GENRES))
+        actor_objects = bulk_insert(
+            Actor,
+            (
+                Actor(
+                    first_name=fake.first_name(), last_name=fake.last_name()
+                )
+                for _ in range(actors)
+            ),
+            progress,
+            chunk_size,
+        )
+        play_objects = bulk_insert(
+            Play,
+            (
+                Play(title=fake.catch_phrase(), description=fake.text())
+                for _ in range(plays)
+            ),
+            progress,
+            chunk_size,
+        )
+        # Faker text is ASCII, the unidecode step of Play.save() is a no-op
+        Play.objects.filter(
+            pk__in=[play.pk for play in play_objects]
+        ).update(
+            search_vector=SearchVector(
+                "title", weight="A", config=SEARCH_CONFIG
+            )
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        )
+        bulk_insert(
+            Play.actors.through,
+            (
+                Play.actors.through(play=play, actor=actor)
+                for play in play_objects
+                for actor in rng.sample(
+                    actor_objects, k=min(len(actor_objects), 4)
+                )
+            ),
+            chunk_size=chunk_size,
+        )
+        bulk_insert(
+            Play.genres.through,
+            (
+                Play.genres.through(play=play, genre=genre)
+                for play in play_objects
+                for genre in rng.sample(genre_objects, k=rng.randint(1, 2))
+            ),
+            chunk_size=chunk_size,
+        )
+
+    with transaction.atomic():
+        progress.start("performances", performances)
+        first_day = timezone.now().replace(
+            minute=0, second=0, microsecond=0
+        ) + timedelta(days=1)
+        schedule = [
+            (
+                hall_objects[index % halls],
+                first_day + PERFORMANCE_SLOT * (index // halls),
+            )
+            for index in range(performances)
+        ]
+        quotas = ticket_quotas(
+            [hall.capacity for hall, _ in schedule], tickets, rng
+        )
+        performance_objects = bulk_insert(
+            Performance,
+            (
+                Performance(
+                    play=rng.choice(play_objects),
+                    theatre_hall=hall,
+                    show_time=show_time,
+                    tickets_sold=quota,
+                )
+                for (hall, show_time), quota in zip(schedule, quotas)
+            ),
+            progress,
+            chunk_size,
+        )
+        # bulk_create sends no signals, tickets_sold is already final
+        PerformanceAvailability.objects.refresh()
+
+    progress.start("tickets", tickets)
+    booked = [
+        (
+            performance.pk,
+            performance.theatre_hall.seats_in_row,
+            performance.theatre_hall.capacity,
+            quota,
+        )
+        for performance, quota in zip(performance_objects, quotas)
+        if quota
+    ]
+
+    if workers > 1 and len(booked) > 1:
+        reservations_count = _insert_tickets_in_processes(
+            booked, user_ids, rng, method, chunk_size, workers, progress
+        )
+    else:
+        reservations_count = insert_tickets(
+            booked, user_ids, rng.random(), method, chunk_size, progress
+        )
+
+    return {
+        "users": users,
+        "theatre_halls": halls,
+        "genres": len(genre_objects),
+        "actors": actors,
+        "plays": plays,
+        "performances": performances,
+        "reservations": reservations_count,
+        "tickets": tickets,
+    }
+
+
+def _insert_tickets_in_processes(
+    booked, user_ids, rng, method, chunk_size, workers, progress
+) -> int:
+    """Splits the performances into slices booked by worker processes."""
+    slices = [booked[index::workers * 4] for index in range(workers * 4)]
+    reservations_count = 0
+
+    # Forked workers open connections of their own, they must not inherit
+    # (and later close) the socket of this one
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = [
+            executor.submit(
+                _insert_tickets_worker,
+                performances,
+                user_ids,
+                rng.random(),
+                method,
+                chunk_size,
+            )
+            for performances in slices
+            if performances
+        ]
+        for future in as_completed(futures):
+            reservations, tickets = future.result()
+            reservations_count += reservations
+            progress.advance(tickets)
+
+    return reservations_count
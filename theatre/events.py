@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+import psycopg
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SEAT_TAKEN = "seat-taken"
+SEAT_RELEASED = "seat-released"
+
+
+class Subscription:
+    """A bounded event queue of one stream, owned by its event loop."""
+
+    max_pending = 1000
+
+    def __init__(self, performance_id):
+        self.performance_id = performance_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is too slow, it will get a fresh snapshot instead
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def reset(self):
+        """
+        Drops the pending events and the overflow mark before a fresh
+        snapshot, so only events newer than it are delivered. Runs on the
+        subscription's loop, where `put` runs too, so nothing slips in
+        between.
+        """
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.overflowed = False
+
+
+class InProcessSeatEventHub:
+    """
+    Fans seat events out to the streams open in this process. Events are
+    delivered once the transaction that changed the tickets commits.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, performance_id) -> Subscription:
+        subscription = Subscription(performance_id)
+
+        with self._lock:
+            self._subscriptions[performance_id].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.performance_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.performance_id]
+
+    def dispatch(self, performance_id, event: dict) -> None:
+        """Delivers an event to the local subscribers, from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(performance_id, ()))
+
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+    def send(self, performance_id, event: dict, using="default") -> None:
+        """Publishes an event from inside the transaction that caused it."""
+        transaction.on_commit(
+            lambda: self.dispatch(performance_id, event), using=using
+        )
+
+
+class PostgresSeatEventHub(InProcessSeatEventHub):
+    """
+    Shares events between workers through Postgres LISTEN/NOTIFY. NOTIFY
+    is transactional, so events of rolled back reservations are never
+    delivered. Each process runs one listener thread on its own
+    connection and fans the notifications out locally.
+    """
+
+    channel = "theatre_seat_events"
+    # NOTIFY payloads are limited to 8000 bytes
+    seats_per_notification = 250
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+
+    def subscribe(self, performance_id) -> Subscription:
+        self._start_listener()
+        return super().subscribe(performance_id)
+
+    def send(self, performance_id, event: dict, using="default") -> None:
+        seats = event["seats"]
+
+        with connections[using].cursor() as cursor:
+            for start in range(0, len(seats), self.seats_per_notification):
+                payload = {
+                    **event,
+                    "seats": seats[start:start + self.seats_per_notification],
+                }
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    [self.channel, json.dumps(payload)],
+                )
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name="seat-events", daemon=True
+                )
+                self._listener.start()
+
+    def close(self):
+        """Stops the listener thread and closes its connection."""
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join()
+
+    def _listen(self):
+        params = connections["default"].get_connection_params()
+
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    self._listening.set()
+
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=1):
+                            event = json.loads(notify.payload)
+                            self.dispatch(event["performance"], event)
+            except Exception:
+                logger.exception("Seat event listener failed, reconnecting")
+                self._stopped.wait(1)
+            finally:
+                self._listening.clear()
+
+
+@lru_cache(maxsize=None)
+def get_hub():
+    backend = getattr(
+        settings,
+        "SEAT_EVENTS_BACKEND",
+        "theatre.events.InProcessSeatEventHub",
+    )
+    return import_string(backend)()
+
+
+def publish_seats(performance_id, event_type: str, seats, using="default"):
+    """Announces taken or released (row, seat) pairs of a performance."""
+    seats = [[row, seat] for row, seat in seats]
+    if seats:
+        get_hub().send(
+            performance_id,
+            {
+                "type": event_type,
+                "performance": performance_id,
+                "seats": seats,
+            },
+            using=using,
+        )
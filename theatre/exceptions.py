@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsUnavailable(APIException):
+    """Seats were sold to a concurrent reservation first."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_unavailable"
+
+    def __init__(self, lost_seats, detail=None, code=None):
+        super().__init__(detail, code)
+        self.lost_seats = lost_seats
+        self.detail = {"detail": self.detail, "lost_seats": lost_seats}
+
+
+class NoAdjacentSeats(APIException):
+    """No block of adjacent free seats matches the allocation request."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "No block of adjacent free seats matches the request."
+    default_code = "no_adjacent_seats"
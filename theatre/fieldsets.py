@@ -0,0 +1,155 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        FIELDS_PARAM,
+        type=OpenApiTypes.STR,
+        description=(
+            "Comma separated fields to send, dotted for fields of nested "
+            "objects (ex. ?fields=id,show_time,play.title), all by default"
+        ),
+    ),
+    OpenApiParameter(
+        EXPAND_PARAM,
+        type=OpenApiTypes.STR,
+        description=(
+            "Comma separated nested objects to send in full, dotted for "
+            "deeper ones (ex. ?expand=play.actors); the others are sent "
+            "as ids. Every nested object is expanded by default"
+        ),
+    ),
+]
+
+
+def _paths(value):
+    """'id,play.title' -> {('id',), ('play', 'title')}; None stays None."""
+    if value is None:
+        return None
+
+    return frozenset(
+        tuple(item.strip().split("."))
+        for item in value.split(",")
+        if item.strip()
+    )
+
+
+def _tails(paths, name):
+    return frozenset(
+        path[1:] for path in paths if path[0] == name and len(path) > 1
+    )
+
+
+class FieldSet:
+    """
+    Fields one level of a response is asked for, with `?fields=` and
+    `?expand=`. `fields` and `expand` are sets of dotted paths split into
+    tuples; None means every field, or every nested object expanded.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None:
+            return cls()
+
+        params = request.query_params
+        # An empty ?fields= selects nothing useful, it is ignored, while
+        # an empty ?expand= sends every nested object as an id
+        return cls(
+            _paths(params.get(FIELDS_PARAM) or None),
+            _paths(params.get(EXPAND_PARAM)),
+        )
+
+    def includes(self, *names) -> bool:
+        """Whether any of `names` is sent."""
+        return self.fields is None or any(
+            path[0] in names for path in self.fields
+        )
+
+    def expands(self, name) -> bool:
+        """
+        Whether the nested object `name` is sent in full. Asking for its
+        fields (?fields=play.title) expands it too.
+        """
+        return (
+            self.expand is None
+            or any(path[0] == name for path in self.expand)
+            or bool(self.fields and _tails(self.fields, name))
+        )
+
+    def nested(self, name):
+        """The FieldSet of the nested object `name`."""
+        fields = None
+        if self.fields is not None and (name,) not in self.fields:
+            fields = _tails(self.fields, name) or None
+        expand = None if self.expand is None else _tails(self.expand, name)
+
+        return FieldSet(fields, expand)
+
+    def columns(self, model, *required, prefix="", exclude=()) -> list:
+        """
+        `only()` names of the concrete fields of `model` that are sent,
+        plus the primary key and `required` ones (ordering, sources of
+        computed fields).
+        """
+        return [
+            f"{prefix}{field.name}"
+            for field in model._meta.concrete_fields
+            if field.primary_key
+            or field.name in required
+            or (self.includes(field.name) and field.name not in exclude)
+        ]
+
+
+class SparseFieldsMixin:
+    """
+    Serializer fields of GET responses follow `?fields=` and `?expand=`:
+    fields left out are dropped and nested serializers that are not
+    expanded are sent as primary keys. Nested serializers read the part
+    of the FieldSet under their field name.
+    """
+
+    @property
+    def fieldset(self) -> FieldSet:
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+
+        fieldset = FieldSet.from_request(self.context.get("request"))
+        for name in reversed(names):
+            fieldset = fieldset.nested(name)
+        return fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        fieldset = self.fieldset
+        for name, field in list(fields.items()):
+            if not fieldset.includes(name):
+                del fields[name]
+            elif isinstance(
+                field, serializers.BaseSerializer
+            ) and not fieldset.expands(name):
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True,
+                    many=isinstance(field, serializers.ListSerializer),
+                    source=field.source,
+                )
+
+        return fields
@@ -0,0 +1,146 @@
+import logging
+import pathlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from theatre.cache import bump_model_version
+from theatre.models import MediaFile, Play
+
+logger = logging.getLogger(__name__)
+
+# Longest side of every variant, in pixels
+VARIANT_SIZES = {"thumbnail": 320, "medium": 960}
+# Extension: (Pillow format, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(name: str, size: str, extension: str) -> str:
+    """uploads/play/hamlet.png -> uploads/play/hamlet-medium.webp"""
+    path = pathlib.PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}-{size}.{extension}"))
+
+
+def variant_names(variants: dict) -> list:
+    return [
+        name for formats in variants.values() for name in formats.values()
+    ]
+
+
+def build_variants(name: str, storage=default_storage) -> dict:
+    """
+    Stores every size of VARIANT_SIZES in every format of VARIANT_FORMATS
+    next to the original. Images are only ever shrunk. Returns
+    {size: {extension: storage name}}.
+    """
+    with storage.open(name) as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+
+    variants = {}
+    for size, pixels in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+        variants[size] = {}
+
+        for extension, (image_format, options) in VARIANT_FORMATS.items():
+            converted = resized
+            if image_format == "JPEG" and resized.mode != "RGB":
+                converted = resized.convert("RGB")
+            elif resized.mode not in ("RGB", "RGBA"):
+                converted = resized.convert("RGBA")
+
+            content = BytesIO()
+            converted.save(content, image_format, **options)
+            variants[size][extension] = storage.save(
+                variant_name(name, size, extension),
+                ContentFile(content.getvalue()),
+            )
+
+    return variants
+
+
+def generate_variants(play_id: int, name: str) -> None:
+    """
+    Builds the variants of a play image and stores their names, unless
+    the play got another image in the meantime.
+    """
+    try:
+        variants = build_variants(name)
+        with transaction.atomic():
+            previous = (
+                Play.objects.select_for_update()
+                .filter(pk=play_id, image=name)
+                .values_list("image_variants", flat=True)
+                .first()
+            )
+            if previous is None:
+                # Never referenced, garbage collection deletes them
+                return
+
+            Play.objects.filter(pk=play_id).update(
+                image_variants=variants, updated_at=timezone.now()
+            )
+            refs = Counter(variant_names(variants))
+            refs.subtract(variant_names(previous))
+            MediaFile.objects.adjust_refs(refs)
+
+        bump_model_version(Play)
+    except Exception:
+        # The original stays available, `generate_image_variants` retries
+        logger.exception("Image variants of play %s failed", play_id)
+
+
+def _generate_variants_in_worker(play_id: int, name: str) -> None:
+    try:
+        generate_variants(play_id, name)
+    finally:
+        # Worker threads outlive requests, nothing else closes these
+        connections.close_all()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                thread_name_prefix="image-variants",
+            )
+
+    return _executor
+
+
+def schedule_variants(play: Play) -> None:
+    """
+    Generates the variants of the play image once the transaction that
+    stored it commits. With IMAGE_VARIANT_WORKERS they are built by a
+    pool of threads (Pillow releases the GIL while resizing and
+    encoding), so the upload request does not wait for them.
+    """
+    play_id, name = play.pk, play.image.name
+
+    def submit():
+        if settings.IMAGE_VARIANT_WORKERS > 0:
+            get_executor().submit(
+                _generate_variants_in_worker, play_id, name
+            )
+        else:
+            generate_variants(play_id, name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,408 @@
+import asyncio
+import itertools
+import json
+import subprocess
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from theatre.benchmarks import (
+    asgi_request,
+    latency_percentiles,
+    rest_framework_without_throttling,
+    run_concurrently,
+)
+from theatre.datagen import generate_dataset
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+)
+
+DUMMY_CACHE = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+PASSWORD = "bench-password"
+LIST_LIMIT = 20
+# Performances per bulk schedule request
+BULK_SIZE = 5
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Build a dataset in a throwaway test database, drive every API "
+        "route in-process over ASGI at several concurrency levels and "
+        "print latency percentiles, queries per request and allocations "
+        "as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--halls", type=int, default=5)
+        parser.add_argument("--plays", type=int, default=100)
+        parser.add_argument("--actors", type=int, default=200)
+        parser.add_argument("--performances", type=int, default=500)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--tickets", type=int, default=50000)
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32",
+            help="Comma separated numbers of requests in flight",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=100,
+            help="Requests per route and concurrency level",
+        )
+        parser.add_argument(
+            "--routes",
+            default="",
+            help="Comma separated route names to run, all by default",
+        )
+        parser.add_argument(
+            "--response-cache",
+            action="store_true",
+            help="Keep the configured response cache instead of a dummy one",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database and reuse its dataset next time",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write JSON to this file")
+
+    def handle(self, *args, **options):
+        scale = {
+            name: options[name]
+            for name in (
+                "halls",
+                "plays",
+                "actors",
+                "performances",
+                "users",
+                "tickets",
+            )
+        }
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+
+        try:
+            if not Performance.objects.exists():
+                generate_dataset(
+                    **scale, password=PASSWORD, seed=options["seed"]
+                )
+
+            caches = {"default": DUMMY_CACHE}
+            if not options["response_cache"]:
+                caches["responses"] = DUMMY_CACHE
+
+            with override_settings(
+                ALLOWED_HOSTS=["*"],
+                CACHES=caches,
+                QUERY_STATS_HEADERS=True,
+                REST_FRAMEWORK=rest_framework_without_throttling(),
+            ):
+                routes = self.get_routes()
+                selected = set(filter(None, options["routes"].split(",")))
+                if selected:
+                    routes = {
+                        name: route
+                        for name, route in routes.items()
+                        if name in selected
+                    }
+
+                results = asyncio.run(
+                    self.run(routes, levels, options["requests"])
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+
+        report = json.dumps(
+            {
+                "commit": self.get_commit(),
+                "scale": scale,
+                "concurrency": levels,
+                "requests": options["requests"],
+                "results": results,
+            },
+            indent=2,
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+
+    def get_routes(self) -> dict:
+        """
+        {name: (method, path, auth header, body factory)} of every route
+        in theatre/urls.py and user/urls.py, except the endless seat event
+        stream and the admin-only writes other than the bulk schedule.
+        """
+        user = Reservation.objects.select_related("user").first().user
+        refresh = RefreshToken.for_user(user)
+        auth = (b"authorization", f"Bearer {refresh.access_token}".encode())
+        admin_token = RefreshToken.for_user(self.get_admin()).access_token
+        admin_auth = (b"authorization", f"Bearer {admin_token}".encode())
+        performance = Performance.objects.filter(tickets_sold__gt=0).first()
+        play = Play.objects.first()
+        list_query = f"?limit={LIST_LIMIT}"
+        booking_target = self.create_booking_target()
+        # Allocated blocks must not take the seats reservations walk through
+        allocation_target = self.create_booking_target()
+        free_seats = itertools.product(
+            range(1, booking_target.theatre_hall.rows + 1),
+            range(1, booking_target.theatre_hall.seats_in_row + 1),
+        )
+        new_users = itertools.count()
+        # Bulk schedules go to their own hall, one show every four hours
+        schedule_hall = TheatreHall.objects.create(
+            name="Benchmark schedule hall", rows=10, seats_in_row=10
+        )
+        schedule_slots = itertools.count()
+        schedule_start = timezone.now() + timedelta(days=1)
+
+        def detail(name, instance):
+            return reverse(f"theatre:{name}", args=(instance.id,))
+
+        def reservation_body():
+            row, seat = next(free_seats)
+            return {
+                "tickets": [
+                    {
+                        "row": row,
+                        "seat": seat,
+                        "performance": booking_target.id,
+                    }
+                ]
+            }
+
+        def bulk_body():
+            return [
+                {
+                    "play": play.id,
+                    "theatre_hall": schedule_hall.id,
+                    "show_time": (
+                        schedule_start
+                        + timedelta(hours=4 * next(schedule_slots))
+                    ).isoformat(),
+                }
+                for _ in range(BULK_SIZE)
+            ]
+
+        def register_body():
+            return {
+                "email": f"bench-new-{next(new_users)}@example.com",
+                "password": PASSWORD,
+            }
+
+        def get(path, with_auth=False):
+            return "GET", path, auth if with_auth else None, None
+
+        def post(path, body, with_auth=False):
+            return "POST", path, auth if with_auth else None, body
+
+        return {
+            "theatre-halls": get(
+                reverse("theatre:theatrehall-list") + list_query
+            ),
+            "theatre-hall": get(
+                detail("theatrehall-detail", TheatreHall.objects.first())
+            ),
+            "genres": get(reverse("theatre:genre-list") + list_query),
+            "genre": get(detail("genre-detail", Genre.objects.first())),
+            "actors": get(reverse("theatre:actor-list") + list_query),
+            "actor": get(detail("actor-detail", Actor.objects.first())),
+            "plays": get(reverse("theatre:play-list") + list_query),
+            "plays-search": get(
+                reverse("theatre:play-list")
+                + f"{list_query}&search={play.title.split()[0]}"
+            ),
+            "plays-async": get(
+                reverse("theatre:play-list-async") + list_query
+            ),
+            "play": get(detail("play-detail", play)),
+            "play-async": get(detail("play-detail-async", play)),
+            "performances": get(
+                reverse("theatre:performance-list") + list_query
+            ),
+            "performances-cursor": get(
+                reverse("theatre:performance-list")
+                + f"{list_query}&pagination=cursor"
+            ),
+            "performances-async": get(
+                reverse("theatre:performance-list-async") + list_query
+            ),
+            "performance": get(detail("performance-detail", performance)),
+            "performance-async": get(
+                detail("performance-detail-async", performance)
+            ),
+            "performance-seats": get(
+                detail("performance-seats", performance)
+            ),
+            "performances-calendar": get(
+                reverse("theatre:performance-calendar")
+            ),
+            "performance-allocate": post(
+                detail("performance-allocate", allocation_target),
+                lambda: {"size": 2},
+                True,
+            ),
+            "performance-bulk": (
+                "POST",
+                reverse("theatre:performance-bulk"),
+                admin_auth,
+                bulk_body,
+            ),
+            "reservations": get(
+                reverse("theatre:reservation-list") + list_query, True
+            ),
+            "reservations-compact": get(
+                reverse("theatre:reservation-list")
+                + f"{list_query}&layout=compact",
+                True,
+            ),
+            "reservation": get(
+                detail(
+                    "reservation-detail",
+                    Reservation.objects.filter(user=user).first(),
+                ),
+                True,
+            ),
+            "reservation-create": post(
+                reverse("theatre:reservation-list"), reservation_body, True
+            ),
+            "user-register": post(reverse("user:register"), register_body),
+            "user-token": post(
+                reverse("user:token_obtain_pair"),
+                lambda: {"email": user.email, "password": PASSWORD},
+            ),
+            "user-token-refresh": post(
+                reverse("user:token_refresh"),
+                lambda: {"refresh": str(refresh)},
+            ),
+            "user-token-verify": post(
+                reverse("user:token_verify"),
+                lambda: {"token": str(refresh.access_token)},
+            ),
+            "user-me": get(reverse("user:manage_user"), True),
+        }
+
+    @staticmethod
+    def get_admin():
+        admin = get_user_model().objects.filter(
+            email="bench-admin@example.com"
+        ).first()
+        return admin or get_user_model().objects.create_user(
+            email="bench-admin@example.com",
+            password=PASSWORD,
+            is_staff=True,
+        )
+
+    @staticmethod
+    def create_booking_target():
+        """An empty performance with enough seats for every booking."""
+        hall = TheatreHall.objects.create(
+            name="Benchmark booking hall", rows=100, seats_in_row=100
+        )
+        return Performance.objects.create(
+            play=Play.objects.first(),
+            theatre_hall=hall,
+            show_time=timezone.now() + timedelta(days=1),
+        )
+
+    async def run(self, routes, levels, requests) -> list:
+        app = ASGIHandler()
+        results = []
+
+        for name, (method, path, auth, body) in routes.items():
+            def send_request():
+                return asgi_request(
+                    app,
+                    method,
+                    path,
+                    body() if body else None,
+                    [auth] if auth else [],
+                )
+
+            # Warms up connections and caches, then measures allocations
+            # of a single request on its own
+            await send_request()
+            alloc_peak_kib = await self.measure_allocations(send_request)
+
+            for concurrency in levels:
+                responses, elapsed = await run_concurrently(
+                    send_request, concurrency, requests
+                )
+                queries = [
+                    int(headers["x-db-queries"].split(";")[0])
+                    for _, headers, _ in responses
+                    if "x-db-queries" in headers
+                ]
+                results.append(
+                    {
+                        "route": name,
+                        "method": method,
+                        "path": path,
+                        "concurrency": concurrency,
+                        "rps": round(requests / elapsed, 1),
+                        **latency_percentiles(
+                            timing for _, _, timing in responses
+                        ),
+                        "errors": sum(
+                            status >= 400 for status, _, _ in responses
+                        ),
+                        "queries_per_request": (
+                            round(sum(queries) / len(queries), 2)
+                            if queries
+                            else None
+                        ),
+                        "alloc_peak_kib": alloc_peak_kib,
+                    }
+                )
+                self.stderr.write(
+                    f"{name} x{concurrency}: "
+                    f"{results[-1]['rps']} req/s, "
+                    f"p95 {results[-1]['p95_ms']} ms"
+                )
+
+        return results
+
+    @staticmethod
+    async def measure_allocations(send_request) -> float:
+        tracemalloc.start()
+        try:
+            await send_request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return round(peak / 1024, 1)
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,199 @@
+import asyncio
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.benchmarks import (
+    asgi_request,
+    latency_percentiles,
+    rest_framework_without_throttling,
+    run_concurrently,
+)
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+DUMMY_CACHE = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare sync and async performance/play reads under ASGI at "
+        "several concurrency levels in one worker"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plays", type=int, default=50)
+        parser.add_argument("--performances", type=int, default=200)
+        parser.add_argument(
+            "--concurrency",
+            default="1,10,50",
+            help="Comma separated numbers of requests in flight",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per route, mode and concurrency level",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        # Committed, so the per-request connections of the handler see it
+        data = self.create_data(options["plays"], options["performances"])
+
+        try:
+            # No throttling and no response cache, every request hits the DB
+            with override_settings(
+                ALLOWED_HOSTS=["*"],
+                CACHES={"default": DUMMY_CACHE, "responses": DUMMY_CACHE},
+                REST_FRAMEWORK=rest_framework_without_throttling(),
+            ):
+                results = asyncio.run(
+                    self.run(data, levels, options["requests"])
+                )
+        finally:
+            self.delete_data(data)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'route':<22}{'mode':<7}{'conc':>6}{'req/s':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['route']:<22}{result['mode']:<7}"
+                f"{result['concurrency']:>6}{result['rps']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}"
+                f"{result['errors']:>8}"
+            )
+
+    async def run(self, data, levels, requests):
+        app = ASGIHandler()
+        routes = {
+            "performance-list": (),
+            "performance-detail": (data["performance"],),
+            "play-list": (),
+            "play-detail": (data["play"],),
+        }
+        results = []
+
+        for route, args in routes.items():
+            paths = {
+                "sync": reverse(f"theatre:{route}", args=args),
+                "async": reverse(f"theatre:{route}-async", args=args),
+            }
+            for concurrency in levels:
+                for mode, path in paths.items():
+                    results.append(
+                        {
+                            "route": route,
+                            "mode": mode,
+                            "concurrency": concurrency,
+                            **await self.measure(
+                                app, path, concurrency, requests
+                            ),
+                        }
+                    )
+
+        return results
+
+    @staticmethod
+    async def measure(app, path, concurrency, requests):
+        responses, elapsed = await run_concurrently(
+            lambda: asgi_request(app, "GET", path), concurrency, requests
+        )
+
+        return {
+            "rps": requests / elapsed,
+            **latency_percentiles(timing for _, _, timing in responses),
+            "errors": sum(status != 200 for status, _, _ in responses),
+        }
+
+    @staticmethod
+    def create_data(plays_count, performances_count):
+        hall = TheatreHall.objects.create(
+            name="Benchmark hall", rows=20, seats_in_row=30
+        )
+        genres = Genre.objects.bulk_create(
+            Genre(name=f"Benchmark genre {index}") for index in range(5)
+        )
+        actors = Actor.objects.bulk_create(
+            Actor(first_name="Benchmark", last_name=f"Actor {index}")
+            for index in range(20)
+        )
+        plays = [
+            Play.objects.create(title=f"Benchmark play {index}")
+            for index in range(plays_count)
+        ]
+        Play.genres.through.objects.bulk_create(
+            Play.genres.through(play=play, genre=genres[index % 5])
+            for index, play in enumerate(plays)
+        )
+        Play.actors.through.objects.bulk_create(
+            Play.actors.through(play=play, actor=actors[(index + shift) % 20])
+            for index, play in enumerate(plays)
+            for shift in range(3)
+        )
+        performances = Performance.objects.bulk_create(
+            Performance(
+                play=plays[index % plays_count],
+                theatre_hall=hall,
+                show_time=timezone.now() + timezone.timedelta(hours=index),
+                # Hourly shows in one hall must not overlap
+                duration=60,
+            )
+            for index in range(performances_count)
+        )
+
+        user = get_user_model().objects.create_user(
+            email="async-benchmark@example.com"
+        )
+        reservation = Reservation.objects.create(user=user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=seat // hall.seats_in_row + 1,
+                seat=seat % hall.seats_in_row + 1,
+                performance=performances[0],
+                reservation=reservation,
+            )
+            for seat in range(0, hall.capacity, 3)
+        )
+        Performance.objects.filter(
+            pk=performances[0].pk
+        ).recount_tickets_sold()
+
+        return {
+            "hall": hall,
+            "user": user,
+            "genres": [genre.pk for genre in genres],
+            "actors": [actor.pk for actor in actors],
+            "plays": [play.pk for play in plays],
+            "play": plays[0].pk,
+            "performance": performances[0].pk,
+        }
+
+    @staticmethod
+    def delete_data(data):
+        data["user"].delete()
+        Performance.objects.filter(theatre_hall=data["hall"]).delete()
+        data["hall"].delete()
+        Play.objects.filter(pk__in=data["plays"]).delete()
+        Actor.objects.filter(pk__in=data["actors"]).delete()
+        Genre.objects.filter(pk__in=data["genres"]).delete()
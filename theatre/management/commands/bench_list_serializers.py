@@ -0,0 +1,143 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from theatre.benchmarks import rest_framework_without_throttling
+from theatre.datagen import generate_dataset
+from theatre.models import Actor, Genre, Performance, Play
+from theatre.serializers import PerformanceListSerializer, PlayListSerializer
+from theatre.views import PerformanceViewSet, PlayViewSet
+
+DUMMY_CACHE = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+
+
+class ModelPerformanceList(PerformanceViewSet):
+    """The performance list as it was before the values() rows."""
+
+    lean = False
+
+    def get_queryset(self):
+        return Performance.objects.select_related(
+            "play", "theatre_hall"
+        ).with_tickets_available()
+
+    def get_serializer_class(self):
+        return PerformanceListSerializer
+
+
+class ModelPlayList(PlayViewSet):
+    """The play list as it was before the values() rows."""
+
+    lean = False
+
+    def get_queryset(self):
+        return Play.objects.prefetch_related(
+            Prefetch("genres", queryset=Genre.objects.order_by("id")),
+            Prefetch("actors", queryset=Actor.objects.order_by("id")),
+        ).distinct()
+
+    def get_serializer_class(self):
+        return PlayListSerializer
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare rows/sec of the performance and play lists built from "
+        "values() rows with the model serializers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plays", type=int, default=200)
+        parser.add_argument("--actors", type=int, default=400)
+        parser.add_argument("--performances", type=int, default=1000)
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Rows per page, at most the paginator's max_limit",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        lists = {
+            "performances": {
+                "serializer": ModelPerformanceList,
+                "values": PerformanceViewSet,
+            },
+            "plays": {"serializer": ModelPlayList, "values": PlayViewSet},
+        }
+
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["*"],
+            CACHES={"default": DUMMY_CACHE, "responses": DUMMY_CACHE},
+            REST_FRAMEWORK=rest_framework_without_throttling(),
+        ):
+            generate_dataset(
+                plays=options["plays"],
+                actors=options["actors"],
+                performances=options["performances"],
+                users=1,
+                tickets=0,
+                email_domain="bench-list-serializers.example.com",
+                seed=options["seed"],
+            )
+
+            results = {}
+            for name, paths in lists.items():
+                bodies = set()
+
+                for path, viewset in paths.items():
+                    median_ms, rows, body = self.measure(
+                        viewset,
+                        f"?limit={options['limit']}",
+                        options["repeat"],
+                    )
+                    results[(name, path)] = (median_ms, rows)
+                    bodies.add(body)
+
+                if len(bodies) != 1:
+                    self.stderr.write(f"{name}: the results differ")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'list':<14}{'path':<12}{'rows':>6}"
+            f"{'median ms':>12}{'rows/sec':>12}"
+        )
+        for (name, path), (median_ms, rows) in results.items():
+            self.stdout.write(
+                f"{name:<14}{path:<12}{rows:>6}{median_ms:>12.3f}"
+                f"{rows / median_ms * 1000:>12.0f}"
+            )
+
+    @staticmethod
+    def measure(viewset, query, repeat):
+        """
+        Median time of a rendered list page, from the queries to the JSON
+        bytes, with the page's row count and its results as JSON (page
+        links carry the query string).
+        """
+        view = viewset.as_view({"get": "list"})
+        factory = APIRequestFactory()
+        timings = []
+
+        for _ in range(repeat):
+            request = factory.get(f"/{query}")
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        results = response.data["results"]
+        return (
+            statistics.median(timings),
+            len(results),
+            JSONRenderer().render(results),
+        )
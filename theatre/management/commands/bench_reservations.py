@@ -0,0 +1,192 @@
+import json
+import logging
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.benchmarks import (
+    latency_percentiles,
+    rest_framework_without_throttling,
+)
+from theatre.models import Performance, Play, TheatreHall, Ticket
+
+
+class RetryCounter(logging.Handler):
+    """Counts the seat claim retries logged by `theatre.booking`."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Race several clients for the seats of one small hall in a "
+        "throwaway test database and report reservation throughput with "
+        "the 409 and retry counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Reservations each client attempts",
+        )
+        parser.add_argument("--rows", type=int, default=5)
+        parser.add_argument("--seats-in-row", type=int, default=10)
+        parser.add_argument(
+            "--seats-per-request",
+            type=int,
+            default=3,
+            help="Random seats of the hall asked for by each reservation",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        booking_logger = logging.getLogger("theatre.booking")
+        old_level = booking_logger.level
+        retries = RetryCounter()
+        booking_logger.addHandler(retries)
+        booking_logger.setLevel(logging.INFO)
+
+        try:
+            with override_settings(
+                REST_FRAMEWORK=rest_framework_without_throttling()
+            ):
+                results = self.race(options)
+        finally:
+            booking_logger.removeHandler(retries)
+            booking_logger.setLevel(old_level)
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results["retries"] = retries.count
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{results['requests']} reservations from "
+            f"{results['clients']} clients in {results['elapsed_s']}s "
+            f"({results['rps']} req/s, p95 {results['p95_ms']} ms)"
+        )
+        self.stdout.write(
+            f"created {results['created']}, conflicts (409) "
+            f"{results['conflicts']}, errors {results['errors']}, "
+            f"retries {results['retries']}"
+        )
+        self.stdout.write(
+            f"{results['seats_sold']} seats sold, "
+            f"{results['double_sold']} sold twice"
+        )
+
+    def race(self, options) -> dict:
+        hall = TheatreHall.objects.create(
+            name="Benchmark rush hall",
+            rows=options["rows"],
+            seats_in_row=options["seats_in_row"],
+        )
+        performance = Performance.objects.create(
+            play=Play.objects.create(title="Benchmark rush play"),
+            theatre_hall=hall,
+            show_time=timezone.now() + timezone.timedelta(days=1),
+        )
+        users = [
+            get_user_model().objects.create_user(
+                email=f"rush-{index}@example.com"
+            )
+            for index in range(options["clients"])
+        ]
+        seats = [
+            (row, seat)
+            for row in range(1, hall.rows + 1)
+            for seat in range(1, hall.seats_in_row + 1)
+        ]
+        responses = []
+
+        def book(user, seed):
+            client = APIClient()
+            client.force_authenticate(user)
+            rng = random.Random(seed)
+
+            try:
+                for _ in range(options["requests"]):
+                    payload = {
+                        "tickets": [
+                            {
+                                "row": row,
+                                "seat": seat,
+                                "performance": performance.id,
+                            }
+                            for row, seat in rng.sample(
+                                seats, k=options["seats_per_request"]
+                            )
+                        ]
+                    }
+                    started = time.perf_counter()
+                    res = client.post(
+                        reverse("theatre:reservation-list"),
+                        payload,
+                        format="json",
+                    )
+                    responses.append(
+                        (res.status_code, time.perf_counter() - started)
+                    )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(
+                target=book, args=(user, options["seed"] * 1000 + index)
+            )
+            for index, user in enumerate(users)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        sold = list(
+            Ticket.objects.filter(performance=performance).values_list(
+                "row", "seat"
+            )
+        )
+        codes = [code for code, _ in responses]
+
+        return {
+            "clients": options["clients"],
+            "requests": len(responses),
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(len(responses) / elapsed, 1),
+            **latency_percentiles(timing for _, timing in responses),
+            "created": codes.count(status.HTTP_201_CREATED),
+            "conflicts": codes.count(status.HTTP_409_CONFLICT),
+            "errors": sum(
+                code
+                not in (status.HTTP_201_CREATED, status.HTTP_409_CONFLICT)
+                for code in codes
+            ),
+            "seats_sold": len(sold),
+            "double_sold": len(sold) - len(set(sold)),
+        }
@@ -0,0 +1,126 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from theatre import seat_map
+from theatre.models import (
+    TheatreHall,
+    Play,
+    Performance,
+    Reservation,
+    Ticket,
+)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare the taken_seats dict list with compact seat map encodings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=30)
+        parser.add_argument("--seats-in-row", type=int, default=50)
+        parser.add_argument(
+            "--fill",
+            type=float,
+            default=0.95,
+            help="Share of taken seats in the hall (0..1)",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            performance, taken = self.create_performance(
+                options["rows"], options["seats_in_row"], options["fill"]
+            )
+            hall = performance.theatre_hall
+
+            paths = {
+                "dict_list (current)": lambda: [
+                    {"row": ticket.row, "seat": ticket.seat}
+                    for ticket in performance.tickets.all()
+                ],
+            }
+            for encoding in seat_map.ENCODINGS:
+                paths[encoding] = (
+                    lambda encoding=encoding: seat_map.build_seat_map(
+                        performance.tickets.values_list("row", "seat"),
+                        hall.rows,
+                        hall.seats_in_row,
+                        encoding,
+                    )
+                )
+
+            results = {
+                name: self.measure(build, options["repeat"])
+                for name, build in paths.items()
+            }
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Hall {options['rows']}x{options['seats_in_row']}, "
+            f"{taken} seats taken"
+        )
+        self.stdout.write(
+            f"{'path':<22}{'median ms':>12}{'peak KiB':>12}{'bytes':>10}"
+        )
+        for name, (median_ms, peak_kib, size) in results.items():
+            self.stdout.write(
+                f"{name:<22}{median_ms:>12.3f}{peak_kib:>12.1f}{size:>10}"
+            )
+
+    @staticmethod
+    def measure(build, repeat):
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            build()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        tracemalloc.start()
+        payload = build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size = len(json.dumps(payload, separators=(",", ":")))
+        return statistics.median(timings), peak / 1024, size
+
+    @staticmethod
+    def create_performance(rows, seats_in_row, fill):
+        hall = TheatreHall.objects.create(
+            name="Benchmark hall", rows=rows, seats_in_row=seats_in_row
+        )
+        play = Play.objects.create(title="Benchmark play")
+        performance = Performance.objects.create(
+            play=play,
+            theatre_hall=hall,
+            show_time=timezone.now() + timezone.timedelta(days=1),
+        )
+        user = get_user_model().objects.create_user(
+            email="seat-map-benchmark@example.com"
+        )
+        reservation = Reservation.objects.create(user=user)
+
+        seats = random.sample(
+            range(hall.capacity), k=int(hall.capacity * fill)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=index // seats_in_row + 1,
+                seat=index % seats_in_row + 1,
+                performance=performance,
+                reservation=reservation,
+            )
+            for index in seats
+        )
+
+        return performance, len(seats)
@@ -0,0 +1,170 @@
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from theatre.benchmarks import latency_percentiles
+from theatre.throttling import AnonCounterRateThrottle
+
+THROTTLES = {
+    "cache-history": (AnonRateThrottle, {}),
+    "counter-fixed": (AnonCounterRateThrottle, {"sliding_window": False}),
+    "counter-sliding": (AnonCounterRateThrottle, {"sliding_window": True}),
+}
+
+
+def make_throttle(name, rate):
+    base, attrs = THROTTLES[name]
+    return type(base.__name__, (base,), {**attrs, "rate": rate})()
+
+
+def make_request(address):
+    request = RequestFactory().get("/", REMOTE_ADDR=address)
+    request.user = AnonymousUser()
+    return request
+
+
+def allowed_requests(name, rate, address, count):
+    """Sends `count` requests of one client, returns how many passed."""
+    request = make_request(address)
+    allowed = sum(
+        make_throttle(name, rate).allow_request(request, None)
+        for _ in range(count)
+    )
+    connection.close()
+    return allowed
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare DRF's cache-backed anon throttle with the database "
+        "counter throttles: time per check as the rate grows, and how "
+        "many requests get through a limit shared by several processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rates",
+            default="100/day,10000/day,100000/day",
+            help="Comma separated throttle rates",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Checks per throttle and rate, all from one client",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Processes sharing one client's limit",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        rates = options["rates"].split(",")
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        try:
+            results = {
+                "latency": self.measure_latency(rates, options["requests"]),
+                "shared_limit": self.measure_shared_limit(
+                    options["workers"], options["requests"]
+                ),
+            }
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'throttle':<17}{'rate':>12}{'mean us':>10}"
+            f"{'p50 ms':>10}{'p99 ms':>10}{'last 100 us':>13}"
+        )
+        for row in results["latency"]:
+            self.stdout.write(
+                f"{row['throttle']:<17}{row['rate']:>12}"
+                f"{row['mean_us']:>10}{row['p50_ms']:>10}"
+                f"{row['p99_ms']:>10}{row['last_100_mean_us']:>13}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'throttle':<17}{'limit':>8}{'allowed':>9}")
+        for row in results["shared_limit"]:
+            self.stdout.write(
+                f"{row['throttle']:<17}{row['limit']:>8}{row['allowed']:>9}"
+            )
+
+    @staticmethod
+    def measure_latency(rates, count) -> list:
+        results = []
+
+        for run, (rate, name) in enumerate(
+            (rate, name) for rate in rates for name in THROTTLES
+        ):
+            request = make_request(f"10.1.{run // 250}.{run % 250 + 1}")
+            timings = []
+
+            for _ in range(count):
+                throttle = make_throttle(name, rate)
+                started = time.perf_counter()
+                throttle.allow_request(request, None)
+                timings.append(time.perf_counter() - started)
+
+            results.append(
+                {
+                    "throttle": name,
+                    "rate": rate,
+                    "mean_us": round(sum(timings) / count * 1e6, 1),
+                    **latency_percentiles(timings),
+                    "last_100_mean_us": round(
+                        sum(timings[-100:]) / len(timings[-100:]) * 1e6, 1
+                    ),
+                }
+            )
+
+        return results
+
+    @staticmethod
+    def measure_shared_limit(workers, count) -> list:
+        """
+        `workers` processes send `count` requests each for one client with
+        a limit of `count`: a shared store lets exactly `count` through.
+        """
+        rate = f"{count}/hour"
+        results = []
+
+        for run, name in enumerate(THROTTLES):
+            address = f"10.2.0.{run + 1}"
+            # Forked workers must open connections of their own
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                allowed = sum(
+                    executor.map(
+                        allowed_requests,
+                        [name] * workers,
+                        [rate] * workers,
+                        [address] * workers,
+                        [count] * workers,
+                    )
+                )
+
+            results.append(
+                {"throttle": name, "limit": count, "allowed": allowed}
+            )
+
+        return results
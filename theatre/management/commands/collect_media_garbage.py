@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from theatre.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Delete stored media files that no play refers to anymore"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=3600,
+            help="Seconds an unreferenced file is kept after it was stored",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the files without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        names = collect_garbage(
+            timedelta(seconds=options["grace"]), dry_run=options["dry_run"]
+        )
+
+        for name in names:
+            self.stdout.write(name)
+
+        action = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {len(names)} media file(s).")
+        )
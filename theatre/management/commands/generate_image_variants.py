@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from theatre.images import generate_variants
+from theatre.models import Play
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Build resized and WebP variants of play images, by default only "
+        "for images that have none yet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild the variants of every image",
+        )
+
+    def handle(self, *args, **options):
+        plays = Play.objects.exclude(image__isnull=True).exclude(image="")
+        if not options["all"]:
+            plays = plays.filter(image_variants={})
+
+        processed = 0
+        for play_id, name in plays.values_list("pk", "image").iterator():
+            generate_variants(play_id, name)
+            processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Built image variants of {processed} play(s).")
+        )
@@ -1,130 +1,134 @@
-import random
+import time
 
 from decouple import config
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from faker import Faker
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 
+from theatre.cache import bump_model_version
+from theatre.datagen import (
+    CHUNK_SIZE,
+    COPY,
+    INSERT_METHODS,
+    check_scale,
+    generate_dataset,
+)
 from theatre.models import (
     TheatreHall,
     Genre,
     Actor,
+    MediaFile,
     Play,
     Performance,
+    PerformanceAvailability,
     Reservation,
     Ticket,
 )
-
-fake = Faker()
+from theatre.signals import CACHED_MODELS
 
 
 class Command(BaseCommand):
     help = "Populate the database with fake data"  # noqa: VNE003
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--halls", type=int, default=3)
+        parser.add_argument("--actors", type=int, default=20)
+        parser.add_argument("--plays", type=int, default=10)
+        parser.add_argument("--performances", type=int, default=30)
+        parser.add_argument("--tickets", type=int, default=125)
+        parser.add_argument(
+            "--method",
+            choices=INSERT_METHODS,
+            default=COPY,
+            help="Insert reservations and tickets with COPY or bulk_create",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting tickets",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, **options):
+        scale = {
+            name: options[name]
+            for name in (
+                "users",
+                "halls",
+                "actors",
+                "plays",
+                "performances",
+                "tickets",
+            )
+        }
+        # Checked before the database is cleaned
+        try:
+            check_scale(**scale)
+        except ValueError as error:
+            raise CommandError(error)
+
         self.stdout.write("Cleaning the database...")
         self.clean_database()
         self.stdout.write("Database cleaned successfully.")
 
         self.stdout.write("Populating the database...")
-        self.create_users()
-        self.create_theatre_halls()
-        self.create_genres()
-        self.create_actors()
-        self.create_plays()
-        self.create_performances()
-        self.create_reservations_and_tickets()
-        self.stdout.write("Database populated successfully.")
+        started = time.perf_counter()
+        counts = generate_dataset(
+            **scale,
+            password=config("FAKER_USER_PASSWORD"),
+            method=options["method"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            seed=options["seed"],
+            report=self.report_progress,
+        )
+        elapsed = time.perf_counter() - started
 
-    def clean_database(self):
-        Ticket.objects.all().delete()
-        Reservation.objects.all().delete()
-        Performance.objects.all().delete()
-        Play.objects.all().delete()
-        Actor.objects.all().delete()
-        Genre.objects.all().delete()
-        TheatreHall.objects.all().delete()
-        get_user_model().objects.exclude(is_superuser=True).delete()
+        # Bulk inserts send no signals, drop cached catalog responses
+        for model in CACHED_MODELS:
+            bump_model_version(model)
 
-    def create_users(self):
-        for _ in range(10):
-            get_user_model().objects.create_user(
-                email=fake.unique.email(),
-                password=config("FAKER_USER_PASSWORD")
-            )
-
-    def create_theatre_halls(self):
-        for _ in range(3):
-            TheatreHall.objects.create(
-                name=fake.company(),
-                rows=random.randint(5, 20),
-                seats_in_row=random.randint(10, 30)
-            )
+        rows = sum(counts.values())
+        self.stdout.write(
+            ", ".join(f"{count} {name}" for name, count in counts.items())
+        )
+        self.stdout.write(
+            f"Database populated successfully: {rows} rows in "
+            f"{elapsed:.1f}s ({rows / elapsed:.0f} rows/s)."
+        )
 
-    def create_genres(self):
-        genres = ["Comedy", "Drama", "Musical", "Tragedy", "Historical"]
-        for genre in genres:
-            Genre.objects.create(name=genre)
+    def report_progress(self, stage, done, total, rows_per_sec):
+        self.stdout.write(
+            f"  {stage}: {done}/{total} ({rows_per_sec:.0f} rows/s)"
+        )
 
-    def create_actors(self):
-        for _ in range(20):
-            Actor.objects.create(
-                first_name=fake.first_name(),
-                last_name=fake.last_name()
-            )
-
-    def create_plays(self):
-        actors = list(Actor.objects.all())
-        genres = list(Genre.objects.all())
-        for _ in range(10):
-            play = Play.objects.create(
-                title=fake.catch_phrase(),
-                description=fake.text()
-            )
-            play.actors.set(
-                random.sample(actors, k=random.randint(2, 5))
-            )
-            play.genres.set(
-                random.sample(
-                    genres, k=random.randint(1, 3)
-                )
-            )
-
-    def create_performances(self):
-        plays = list(Play.objects.all())
-        halls = list(TheatreHall.objects.all())
-        for _ in range(30):
-            Performance.objects.create(
-                play=random.choice(plays),
-                theatre_hall=random.choice(halls),
-                show_time=fake.future_datetime(
-                    end_date="+30d",
-                    tzinfo=timezone.get_current_timezone()
-                )
+    def clean_database(self):
+        # TRUNCATE skips the per-row delete signals of millions of tickets.
+        # Play images are not released either, their reference counts go
+        # too; collect_media_garbage deletes the files without a row
+        tables = [
+            model._meta.db_table
+            for model in (
+                Ticket,
+                Reservation,
+                PerformanceAvailability,
+                Performance,
+                Play.actors.through,
+                Play.genres.through,
+                Play,
+                MediaFile,
+                Actor,
+                Genre,
+                TheatreHall,
             )
-
-    def create_reservations_and_tickets(self):
-        users = list(get_user_model().objects.all())
-        performances = list(Performance.objects.all())
-        for _ in range(50):
-            reservation = Reservation.objects.create(
-                user=random.choice(users)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "TRUNCATE "
+                + ", ".join(map(connection.ops.quote_name, tables))
+                + " RESTART IDENTITY"
             )
-            performance = random.choice(performances)
-            for _ in range(random.randint(1, 4)):
-                while True:
-                    try:
-                        Ticket.objects.create(
-                            row=random.randint(
-                                1, performance.theatre_hall.rows
-                            ),
-                            seat=random.randint(
-                                1, performance.theatre_hall.seats_in_row
-                            ),
-                            performance=performance,
-                            reservation=reservation
-                        )
-                        break
-                    except:  # noqa: E722
-                        continue
+        get_user_model().objects.exclude(is_superuser=True).delete()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from theatre.models import ThrottleCounter
+
+
+class Command(BaseCommand):
+    help = "Delete throttle counters of expired windows"  # noqa: VNE003
+
+    def handle(self, *args, **options):
+        deleted = ThrottleCounter.objects.purge()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} throttle counter(s).")
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theatre.models import PerformanceAvailability
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Rebuild the performance availability rollup read by the calendar"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            PerformanceAvailability.objects.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt availability of "
+                f"{PerformanceAvailability.objects.count()} performance(s)."
+            )
+        )
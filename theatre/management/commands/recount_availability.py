@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theatre.models import Performance
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Repair drifted tickets_sold counters from the actual tickets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "performance_ids",
+            nargs="*",
+            type=int,
+            help="Limit the recount to these performances",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Performance.objects.all()
+
+        if options["performance_ids"]:
+            queryset = queryset.filter(pk__in=options["performance_ids"])
+
+        with transaction.atomic():
+            repaired = queryset.recount_tickets_sold()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired tickets_sold for {repaired} performance(s)."
+            )
+        )
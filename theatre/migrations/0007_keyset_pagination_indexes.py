@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0006_performance_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="performance",
+            name="show_time",
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["show_time", "id"], name="performance_show_time_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="play",
+            index=models.Index(fields=["title", "id"], name="play_title_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="reservation_user_created_idx"
+            ),
+        ),
+    ]
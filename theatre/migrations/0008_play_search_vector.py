@@ -0,0 +1,50 @@
+# Generated by Django 4.2.14 on 2026-10-18 08:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+from unidecode import unidecode
+
+
+def build_search_vectors(apps, schema_editor):
+    Play = apps.get_model("theatre", "Play")
+
+    for play in Play.objects.only("title", "description").iterator():
+        Play.objects.filter(pk=play.pk).update(
+            search_vector=SearchVector(
+                Value(unidecode(play.title or "")),
+                weight="A",
+                config="english",
+            )
+            + SearchVector(
+                Value(unidecode(play.description or "")),
+                weight="B",
+                config="english",
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0007_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="play",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="play_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(build_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:16
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def build_availability(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    PerformanceAvailability = apps.get_model(
+        "theatre", "PerformanceAvailability"
+    )
+
+    PerformanceAvailability.objects.bulk_create(
+        (
+            PerformanceAvailability(**row)
+            for row in Performance.objects.values(
+                "show_time",
+                "theatre_hall_id",
+                "play_id",
+                performance_id=F("pk"),
+                show_date=TruncDate("show_time"),
+                theatre_hall_name=F("theatre_hall__name"),
+                play_title=F("play__title"),
+                capacity=F("theatre_hall__rows")
+                * F("theatre_hall__seats_in_row"),
+                sold=F("tickets_sold"),
+            ).iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0009_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PerformanceAvailability",
+            fields=[
+                (
+                    "performance",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="availability",
+                        serialize=False,
+                        to="theatre.performance",
+                    ),
+                ),
+                ("show_date", models.DateField()),
+                ("show_time", models.DateTimeField()),
+                ("theatre_hall_name", models.CharField(max_length=255)),
+                ("play_title", models.CharField(max_length=255)),
+                ("capacity", models.PositiveIntegerField()),
+                ("sold", models.PositiveIntegerField()),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.play",
+                    ),
+                ),
+                (
+                    "theatre_hall",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.theatrehall",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "performance availability",
+                "ordering": ("show_time", "performance_id"),
+                "indexes": [
+                    models.Index(
+                        fields=["show_date", "show_time"], name="availability_date_idx"
+                    ),
+                    models.Index(
+                        fields=["play", "show_date"], name="availability_play_date_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(build_availability, migrations.RunPython.noop),
+    ]
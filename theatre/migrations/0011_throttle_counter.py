@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0010_performance_availability"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleCounter",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("period", models.BigIntegerField()),
+                ("count", models.PositiveIntegerField()),
+                ("previous_count", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        # Counters are disposable, skip the WAL on every request
+        migrations.RunSQL(
+            "ALTER TABLE theatre_throttlecounter SET UNLOGGED",
+            "ALTER TABLE theatre_throttlecounter SET LOGGED",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0011_throttle_counter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="image_variants",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:32
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Play = apps.get_model("theatre", "Play")
+    MediaFile = apps.get_model("theatre", "MediaFile")
+
+    refs = Counter()
+    for image, variants in Play.objects.values_list(
+        "image", "image_variants"
+    ):
+        refs[image] += 1
+        for formats in variants.values():
+            refs.update(formats.values())
+    refs.pop("", None)
+    refs.pop(None, None)
+
+    MediaFile.objects.bulk_create(
+        MediaFile(name=name, refs=count) for name, count in refs.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0012_play_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, primary_key=True, serialize=False
+                    ),
+                ),
+                ("refs", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["refs", "updated_at"],
+                        name="media_file_orphans_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0013_media_file"),
+    ]
+
+    # The composite indexes are built before the single column foreign
+    # key indexes they replace are dropped
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time", "id"],
+                name="performance_play_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["theatre_hall", "show_time", "id"],
+                name="performance_hall_time_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="performance",
+            name="play",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="performances",
+                to="theatre.play",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="performance",
+            name="theatre_hall",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="theatre.theatrehall",
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:49
+
+from datetime import timedelta
+
+import django.contrib.postgres.constraints
+import django.core.validators
+from django.db import migrations, models
+import theatre.models
+
+
+def shorten_overlapping_performances(apps, schema_editor):
+    """
+    Every existing performance gets the default 180 minutes, so earlier
+    shows of a hall may run into the next one. Those are shortened to end
+    when the next show starts; shows of a hall starting less than a
+    minute apart cannot be resolved and abort the migration.
+    """
+    Performance = apps.get_model("theatre", "Performance")
+
+    shortened = []
+    conflicts = []
+    previous = None
+    for performance in (
+        Performance.objects.order_by("theatre_hall_id", "show_time", "id")
+        .only("id", "theatre_hall_id", "show_time", "duration")
+        .iterator(chunk_size=5000)
+    ):
+        if (
+            previous is not None
+            and previous.theatre_hall_id == performance.theatre_hall_id
+        ):
+            gap = performance.show_time - previous.show_time
+            if gap < timedelta(minutes=previous.duration):
+                if gap < timedelta(minutes=1):
+                    conflicts.append((previous.id, performance.id))
+                else:
+                    previous.duration = gap // timedelta(minutes=1)
+                    shortened.append(previous)
+
+        previous = performance
+
+    if conflicts:
+        raise ValueError(
+            "Performances booked in the same theatre hall less than a "
+            "minute apart, move or delete one of each pair: "
+            + ", ".join(f"{first} and {second}" for first, second in conflicts)
+        )
+
+    Performance.objects.bulk_update(shortened, ["duration"], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre", "0014_performance_schedule_indexes"),
+    ]
+
+    operations = [
+        # Adding minutes does not depend on the time zone, unlike adding
+        # days, so the function can safely be declared IMMUTABLE
+        migrations.RunSQL(
+            """
+            CREATE FUNCTION theatre_performance_period(
+                show_time timestamptz, duration integer
+            ) RETURNS tstzrange
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE
+            AS $$
+                SELECT tstzrange(
+                    show_time, show_time + make_interval(mins => duration)
+                )
+            $$
+            """,
+            "DROP FUNCTION theatre_performance_period(timestamptz, integer)",
+        ),
+        migrations.AddField(
+            model_name="performance",
+            name="duration",
+            field=models.PositiveSmallIntegerField(
+                default=180,
+                help_text="Minutes the hall is occupied",
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.RunPython(
+            shorten_overlapping_performances, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="performance",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[
+                    (theatre.models.IdRange("theatre_hall"), "&&"),
+                    (
+                        theatre.models.PerformancePeriod(
+                            "show_time", "duration"
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="performance_hall_no_overlap",
+                violation_error_message=(
+                    "The theatre hall is already booked at this time."
+                ),
+            ),
+        ),
+    ]
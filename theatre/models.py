@@ -1,15 +1,61 @@
 import pathlib
 import uuid
+from datetime import timedelta
 
 from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import (
+    BigIntegerRangeField,
+    DateTimeRangeField,
+    RangeOperators,
+)
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.core.validators import MinValueValidator
+from django.db import connections, models, transaction
+from django.db.models import (
+    Count,
+    F,
+    Func,
+    OuterRef,
+    Subquery,
+    UniqueConstraint,
+    Value,
+)
+from django.db.models.functions import Coalesce, TruncDate
 from django.utils import timezone
 from django.utils.text import slugify
 from unidecode import unidecode
 
 
+SEARCH_CONFIG = "english"
+
+DEFAULT_PERFORMANCE_MINUTES = 180
+# IMMUTABLE SQL function (migration 0015) returning the [start, end)
+# tstzrange of a performance: `timestamptz + interval` is only STABLE, so
+# it cannot be used in the exclusion constraint index directly.
+PERFORMANCE_PERIOD_FUNCTION = "theatre_performance_period"
+
+
+class PerformancePeriod(Func):
+    function = PERFORMANCE_PERIOD_FUNCTION
+    output_field = DateTimeRangeField()
+
+
+class IdRange(Func):
+    """
+    int8range holding a single id: `&&` on two of them is `=` on the ids,
+    which lets a GiST index compare ids without the btree_gist extension.
+    """
+
+    function = "int8range"
+    output_field = BigIntegerRangeField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, expression, Value("[]"), **extra)
+
+
 def create_image_path(instance, filename: str) -> pathlib.Path:
     transliterated_title = unidecode(instance.title)
     filename = (
@@ -25,6 +71,7 @@ class TheatreHall(models.Model):
     name = models.CharField(max_length=255)
     rows = models.PositiveIntegerField()
     seats_in_row = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def capacity(self) -> int:
@@ -63,24 +110,195 @@ class Play(models.Model):
         blank=True,
         upload_to=create_image_path
     )
+    # {size: {format: storage name}}, filled in by theatre.images
+    image_variants = models.JSONField(default=dict, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def build_search_vector(title: str, description: str) -> SearchVector:
+        """
+        Title (weight A) and description (weight B), transliterated with
+        `unidecode` like `create_image_path` does, so searches are
+        accent-insensitive.
+        """
+        return SearchVector(
+            Value(unidecode(title or "")), weight="A", config=SEARCH_CONFIG
+        ) + SearchVector(
+            Value(unidecode(description or "")),
+            weight="B",
+            config=SEARCH_CONFIG,
+        )
+
+    def save(self, *args, **kwargs):
+        # The image signals lock the stored row until the save commits
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            Play.objects.filter(pk=self.pk).update(
+                search_vector=self.build_search_vector(
+                    self.title, self.description
+                )
+            )
+
     class Meta:
         ordering = ("-title",)
+        indexes = [
+            models.Index(fields=["title", "id"], name="play_title_id_idx"),
+            GinIndex(fields=["search_vector"], name="play_search_vector_idx"),
+        ]
+
+
+class PerformanceQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        return self.annotate(
+            tickets_available=(
+                F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+                - F("tickets_sold")
+            )
+        )
+
+    def adjust_tickets_sold(self, deltas: dict) -> None:
+        """
+        Applies {performance_id: delta} to the `tickets_sold` counters.
+        Uses F() updates, so it is safe to call inside the transaction
+        that created or deleted the tickets. Rows are updated in id order,
+        the order `booking.lock_performances` locks them in, so concurrent
+        bookings and releases cannot deadlock.
+        """
+        changed = sorted(
+            performance_id for performance_id, delta in deltas.items() if delta
+        )
+        for performance_id in changed:
+            self.filter(pk=performance_id).update(
+                tickets_sold=F("tickets_sold") + deltas[performance_id]
+            )
+
+        if changed:
+            PerformanceAvailability.objects.refresh(
+                Performance.objects.filter(pk__in=changed)
+            )
+
+    def recount_tickets_sold(self) -> int:
+        """
+        Resets drifted `tickets_sold` counters to the actual ticket count.
+        Returns the number of repaired performances.
+        """
+        sold = Subquery(
+            Ticket.objects.filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        repaired = (
+            self.annotate(actual_sold=Coalesce(sold, 0))
+            .exclude(tickets_sold=F("actual_sold"))
+            .update(tickets_sold=Coalesce(sold, 0))
+        )
+        if repaired:
+            PerformanceAvailability.objects.refresh(self)
+
+        return repaired
+
+    def find_conflicts(self, performances: list) -> list:
+        """
+        Checks a whole schedule batch with one query, against the stored
+        performances (through the exclusion constraint index) and against
+        each other. `performances` are unsaved or changed instances.
+        Returns [(position, performance id or None, other position or
+        None)] for every overlap, the other position being the later one.
+        """
+        if not performances:
+            return []
+
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table, id_, hall_, show_time_, duration_ = map(
+            quote,
+            (
+                self.model._meta.db_table,
+                "id",
+                "theatre_hall_id",
+                "show_time",
+                "duration",
+            ),
+        )
+        rows = ", ".join(
+            [
+                f"(%s::integer, %s::bigint, %s::bigint, "
+                f"{PERFORMANCE_PERIOD_FUNCTION}(%s::timestamptz, %s::integer))"
+            ]
+            * len(performances)
+        )
+        params = [
+            value
+            for position, performance in enumerate(performances)
+            for value in (
+                position,
+                performance.pk,
+                performance.theatre_hall_id,
+                performance.show_time,
+                performance.duration,
+            )
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH candidate (position, id, hall_id, period) AS "
+                f"(VALUES {rows}) "
+                f"SELECT candidate.position, stored.{id_}, NULL "
+                f"FROM candidate JOIN {table} stored "
+                # The constraint expressions, so its GiST index is used
+                f"ON int8range(stored.{hall_}, stored.{hall_}, '[]') "
+                f"&& int8range(candidate.hall_id, candidate.hall_id, '[]') "
+                f"AND {PERFORMANCE_PERIOD_FUNCTION}"
+                f"(stored.{show_time_}, stored.{duration_}) "
+                f"&& candidate.period "
+                f"AND stored.{id_} IS DISTINCT FROM candidate.id "
+                f"UNION ALL "
+                f"SELECT earlier.position, NULL, later.position "
+                f"FROM candidate earlier JOIN candidate later "
+                f"ON earlier.position < later.position "
+                f"AND earlier.hall_id = later.hall_id "
+                f"AND earlier.period && later.period "
+                f"ORDER BY 1, 2, 3",
+                params,
+            )
+            return cursor.fetchall()
 
 
 class Performance(models.Model):
+    # Both foreign keys are covered by the composite schedule indexes
     play = models.ForeignKey(
-        Play, on_delete=models.CASCADE, related_name="performances"
+        Play,
+        on_delete=models.CASCADE,
+        related_name="performances",
+        db_index=False,
+    )
+    theatre_hall = models.ForeignKey(
+        TheatreHall, on_delete=models.CASCADE, db_index=False
+    )
+    show_time = models.DateTimeField()
+    duration = models.PositiveSmallIntegerField(
+        default=DEFAULT_PERFORMANCE_MINUTES,
+        validators=[MinValueValidator(1)],
+        help_text="Minutes the hall is occupied",
     )
-    theatre_hall = models.ForeignKey(TheatreHall, on_delete=models.CASCADE)
-    show_time = models.DateTimeField(db_index=True)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PerformanceQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.play.title} {str(self.show_time)}"
 
+    @property
+    def end_time(self):
+        return self.show_time + timedelta(minutes=self.duration)
+
     def clean(self):
         if self.show_time < timezone.now():
             raise ValidationError("Show time cannot be in the past.")
@@ -91,6 +309,258 @@ class Performance(models.Model):
 
     class Meta:
         ordering = ("-show_time",)
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"],
+                name="performance_show_time_id_idx",
+            ),
+            models.Index(
+                fields=["play", "show_time", "id"],
+                name="performance_play_time_idx",
+            ),
+            models.Index(
+                fields=["theatre_hall", "show_time", "id"],
+                name="performance_hall_time_idx",
+            ),
+        ]
+        constraints = [
+            ExclusionConstraint(
+                name="performance_hall_no_overlap",
+                expressions=[
+                    (IdRange("theatre_hall"), RangeOperators.OVERLAPS),
+                    (
+                        PerformancePeriod("show_time", "duration"),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                violation_error_message=(
+                    "The theatre hall is already booked at this time."
+                ),
+            ),
+        ]
+
+
+class PerformanceAvailabilityQuerySet(models.QuerySet):
+    # Rollup column: expression over the performance row
+    SOURCE_COLUMNS = {
+        "performance_id": F("pk"),
+        "show_date": TruncDate("show_time"),
+        "show_time": F("show_time"),
+        "theatre_hall_id": F("theatre_hall_id"),
+        "theatre_hall_name": F("theatre_hall__name"),
+        "play_id": F("play_id"),
+        "play_title": F("play__title"),
+        "capacity": F("theatre_hall__rows") * F("theatre_hall__seats_in_row"),
+        "sold": F("tickets_sold"),
+    }
+
+    def refresh(self, performances=None) -> None:
+        """
+        Upserts the rollup rows of a Performance queryset (all of them by
+        default) with a single INSERT ... SELECT ... ON CONFLICT.
+        """
+        if performances is None:
+            performances = Performance.objects.all()
+
+        columns = list(self.SOURCE_COLUMNS)
+        source = (
+            performances.order_by()
+            .annotate(
+                **{
+                    f"rollup_{column}": expression
+                    for column, expression in self.SOURCE_COLUMNS.items()
+                }
+            )
+            .values_list(*(f"rollup_{column}" for column in columns))
+        )
+        connection = connections[self.db]
+        sql, params = source.query.sql_with_params()
+        quote = connection.ops.quote_name
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(self.model._meta.db_table)} "
+                f"({', '.join(map(quote, columns))}) {sql} "
+                f"ON CONFLICT ({quote('performance_id')}) DO UPDATE SET "
+                + ", ".join(
+                    f"{quote(column)} = EXCLUDED.{quote(column)}"
+                    for column in columns[1:]
+                ),
+                params,
+            )
+
+    def rebuild(self) -> None:
+        """Recreates the whole rollup from the performances."""
+        self.all().delete()
+        self.refresh()
+
+
+class PerformanceAvailability(models.Model):
+    """
+    Denormalized schedule row per performance, so schedules and calendars
+    are read from one narrow table without joins or ticket aggregates.
+    Kept in step by `PerformanceQuerySet.adjust_tickets_sold` and by the
+    performance, play and hall signals.
+    """
+
+    performance = models.OneToOneField(
+        Performance,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="availability",
+    )
+    show_date = models.DateField()
+    show_time = models.DateTimeField()
+    theatre_hall = models.ForeignKey(
+        TheatreHall, on_delete=models.CASCADE, related_name="+"
+    )
+    theatre_hall_name = models.CharField(max_length=255)
+    play = models.ForeignKey(Play, on_delete=models.CASCADE, related_name="+")
+    play_title = models.CharField(max_length=255)
+    capacity = models.PositiveIntegerField()
+    sold = models.PositiveIntegerField()
+
+    objects = PerformanceAvailabilityQuerySet.as_manager()
+
+    @property
+    def tickets_available(self) -> int:
+        return self.capacity - self.sold
+
+    def __str__(self):
+        return (
+            f"{self.play_title} {self.show_time}: "
+            f"{self.sold}/{self.capacity}"
+        )
+
+    class Meta:
+        ordering = ("show_time", "performance_id")
+        verbose_name_plural = "performance availability"
+        indexes = [
+            models.Index(
+                fields=["show_date", "show_time"],
+                name="availability_date_idx",
+            ),
+            models.Index(
+                fields=["play", "show_date"],
+                name="availability_play_date_idx",
+            ),
+        ]
+
+
+class ThrottleCounterQuerySet(models.QuerySet):
+    def hit(self, key, period, previous_weight, limit, expires_at) -> bool:
+        """
+        Counts a request of `key` in window number `period` unless the
+        estimate `previous count * previous_weight + count` would go over
+        `limit`. A single upsert, so concurrent workers never race and
+        the cost does not grow with the rate. Returns whether the request
+        was counted.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table, key_, period_, count_, previous_, expires_ = map(
+            quote,
+            (
+                self.model._meta.db_table,
+                "key",
+                "period",
+                "count",
+                "previous_count",
+                "expires_at",
+            ),
+        )
+        # Counts carried over into window EXCLUDED.period
+        same_period = f"counter.{period_} = EXCLUDED.{period_}"
+        previous_count = (
+            f"CASE WHEN {same_period} THEN counter.{previous_} "
+            f"WHEN counter.{period_} = EXCLUDED.{period_} - 1 "
+            f"THEN counter.{count_} ELSE 0 END"
+        )
+        count = f"CASE WHEN {same_period} THEN counter.{count_} ELSE 0 END"
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} AS counter "
+                f"({key_}, {period_}, {count_}, {previous_}, {expires_}) "
+                f"VALUES (%s, %s, 1, 0, %s) "
+                f"ON CONFLICT ({key_}) DO UPDATE SET "
+                f"{previous_} = {previous_count}, "
+                f"{count_} = {count} + 1, "
+                f"{period_} = EXCLUDED.{period_}, "
+                f"{expires_} = EXCLUDED.{expires_} "
+                f"WHERE {previous_count} * %s + {count} + 1 <= %s "
+                f"RETURNING 1",
+                [key, period, expires_at, previous_weight, limit],
+            )
+            return cursor.fetchone() is not None
+
+    def purge(self) -> int:
+        """Deletes counters whose windows are all over."""
+        deleted, _ = self.filter(expires_at__lt=timezone.now()).delete()
+        return deleted
+
+
+class ThrottleCounter(models.Model):
+    """
+    Request counters of a throttle key in the current and the previous
+    fixed window. The table is unlogged: losing it only resets limits.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    # Window number: seconds since the epoch // window duration
+    period = models.BigIntegerField()
+    count = models.PositiveIntegerField()
+    previous_count = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = ThrottleCounterQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
+class MediaFileQuerySet(models.QuerySet):
+    def register(self, name: str) -> None:
+        """
+        Tracks a stored file, or marks a tracked one as just stored again
+        so garbage collection keeps it.
+        """
+        self.bulk_create(
+            [self.model(name=name)],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["updated_at"],
+        )
+
+    def adjust_refs(self, deltas: dict) -> None:
+        """Applies {file name: delta} to the reference counts."""
+        for name, delta in deltas.items():
+            if name and delta:
+                self.register(name)
+                self.filter(name=name).update(refs=F("refs") + delta)
+
+
+class MediaFile(models.Model):
+    """
+    Reference count of a stored media file. Files nothing refers to are
+    deleted by `manage.py collect_media_garbage`.
+    """
+
+    name = models.CharField(max_length=255, primary_key=True)
+    refs = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MediaFileQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.name} ({self.refs})"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["refs", "updated_at"], name="media_file_orphans_idx"
+            ),
+        ]
 
 
 class Reservation(models.Model):
@@ -105,6 +575,12 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="reservation_user_created_idx",
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -0,0 +1,373 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    FieldError,
+    ImproperlyConfigured,
+)
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the queryset ordering (or the model's
+    `Meta.ordering`) plus `id` as a tiebreaker. Every page is a range
+    condition on the ordering columns, so deep pages cost the same as the
+    first one and no COUNT(*) is run.
+
+    Ordering fields must be concrete columns or annotations of the
+    queryset, and must not be nullable. Cursor values are coerced through
+    the model field or the annotation's `output_field`, so annotations
+    must resolve an output field whose values survive the JSON round trip
+    exactly: integers, strings, dates, decimals or a float annotation
+    wrapped in `Cast(..., FloatField())`. Database functions typed as
+    `FloatField` may return float4 (`SearchRank` does), which never equals
+    the cursor's double, so uncast float annotations are refused.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([instance async for instance in page_queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """Returns the page slice, one row longer to tell if more follow."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+        self.fields = [
+            self.get_field(queryset, name) for name, _ in self.ordering
+        ]
+
+        values, self.reverse = self.decode_cursor(request)
+        self.has_cursor = values is not None
+
+        order_by = [
+            f"{'-' if desc != self.reverse else ''}{name}"
+            for name, desc in self.ordering
+        ]
+        queryset = queryset.order_by(*order_by)
+
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+
+        return queryset[: self.limit + 1]
+
+    def set_page(self, results):
+        self.has_more = len(results) > self.limit
+        results = results[: self.limit]
+
+        if self.reverse:
+            results.reverse()
+
+        self.page = results
+        return results
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+
+        return max(1, min(limit, self.max_limit))
+
+    @staticmethod
+    def get_ordering(queryset):
+        """Returns [(field_name, descending), ...] ending with the pk."""
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering or ()
+        )
+        ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in ordering
+            if isinstance(field, str)
+        ]
+        ordering = [
+            ("id" if name == "pk" else name, desc) for name, desc in ordering
+        ]
+
+        if "id" not in {name for name, _ in ordering}:
+            ordering.append(("id", ordering[-1][1] if ordering else False))
+
+        return ordering
+
+    def get_field(self, queryset, name):
+        """Returns the model field or annotation output field of `name`."""
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            pass
+
+        annotation = queryset.query.annotations.get(name)
+        if annotation is None:
+            raise ImproperlyConfigured(
+                f"Cannot key pages on {name}, it is neither a field of "
+                f"{self.model.__name__} nor an annotation of the queryset."
+            )
+
+        try:
+            field = annotation.output_field
+        except FieldError:
+            raise ImproperlyConfigured(
+                f"Cannot key pages on the {name} annotation, "
+                "its output_field cannot be resolved."
+            )
+
+        if isinstance(field, FloatField) and not isinstance(annotation, Cast):
+            raise ImproperlyConfigured(
+                f"Cannot key pages on the {name} annotation, wrap it in "
+                "Cast(..., FloatField()) so its value round-trips exactly."
+            )
+
+        return field
+
+    def after(self, values):
+        """
+        Builds `(f1, f2, ...) > (v1, v2, ...)` honouring every field's
+        direction. The leading bound on the first field lets the database
+        start an index range scan instead of filtering every row.
+        """
+        conditions = []
+        for index, (name, desc) in enumerate(self.ordering):
+            lookup = "lt" if desc != self.reverse else "gt"
+            equal = [
+                Q(**{previous: value})
+                for (previous, _), value in zip(
+                    self.ordering[:index], values
+                )
+            ]
+            conditions.append(
+                reduce(and_, equal, Q(**{f"{name}__{lookup}": values[index]}))
+            )
+
+        first_name, first_desc = self.ordering[0]
+        bound = "lte" if first_desc != self.reverse else "gte"
+
+        return Q(**{f"{first_name}__{bound}": values[0]}) & reduce(
+            or_, conditions
+        )
+
+    def encode_cursor(self, instance, reverse):
+        values = [
+            self.to_json(
+                # A model instance or a `values()` row
+                instance[name]
+                if isinstance(instance, dict)
+                else getattr(instance, name)
+            )
+            for name, _ in self.ordering
+        ]
+        token = json.dumps({"v": values, "r": int(reverse)}).encode("utf-8")
+        encoded = base64.urlsafe_b64encode(token).decode("ascii")
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            token = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = [
+                self.to_python(name, field, value)
+                for (name, _), field, value in zip(
+                    self.ordering, self.fields, token["v"]
+                )
+            ]
+            reverse = bool(token["r"])
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            binascii.Error,
+            json.JSONDecodeError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    @staticmethod
+    def to_json(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return force_str(value)
+
+    @staticmethod
+    def to_python(name, field, value):
+        value = field.to_python(value)
+        if value is None:
+            raise ValueError(f"Cursor value for {name} is missing")
+        return value
+
+    def get_next_link(self):
+        if not self.page or not (self.has_more or self.reverse):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if self.reverse and not self.has_more:
+            return None
+        if not self.reverse and not self.has_cursor:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """`LimitOffsetPagination` that can also page on the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+
+        page_queryset = queryset[self.offset:self.offset + self.limit]
+        return [instance async for instance in page_queryset]
+
+
+class SelectablePagination(BasePagination):
+    """
+    Serves offset pages or keyset pages. The mode comes from
+    `?pagination=offset|cursor` (a `?cursor=` implies cursor mode), then
+    from the view's `pagination_mode` attribute, then `default_mode`.
+    """
+
+    pagination_modes = {
+        "offset": OffsetPagination,
+        "cursor": KeysetPagination,
+    }
+    mode_query_param = "pagination"
+    default_mode = "offset"
+
+    def __init__(self):
+        self.delegate = None
+
+    def get_mode(self, request, view=None):
+        query_params = request.query_params
+
+        if KeysetPagination.cursor_query_param in query_params:
+            return "cursor"
+
+        mode = query_params.get(self.mode_query_param)
+        if mode in self.pagination_modes:
+            return mode
+
+        return getattr(view, "pagination_mode", self.default_mode)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.pagination_modes[self.get_mode(request, view)]()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.pagination_modes[self.get_mode(request, view)]()
+        return await self.delegate.apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, "display_page_controls", False)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    def get_results(self, data):
+        return data["results"]
+
+    def get_paginated_response_schema(self, schema):
+        offset_pagination = LimitOffsetPagination()
+        response_schema = offset_pagination.get_paginated_response_schema(
+            schema
+        )
+        response_schema["required"] = ["results"]
+        response_schema["properties"]["count"]["nullable"] = True
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pagination mode: offset or cursor.",
+                "schema": {"type": "string", "enum": ["offset", "cursor"]},
+            },
+            *LimitOffsetPagination().get_schema_operation_parameters(view),
+            KeysetPagination().get_schema_operation_parameters(view)[0],
+        ]
@@ -0,0 +1,109 @@
+import base64
+from typing import Iterable, Tuple
+
+BITSET = "bitset"
+RLE = "rle"
+LIST = "list"
+
+ENCODINGS = (BITSET, RLE, LIST)
+
+
+def seat_index(row: int, seat: int, seats_in_row: int) -> int:
+    """Zero-based position of a (row, seat) pair in a row-major seat map."""
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def pack_bitset(
+    taken_seats: Iterable[Tuple[int, int]], rows: int, seats_in_row: int
+) -> bytes:
+    """
+    Packs taken seats into a row-major bitset, most significant bit first.
+    Seats outside the hall geometry are ignored.
+    """
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+
+    for row, seat in taken_seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = seat_index(row, seat, seats_in_row)
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+
+    return bytes(bitmap)
+
+
+def unpack_bitset(
+    bitmap: bytes, rows: int, seats_in_row: int
+) -> list:
+    """Reverses `pack_bitset` into a sorted list of (row, seat) pairs."""
+    taken_seats = []
+
+    for index in range(rows * seats_in_row):
+        if bitmap[index >> 3] & (0x80 >> (index & 7)):
+            row, seat = divmod(index, seats_in_row)
+            taken_seats.append((row + 1, seat + 1))
+
+    return taken_seats
+
+
+def encode_rle(
+    taken_seats: Iterable[Tuple[int, int]], rows: int, seats_in_row: int
+) -> list:
+    """
+    Encodes every row as alternating run lengths, starting with free seats.
+    A fully free row of 10 seats is [10], seats 3-4 taken is [2, 2, 6].
+    """
+    taken_by_row = [set() for _ in range(rows)]
+
+    for row, seat in taken_seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            taken_by_row[row - 1].add(seat)
+
+    encoded = []
+
+    for taken_in_row in taken_by_row:
+        runs = []
+        current_taken = False
+        run_length = 0
+
+        for seat in range(1, seats_in_row + 1):
+            if (seat in taken_in_row) != current_taken:
+                runs.append(run_length)
+                current_taken = not current_taken
+                run_length = 0
+            run_length += 1
+
+        runs.append(run_length)
+        encoded.append(runs)
+
+    return encoded
+
+
+def build_seat_map(
+    taken_seats: Iterable[Tuple[int, int]],
+    rows: int,
+    seats_in_row: int,
+    encoding: str = BITSET,
+) -> dict:
+    """
+    Builds the seat map payload for a performance in the requested encoding.
+    `taken_seats` is an iterable of (row, seat) pairs, e.g. the result of
+    `performance.tickets.values_list("row", "seat")`.
+    """
+    seat_map = {
+        "rows": rows,
+        "seats_in_row": seats_in_row,
+        "encoding": encoding,
+    }
+
+    if encoding == BITSET:
+        bitmap = pack_bitset(taken_seats, rows, seats_in_row)
+        seat_map["taken"] = base64.b64encode(bitmap).decode("ascii")
+    elif encoding == RLE:
+        seat_map["taken"] = encode_rle(taken_seats, rows, seats_in_row)
+    elif encoding == LIST:
+        seat_map["taken"] = [
+            {"row": row, "seat": seat} for row, seat in taken_seats
+        ]
+    else:
+        raise ValueError(f"Unknown seat map encoding: {encoding}")
+
+    return seat_map
@@ -1,10 +1,20 @@
-from django.db import transaction
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.fields import empty
 from rest_framework.relations import SlugRelatedField
 
+from theatre import seat_map
+from theatre.allocation import DEFAULT_CENTER_BIAS
+from theatre.booking import allocate_seats, book_tickets
+from theatre.fieldsets import SparseFieldsMixin
 from theatre.models import (
     TheatreHall,
     Performance,
+    PerformanceAvailability,
     Play,
     Actor,
     Genre,
@@ -13,31 +23,69 @@ from theatre.models import (
 )
 
 
-class TheatreHallSerializer(serializers.ModelSerializer):
+class TheatreHallSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TheatreHall
         fields = "__all__"
 
 
-class ActorSerializer(serializers.ModelSerializer):
+class ActorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Actor
         fields = "__all__"
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = "__all__"
 
 
-class PlaySerializer(serializers.ModelSerializer):
+def storage_url(name, request):
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def image_variant_urls(variants, request) -> dict:
+    """{size: {format: storage name}} to {size: {format: url}}."""
+    return {
+        size: {
+            extension: storage_url(name, request)
+            for extension, name in names.items()
+        }
+        for size, names in variants.items()
+    }
+
+
+class PlaySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Play
-        fields = "__all__"
+        exclude = ("search_vector",)
+
+
+class PlayReadSerializer(PlaySerializer):
+    image_variants = serializers.SerializerMethodField()
+
+    def get_fields(self):
+        """
+        Resized variants replace the original `image`, which is sent only
+        on request (?image=original).
+        """
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        if not (request and request.query_params.get("image") == "original"):
+            fields.pop("image", None)
 
+        return fields
 
-class PlayListSerializer(PlaySerializer):
+    def get_image_variants(self, obj) -> dict:
+        return image_variant_urls(
+            obj.image_variants, self.context.get("request")
+        )
+
+
+class PlayListSerializer(PlayReadSerializer):
     actors = SlugRelatedField(
         many=True,
         read_only=True,
@@ -50,18 +98,200 @@ class PlayListSerializer(PlaySerializer):
     )
 
 
-class PlayDetailSerializer(PlaySerializer):
+class PlayDetailSerializer(PlayReadSerializer):
     actors = ActorSerializer(many=True)
     genres = GenreSerializer(many=True)
 
 
-class PerformanceSerializer(serializers.ModelSerializer):
+# Columns of the rows PlayListValuesSerializer reads, `actor_names` and
+# `genre_names` are arrays in id order
+PLAY_LIST_VALUES = (
+    "id",
+    "title",
+    "description",
+    "image",
+    "image_variants",
+    "updated_at",
+    "actor_names",
+    "genre_names",
+)
+
+
+class PlayListValuesSerializer(PlayListSerializer):
+    """
+    The output of PlayListSerializer built from `values()` rows, without
+    model instances or a field by field serialization.
+    """
+
+    def to_representation(self, row):
+        request = self.context.get("request")
+        fields = self.fields
+        play = {
+            "id": row["id"],
+            "image_variants": image_variant_urls(
+                row["image_variants"], request
+            ),
+            "actors": row["actor_names"],
+            "genres": row["genre_names"],
+            "title": row["title"],
+            "description": row["description"],
+        }
+
+        if "image" in fields:
+            play["image"] = (
+                storage_url(row["image"], request) if row["image"] else None
+            )
+        play["updated_at"] = fields["updated_at"].to_representation(
+            row["updated_at"]
+        )
+
+        return play
+
+
+OVERLAP_MESSAGE = "The theatre hall is already booked at this time."
+
+
+def _conflict_errors(conflicts: list, errors: list) -> list:
+    """
+    Adds a `Performance.objects.find_conflicts` report to per-performance
+    errors in the shape of a `many=True` serializer.
+    """
+
+    def add(position, detail):
+        errors[position].setdefault("show_time", []).append(detail)
+
+    for position, performance_id, other_position in conflicts:
+        if performance_id is not None:
+            add(position, f"{OVERLAP_MESSAGE} (performance {performance_id})")
+        else:
+            add(position, f"Overlaps item {other_position} of the schedule.")
+            add(other_position, f"Overlaps item {position} of the schedule.")
+
+    return errors
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Reads the instance from `preloaded`, {str(pk): instance} looked up by
+    a list serializer for all of its items at once, and queries for the
+    ids it does not hold.
+    """
+
+    preloaded = None
+
+    def to_internal_value(self, data):
+        instance = (self.preloaded or {}).get(str(data))
+        if instance is None:
+            return super().to_internal_value(data)
+        return instance
+
+
+class PerformanceBulkSerializer(serializers.ListSerializer):
+    """
+    Looks up the plays and halls, checks the overlaps of a whole schedule
+    with one query each and inserts it with a single INSERT.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.preload_relations(data)
+        return super().to_internal_value(data)
+
+    def preload_relations(self, data):
+        """
+        Looks up the related instances of every item with one query per
+        field; ids that are not found are left to the field to report.
+        """
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PreloadedPrimaryKeyRelatedField):
+                continue
+
+            pks = {
+                str(item[name])
+                for item in data
+                if isinstance(item, dict) and name in item
+            }
+            ids = [int(pk) for pk in pks if pk.isascii() and pk.isdecimal()]
+            field.preloaded = {
+                str(pk): instance
+                for pk, instance in field.get_queryset().in_bulk(ids).items()
+            }
+
+    def run_validation(self, data=empty):
+        # Errors raised by `validate` end up under non_field_errors, these
+        # are reported per item instead, like the ones of the items
+        attrs = super().run_validation(data)
+        performances = [Performance(**item) for item in attrs]
+        errors = [{} for _ in performances]
+
+        for position, performance in enumerate(performances):
+            try:
+                performance.clean()
+            except DjangoValidationError as error:
+                errors[position]["show_time"] = error.messages
+
+        _conflict_errors(
+            Performance.objects.find_conflicts(performances), errors
+        )
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        performances = [Performance(**item) for item in validated_data]
+
+        try:
+            with transaction.atomic():
+                Performance.objects.bulk_create(performances)
+        except IntegrityError:
+            # A concurrent insert got in between; the constraint held
+            conflicts = Performance.objects.find_conflicts(performances)
+            if not conflicts:
+                raise
+            raise serializers.ValidationError(
+                _conflict_errors(conflicts, [{} for _ in performances])
+            )
+
+        # bulk_create sends no signals
+        PerformanceAvailability.objects.refresh(
+            Performance.objects.filter(
+                pk__in=[performance.pk for performance in performances]
+            )
+        )
+        return performances
+
+
+class PerformanceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    end_time = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = Performance
         fields = "__all__"
+        list_serializer_class = PerformanceBulkSerializer
 
+    def validate(self, attrs):
+        # Schedules are checked at once by PerformanceBulkSerializer
+        if self.parent is None:
+            performance = Performance(**attrs)
+            if self.instance is not None:
+                performance.pk = self.instance.pk
+                for field in ("theatre_hall", "show_time", "duration"):
+                    if field not in attrs:
+                        setattr(
+                            performance, field, getattr(self.instance, field)
+                        )
+
+            if Performance.objects.find_conflicts([performance]):
+                raise serializers.ValidationError(
+                    {"show_time": OVERLAP_MESSAGE}
+                )
+        return attrs
 
-class PerformanceListSerializer(serializers.ModelSerializer):
+
+class PerformanceListSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     theatre_hall_name = serializers.CharField(
         source="theatre_hall.name",
         read_only=True,
@@ -88,20 +318,140 @@ class PerformanceListSerializer(serializers.ModelSerializer):
         )
 
 
+# Columns of the rows PerformanceListValuesSerializer reads
+PERFORMANCE_LIST_VALUES = (
+    "id",
+    "show_time",
+    "play__title",
+    "theatre_hall__name",
+    "theatre_hall__rows",
+    "theatre_hall__seats_in_row",
+    "tickets_available",
+)
+
+
+class PerformanceListValuesSerializer(PerformanceListSerializer):
+    """
+    The output of PerformanceListSerializer built from `values()` rows,
+    without model instances or a field by field serialization.
+    """
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "show_time": self.fields["show_time"].to_representation(
+                row["show_time"]
+            ),
+            "play_title": row["play__title"],
+            "theatre_hall_name": row["theatre_hall__name"],
+            "tickets_available": row["tickets_available"],
+            "theatre_hall_seats": (
+                row["theatre_hall__rows"] * row["theatre_hall__seats_in_row"]
+            ),
+        }
+
+
+class PerformanceCalendarSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    id = serializers.IntegerField(  # noqa: VNE003
+        source="performance_id", read_only=True
+    )
+    theatre_hall_seats = serializers.IntegerField(
+        source="capacity",
+        read_only=True,
+    )
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = PerformanceAvailability
+        fields = (
+            "id",
+            "show_time",
+            "play",
+            "play_title",
+            "theatre_hall",
+            "theatre_hall_name",
+            "tickets_available",
+            "theatre_hall_seats",
+        )
+
+
 class PerformanceDetailSerializer(PerformanceSerializer):
     theatre_hall = TheatreHallSerializer(many=False, read_only=True)
     play = PlayDetailSerializer(many=False, read_only=True)
+    seat_map = serializers.SerializerMethodField()
     taken_seats = serializers.SerializerMethodField()
 
+    def get_fields(self):
+        """
+        The `taken_seats` dict list is opt-in (?taken_seats=list),
+        `seat_map` carries the same information as a packed bitset.
+        """
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        if not (
+            request and request.query_params.get("taken_seats") == "list"
+        ):
+            fields.pop("taken_seats", None)
+
+        return fields
+
+    @staticmethod
+    def _taken_seat_pairs(obj):
+        """
+        (row, seat) pairs, loaded once for `seat_map` and `taken_seats`
+        (the async views preload them).
+        """
+        if getattr(obj, "taken_seat_pairs", None) is None:
+            obj.taken_seat_pairs = list(
+                obj.tickets.values_list("row", "seat")
+            )
+
+        return obj.taken_seat_pairs
+
+    def get_seat_map(self, obj):
+        return seat_map.build_seat_map(
+            self._taken_seat_pairs(obj),
+            obj.theatre_hall.rows,
+            obj.theatre_hall.seats_in_row,
+        )
+
     def get_taken_seats(self, obj):
-        tickets = obj.tickets.all()
-        return [{"row": ticket.row, "seat": ticket.seat} for ticket in tickets]
+        return [
+            {"row": row, "seat": seat}
+            for row, seat in self._taken_seat_pairs(obj)
+        ]
+
+
+class PerformanceRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks each performance up (with its hall) once per serializer tree,
+    so a reservation with many seats fetches every performance once.
+    """
+
+    def to_internal_value(self, data):
+        performances = self.context.setdefault("performances", {})
+        key = str(data)
 
+        if key not in performances:
+            performances[key] = super().to_internal_value(data)
+
+        return performances[key]
+
+
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    performance = PerformanceRelatedField(
+        queryset=Performance.objects.select_related("theatre_hall")
+    )
 
-class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         exclude = ("reservation",)
+        # Taken seats are reported by `book_tickets` from the unique
+        # constraint instead of a SELECT per ticket.
+        validators = []
 
     def validate(self, attrs):
         Ticket.validate_ticket(
@@ -117,7 +467,7 @@ class TicketListSerializer(TicketSerializer):
     performance = PerformanceListSerializer(read_only=True)
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
@@ -128,12 +478,81 @@ class ReservationSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             tickets = validated_data.pop("tickets")
             reservation = Reservation.objects.create(**validated_data)
+            book_tickets(reservation, tickets)
 
-            for ticket in tickets:
-                Ticket.objects.create(reservation=reservation, **ticket)
+            return reservation
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    """
+    A party size and seat preferences; `save()` books the best block of
+    adjacent seats of the `performance` from the context.
+    """
+
+    size = serializers.IntegerField(min_value=1)
+    row_from = serializers.IntegerField(min_value=1, default=1)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+    center_bias = serializers.FloatField(
+        min_value=0, max_value=10, default=DEFAULT_CENTER_BIAS
+    )
+
+    def validate(self, attrs):
+        hall = self.context["performance"].theatre_hall
+        errors = {}
+
+        if attrs["size"] > hall.seats_in_row:
+            errors["size"] = (
+                f"At most {hall.seats_in_row} seats are adjacent "
+                f"in this hall."
+            )
+        for field in ("row_from", "row_to"):
+            if attrs.get(field, 0) > hall.rows:
+                errors[field] = f"The hall has {hall.rows} rows."
+        if attrs["row_from"] > attrs.get("row_to", hall.rows):
+            errors["row_to"] = "Must not be before `row_from`."
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            reservation = Reservation.objects.create(
+                user=validated_data.pop("user")
+            )
+            allocate_seats(
+                reservation, self.context["performance"], **validated_data
+            )
 
             return reservation
 
 
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class ReservationCompactSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    """
+    Tickets grouped by performance id, the performances themselves are
+    sent once per page next to the results.
+    """
+
+    tickets = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Reservation
+        fields = ("id", "created_at", "tickets")
+
+    def get_tickets(self, obj):
+        seats = defaultdict(list)
+        for ticket in obj.tickets.all():
+            seats[ticket.performance_id].append(
+                {"row": ticket.row, "seat": ticket.seat}
+            )
+
+        return [
+            {"performance": performance_id, "seats": performance_seats}
+            for performance_id, performance_seats in seats.items()
+        ]
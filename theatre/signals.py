@@ -0,0 +1,245 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from theatre.cache import bump_model_version_on_commit
+from theatre.events import SEAT_RELEASED, SEAT_TAKEN, publish_seats
+from theatre.images import schedule_variants, variant_names
+from theatre.models import (
+    Actor,
+    Genre,
+    MediaFile,
+    Performance,
+    PerformanceAvailability,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+
+# Models whose version counters key the catalog response cache
+CACHED_MODELS = (TheatreHall, Genre, Actor, Play)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, raw, **kwargs):
+    instance._previous_seat = None
+
+    if instance.pk and not raw:
+        instance._previous_seat = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("performance_id", "row", "seat")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def count_saved_ticket(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+
+    seat = (instance.performance_id, instance.row, instance.seat)
+
+    if created:
+        Performance.objects.adjust_tickets_sold({instance.performance_id: 1})
+        publish_seats(instance.performance_id, SEAT_TAKEN, [seat[1:]])
+        return
+
+    previous_seat = instance._previous_seat
+    if previous_seat is None or previous_seat == seat:
+        return
+
+    # The counters are adjusted first, which locks both performances in
+    # id order before the touch below updates them together
+    previous_performance_id = previous_seat[0]
+    if previous_performance_id != instance.performance_id:
+        Performance.objects.adjust_tickets_sold(
+            {previous_performance_id: -1, instance.performance_id: 1}
+        )
+
+    # Moving a ticket keeps the ticket count and the last ticket id, the
+    # performance ETag version sees the move through `updated_at`
+    Performance.objects.filter(
+        pk__in={previous_performance_id, instance.performance_id}
+    ).update(updated_at=timezone.now())
+
+    publish_seats(previous_performance_id, SEAT_RELEASED, [previous_seat[1:]])
+    publish_seats(instance.performance_id, SEAT_TAKEN, [seat[1:]])
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, origin=None, **kwargs):
+    # Deleting a performance (directly or through its play or hall)
+    # removes the counter together with the tickets. Tickets deleted with
+    # their reservation (directly or through its user) were released per
+    # performance by release_reservation_tickets.
+    origin_model = getattr(origin, "model", type(origin))
+    if issubclass(
+        origin_model,
+        (Performance, Play, TheatreHall, Reservation, get_user_model()),
+    ):
+        return
+
+    Performance.objects.adjust_tickets_sold({instance.performance_id: -1})
+    publish_seats(
+        instance.performance_id,
+        SEAT_RELEASED,
+        [(instance.row, instance.seat)],
+    )
+
+
+@receiver(pre_delete, sender=Reservation)
+def release_reservation_tickets(sender, instance, **kwargs):
+    # One counter update and one event per performance, rather than per
+    # ticket as count_deleted_ticket would
+    seats = defaultdict(list)
+    for performance_id, row, seat in instance.tickets.values_list(
+        "performance_id", "row", "seat"
+    ):
+        seats[performance_id].append((row, seat))
+
+    Performance.objects.adjust_tickets_sold(
+        {
+            performance_id: -len(performance_seats)
+            for performance_id, performance_seats in seats.items()
+        }
+    )
+    for performance_id, performance_seats in seats.items():
+        publish_seats(performance_id, SEAT_RELEASED, performance_seats)
+
+
+def stored_images(play_id):
+    """
+    (image, image_variants) of the stored play, None if there is none.
+    The row stays locked until the transaction ends, so variant jobs and
+    concurrent saves wait and the references released are the current
+    ones, not those of a stale instance.
+    """
+    return (
+        Play.objects.select_for_update()
+        .filter(pk=play_id)
+        .values_list("image", "image_variants")
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Play)
+def remember_image_change(sender, instance, raw, **kwargs):
+    instance._image_changed = False
+    instance._stored_images = None
+
+    # A deferred image that was never accessed cannot have changed
+    if raw or "image" not in instance.__dict__:
+        return
+
+    if not instance._state.adding:
+        instance._stored_images = stored_images(instance.pk)
+
+    stored_image = (instance._stored_images or (None,))[0]
+    instance._image_changed = not instance.image._committed or (
+        instance.image.name or None
+    ) != (stored_image or None)
+
+
+@receiver(post_save, sender=Play)
+def process_changed_image(sender, instance, created, raw, **kwargs):
+    if raw or not instance._image_changed:
+        return
+
+    refs = Counter([instance.image.name])
+    if instance._stored_images is not None:
+        image, variants = instance._stored_images
+        refs.subtract([image, *variant_names(variants)])
+        Play.objects.filter(pk=instance.pk).update(image_variants={})
+        instance.image_variants = {}
+
+    MediaFile.objects.adjust_refs(refs)
+
+    if instance.image:
+        schedule_variants(instance)
+
+
+@receiver(pre_delete, sender=Play)
+def release_play_images(sender, instance, **kwargs):
+    # Deletes run in a transaction, the row is gone once it commits
+    stored = stored_images(instance.pk)
+    if stored is None:
+        return
+
+    image, variants = stored
+    refs = Counter()
+    refs.subtract([image, *variant_names(variants)])
+    MediaFile.objects.adjust_refs(refs)
+
+
+@receiver(post_save, sender=Performance)
+def refresh_performance_availability(sender, instance, raw, **kwargs):
+    if not raw:
+        PerformanceAvailability.objects.refresh(
+            Performance.objects.filter(pk=instance.pk)
+        )
+
+
+@receiver(post_save, sender=Play)
+def refresh_play_availability(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        PerformanceAvailability.objects.refresh(instance.performances.all())
+
+
+@receiver(post_save, sender=TheatreHall)
+def refresh_hall_availability(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        PerformanceAvailability.objects.refresh(
+            instance.performance_set.all()
+        )
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cached_model_version(sender, using, **kwargs):
+    if sender in CACHED_MODELS:
+        bump_model_version_on_commit(sender, using)
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def play_relations_changed(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    # Play.updated_at is the ETag marker of the play with its actors and
+    # genres, so it moves whenever those relations change.
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        touch_plays(Play.objects.filter(pk=instance.pk))
+    elif reverse and action in ("post_add", "post_remove"):
+        touch_plays(Play.objects.filter(pk__in=pk_set))
+    elif reverse and action == "pre_clear":
+        touch_plays(instance.plays.all())
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_model_version_on_commit(Play, using)
+
+
+def touch_plays(queryset):
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+def touch_plays_of_saved_relation(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        touch_plays(instance.plays.all())
+
+
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Genre)
+def touch_plays_of_deleted_relation(sender, instance, **kwargs):
+    touch_plays(instance.plays.all())
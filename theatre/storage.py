@@ -0,0 +1,159 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.views.static import serve
+
+from theatre.models import MediaFile
+
+CONTENT_ADDRESSED_NAME = re.compile(r"(^|/)[0-9a-f]{64}(\.\w+)?$")
+# A content-addressed URL always points to the same bytes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content, keeping the
+    directory and extension of the requested name:
+    uploads/play/hamlet-<uuid>.png -> uploads/play/<sha256>.png.
+    Uploads are streamed chunk by chunk into a temporary file next to the
+    target while being hashed, so identical files are stored once.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Equal names hold equal content, there is nothing to avoid
+        return name
+
+    def _save(self, name, content):
+        directory, requested = posixpath.split(name)
+        extension = os.path.splitext(requested)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=full_directory, prefix=".upload-"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as temporary:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary.write(chunk)
+
+            name = posixpath.join(directory, digest.hexdigest() + extension)
+            # Registered before the file appears, so a concurrent garbage
+            # collection of an orphaned copy skips it. If the caller's
+            # transaction rolls back, collect_garbage finds the file
+            # without its row
+            MediaFile.objects.register(name)
+
+            if self.exists(name):
+                os.remove(temporary_path)
+            else:
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary_path, self.file_permissions_mode)
+                os.replace(temporary_path, self.path(name))
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return name
+
+
+def _untracked_files(storage, cutoff, directory=""):
+    """
+    Yields (name, modified time) of the content-addressed files stored
+    before `cutoff` that have no MediaFile row, which happens when the
+    transaction that stored one rolled back.
+    """
+    if not storage.exists(directory):
+        return
+
+    directories, files = storage.listdir(directory)
+    for subdirectory in directories:
+        yield from _untracked_files(
+            storage, cutoff, posixpath.join(directory, subdirectory)
+        )
+
+    names = [
+        posixpath.join(directory, file_name)
+        for file_name in files
+        if CONTENT_ADDRESSED_NAME.search(file_name)
+    ]
+    tracked = set(
+        MediaFile.objects.filter(name__in=names).values_list(
+            "name", flat=True
+        )
+    )
+    for name in names:
+        if name not in tracked:
+            modified = storage.get_modified_time(name)
+            if modified < cutoff:
+                yield name, modified
+
+
+def collect_garbage(
+    grace: timedelta, storage=default_storage, dry_run: bool = False
+) -> list:
+    """
+    Deletes files without references that were not stored again within
+    `grace`, returns their names. Files without a MediaFile row are
+    tracked first, aged by their modification time. Rows are locked one
+    at a time, so uploads of other files are not blocked.
+    """
+    cutoff = timezone.now() - grace
+    untracked = list(_untracked_files(storage, cutoff))
+    orphans = MediaFile.objects.filter(refs__lte=0, updated_at__lt=cutoff)
+    if dry_run:
+        return [
+            *orphans.values_list("name", flat=True),
+            *(name for name, _ in untracked),
+        ]
+
+    for name, modified in untracked:
+        with transaction.atomic():
+            # Waits for an upload registering the same file; it keeps
+            # the row it created
+            _, created = MediaFile.objects.get_or_create(name=name)
+            if created:
+                MediaFile.objects.filter(name=name).update(
+                    updated_at=modified
+                )
+
+    names = list(orphans.values_list("name", flat=True))
+    deleted = []
+    for name in names:
+        with transaction.atomic():
+            orphan = (
+                orphans.select_for_update(skip_locked=True)
+                .filter(name=name)
+                .first()
+            )
+            if orphan is None:
+                continue
+
+            storage.delete(name)
+            orphan.delete()
+            deleted.append(name)
+
+    return deleted
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """
+    django.views.static.serve that lets clients keep content-addressed
+    files forever.
+    """
+    response = serve(request, path, document_root, show_indexes)
+
+    if response.status_code == 200 and CONTENT_ADDRESSED_NAME.search(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    return response
@@ -0,0 +1,166 @@
+import random
+import time
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.allocation import find_best_block, free_intervals
+from theatre.booking import MAX_BOOKING_ATTEMPTS
+from theatre.models import Reservation, Ticket
+from theatre.tests.factories import (
+    PerformanceFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+    UserFactory,
+)
+
+
+def allocate_url(performance_id):
+    return reverse("theatre:performance-allocate", args=(performance_id,))
+
+
+def seats(res) -> list:
+    return [(ticket["row"], ticket["seat"]) for ticket in res.data["tickets"]]
+
+
+class FreeIntervalsTest(SimpleTestCase):
+    def test_taken_seats_split_the_rows(self):
+        intervals = free_intervals(
+            [(1, 1), (1, 4), (1, 5), (2, 10), (3, 99)], 3, 10
+        )
+
+        self.assertEqual(
+            intervals,
+            {1: [(2, 3), (6, 10)], 2: [(1, 9)], 3: [(1, 10)]},
+        )
+
+    def test_full_row_has_no_intervals(self):
+        intervals = free_intervals([(1, seat) for seat in range(1, 5)], 1, 4)
+
+        self.assertEqual(intervals, {1: []})
+
+
+class FindBestBlockTest(SimpleTestCase):
+    def find(self, taken, size, rows=5, seats_in_row=10, **preferences):
+        return find_best_block(
+            free_intervals(taken, rows, seats_in_row),
+            seats_in_row,
+            size,
+            **preferences,
+        )
+
+    def test_empty_hall_gives_the_front_center(self):
+        self.assertEqual(self.find([], 4), (1, 4))
+        self.assertEqual(self.find([], 3), (1, 4))
+
+    def test_block_moves_away_from_taken_seats(self):
+        self.assertEqual(self.find([(1, 5)], 4, rows=1), (1, 6))
+
+    def test_center_bias_trades_rows_for_the_middle(self):
+        # Only the aisle seats of the front row are free
+        taken = [(1, seat) for seat in range(3, 11)]
+
+        self.assertEqual(self.find(taken, 2, center_bias=0), (1, 1))
+        self.assertEqual(self.find(taken, 2), (2, 5))
+
+    def test_row_range_is_respected(self):
+        self.assertEqual(self.find([], 2, row_from=3, row_to=4), (3, 5))
+
+    def test_no_block_fits(self):
+        taken = [(row, seat) for row in (1, 2) for seat in (4, 8)]
+
+        self.assertIsNone(self.find(taken, 4, rows=2))
+
+    def test_large_hall_allocates_fast(self):
+        rows, seats_in_row = 50, 60
+        taken = random.Random(1).sample(
+            [
+                (row, seat)
+                for row in range(1, rows + 1)
+                for seat in range(1, seats_in_row + 1)
+            ],
+            rows * seats_in_row * 2 // 3,
+        )
+
+        started = time.perf_counter()
+        intervals = free_intervals(taken, rows, seats_in_row)
+        find_best_block(intervals, seats_in_row, 2)
+        # Generous for slow CI machines, a couple of ms locally
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+
+class AllocateSeatsApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+        self.performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=4, seats_in_row=8)
+        )
+
+    def allocate(self, **payload):
+        return self.client.post(
+            allocate_url(self.performance.id), payload, format="json"
+        )
+
+    def test_best_block_is_booked(self):
+        reservation = ReservationFactory()
+        Ticket.objects.create(
+            performance=self.performance,
+            reservation=reservation,
+            row=1,
+            seat=3,
+        )
+
+        res = self.allocate(size=3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(seats(res), [(1, 4), (1, 5), (1, 6)])
+        reservation = Reservation.objects.get(pk=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 4)
+
+    def test_preferences_are_applied(self):
+        res = self.allocate(size=2, row_from=3, row_to=4, center_bias=0)
+
+        self.assertEqual(seats(res), [(3, 4), (3, 5)])
+
+    def test_full_hall_conflicts_without_a_reservation(self):
+        for _ in range(4):
+            self.allocate(size=8)
+
+        res = self.allocate(size=1)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["detail"].code, "no_adjacent_seats")
+        self.assertEqual(Reservation.objects.count(), 4)
+
+    def test_exhausted_retries_conflict(self):
+        with mock.patch(
+            "theatre.booking._insert_tickets",
+            side_effect=IntegrityError("unique_ticket_row_seat_performance"),
+        ) as insert_tickets, mock.patch("theatre.booking.time.sleep"):
+            res = self.allocate(size=2)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["detail"].code, "no_adjacent_seats")
+        self.assertEqual(insert_tickets.call_count, MAX_BOOKING_ATTEMPTS)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_request_must_fit_the_hall(self):
+        res = self.allocate(size=9, row_from=3, row_to=2)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {"size", "row_to"})
+
+    def test_authentication_is_required(self):
+        self.client.force_authenticate(None)
+
+        res = self.allocate(size=2)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,122 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Ticket
+from theatre.tests.factories import (
+    ActorFactory,
+    GenreFactory,
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+)
+
+
+class AsyncReadTest(TestCase):
+    """The async routes answer exactly like their sync counterparts."""
+
+    def setUp(self):
+        self.sync_client = APIClient()
+        self.async_client = AsyncClient()
+
+        genres = GenreFactory.create_batch(2)
+        self.genre_id = genres[0].id
+        actors = ActorFactory.create_batch(3)
+        self.play = PlayFactory(title="Hamlet", actors=actors, genres=genres)
+        PlayFactory.create_batch(6, genres=genres[:1])
+        self.performance = PerformanceFactory(play=self.play)
+        PerformanceFactory.create_batch(6)
+
+        reservation = ReservationFactory()
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+
+    async def assert_same_response(self, name, args=(), query=""):
+        sync_response = await self.sync_get(
+            reverse(f"theatre:{name}", args=args) + query
+        )
+        async_response = await self.async_client.get(
+            reverse(f"theatre:{name}-async", args=args) + query
+        )
+
+        self.assertEqual(
+            async_response.status_code, sync_response.status_code
+        )
+        # Page links point back at the route that served the page
+        self.assertEqual(
+            json.loads(async_response.content.replace(b"/async/", b"/")),
+            json.loads(sync_response.content),
+        )
+        return async_response
+
+    async def sync_get(self, url):
+        return await sync_to_async(self.sync_client.get)(url)
+
+    async def test_performance_list(self):
+        response = await self.assert_same_response("performance-list")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["count"], 7)
+
+    async def test_performance_list_pages(self):
+        await self.assert_same_response(
+            "performance-list", query="?limit=2&offset=4"
+        )
+        await self.assert_same_response(
+            "performance-list", query="?pagination=cursor&limit=3"
+        )
+
+    async def test_performance_detail(self):
+        response = await self.assert_same_response(
+            "performance-detail",
+            args=(self.performance.id,),
+            query="?taken_seats=list",
+        )
+        self.assertEqual(
+            json.loads(response.content)["taken_seats"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+
+    async def test_play_list_filtered(self):
+        await self.assert_same_response("play-list")
+        await self.assert_same_response(
+            "play-list",
+            query=f"?genres={self.genre_id}&limit=3",
+        )
+        await self.assert_same_response("play-list", query="?search=hamlet")
+
+    async def test_play_detail(self):
+        response = await self.assert_same_response(
+            "play-detail", args=(self.play.id,)
+        )
+        self.assertEqual(len(json.loads(response.content)["actors"]), 3)
+
+    async def test_sparse_fieldsets(self):
+        await self.assert_same_response(
+            "performance-detail",
+            args=(self.performance.id,),
+            query="?fields=id,seat_map,play.title,play.genres&expand=",
+        )
+        await self.assert_same_response(
+            "play-list", query="?fields=id,title,actors"
+        )
+
+    async def test_missing_object(self):
+        response = await self.assert_same_response("play-detail", args=(0,))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_write_methods_not_allowed(self):
+        response = await self.async_client.post(
+            reverse("theatre:play-list-async"), {}
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
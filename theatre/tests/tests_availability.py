@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Performance, PerformanceAvailability, Ticket
+from theatre.tests.factories import (
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+)
+
+CALENDAR_URL = reverse("theatre:performance-calendar")
+
+
+def book(performance, *seats):
+    reservation = ReservationFactory()
+    return [
+        Ticket.objects.create(
+            row=1, seat=seat, performance=performance, reservation=reservation
+        )
+        for seat in seats
+    ]
+
+
+class PerformanceAvailabilityTest(TestCase):
+    def setUp(self):
+        self.hall = TheatreHallFactory(rows=10, seats_in_row=20)
+        self.performance = PerformanceFactory(theatre_hall=self.hall)
+
+    def availability(self):
+        return PerformanceAvailability.objects.get(
+            performance=self.performance
+        )
+
+    def test_created_with_the_performance(self):
+        availability = self.availability()
+
+        self.assertEqual(
+            availability.show_date, self.performance.show_time.date()
+        )
+        self.assertEqual(availability.play_title, self.performance.play.title)
+        self.assertEqual(availability.theatre_hall_name, self.hall.name)
+        self.assertEqual(availability.capacity, 200)
+        self.assertEqual(availability.sold, 0)
+
+    def test_follows_sold_and_released_tickets(self):
+        tickets = book(self.performance, 1, 2, 3)
+        self.assertEqual(self.availability().sold, 3)
+
+        tickets[0].delete()
+        self.assertEqual(self.availability().sold, 2)
+
+    def test_follows_booked_reservations(self):
+        client = APIClient()
+        client.force_authenticate(ReservationFactory().user)
+
+        client.post(
+            reverse("theatre:reservation-list"),
+            {
+                "tickets": [
+                    {"row": 2, "seat": 1, "performance": self.performance.id},
+                    {"row": 2, "seat": 2, "performance": self.performance.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(self.availability().sold, 2)
+
+    def test_follows_performance_play_and_hall_changes(self):
+        self.performance.show_time += timedelta(days=2)
+        self.performance.save()
+        self.performance.play.title = "Renamed"
+        self.performance.play.save()
+        self.hall.rows = 5
+        self.hall.save()
+
+        availability = self.availability()
+        self.assertEqual(
+            availability.show_date, self.performance.show_time.date()
+        )
+        self.assertEqual(availability.play_title, "Renamed")
+        self.assertEqual(availability.capacity, 100)
+
+    def test_deleted_with_the_performance(self):
+        self.performance.delete()
+
+        self.assertFalse(PerformanceAvailability.objects.exists())
+
+    def test_rebuild_command_repairs_the_rollup(self):
+        book(self.performance, 1)
+        PerformanceAvailability.objects.update(sold=50, play_title="Stale")
+        other = PerformanceFactory()
+        PerformanceAvailability.objects.filter(performance=other).delete()
+        output = StringIO()
+
+        call_command("rebuild_availability", stdout=output)
+
+        self.assertEqual(self.availability().sold, 1)
+        self.assertEqual(
+            self.availability().play_title, self.performance.play.title
+        )
+        self.assertTrue(
+            PerformanceAvailability.objects.filter(performance=other).exists()
+        )
+        self.assertIn("2 performance(s)", output.getvalue())
+
+    def test_recount_refreshes_the_rollup(self):
+        book(self.performance, 1, 2)
+        Performance.objects.update(tickets_sold=0)
+
+        Performance.objects.recount_tickets_sold()
+
+        self.assertEqual(self.availability().sold, 2)
+
+
+class PerformanceCalendarTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.hall = TheatreHallFactory(rows=2, seats_in_row=5)
+        self.play = PlayFactory()
+        self.performances = [
+            self.create_performance(self.day, hour)
+            for hour in (19, 12)
+        ]
+        self.later = self.create_performance(self.day + timedelta(days=3))
+
+    def create_performance(self, day, hour=18, play=None):
+        return PerformanceFactory(
+            play=play or self.play,
+            theatre_hall=self.hall,
+            show_time=datetime(
+                day.year, day.month, day.day, hour, tzinfo=dt_timezone.utc
+            ),
+        )
+
+    def test_groups_performances_by_day(self):
+        book(self.performances[0], 1, 2, 3)
+
+        res = self.client.get(
+            CALENDAR_URL,
+            {"from": self.day, "to": self.day + timedelta(days=3)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["from"], self.day)
+        self.assertEqual(
+            [len(day["performances"]) for day in res.data["days"]],
+            [2, 0, 0, 1],
+        )
+        first_day = res.data["days"][0]
+        self.assertEqual(first_day["date"], self.day)
+        self.assertEqual(
+            [item["id"] for item in first_day["performances"]],
+            [self.performances[1].id, self.performances[0].id],
+        )
+        self.assertEqual(
+            first_day["performances"][1],
+            {
+                "id": self.performances[0].id,
+                "show_time": self.performances[0]
+                .show_time.isoformat()
+                .replace("+00:00", "Z"),
+                "play": self.play.id,
+                "play_title": self.play.title,
+                "theatre_hall": self.hall.id,
+                "theatre_hall_name": self.hall.name,
+                "tickets_available": 7,
+                "theatre_hall_seats": 10,
+            },
+        )
+
+    def test_defaults_to_a_week_from_today(self):
+        res = self.client.get(CALENDAR_URL)
+
+        self.assertEqual(res.data["from"], timezone.localdate())
+        self.assertEqual(len(res.data["days"]), 7)
+
+    def test_filter_by_play(self):
+        other = self.create_performance(self.day, 9, play=PlayFactory())
+
+        res = self.client.get(CALENDAR_URL, {"play": other.play.id})
+
+        self.assertEqual(
+            [
+                item["id"]
+                for day in res.data["days"]
+                for item in day["performances"]
+            ],
+            [other.id],
+        )
+
+    def test_reads_only_the_rollup(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(CALENDAR_URL)
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn(
+            PerformanceAvailability._meta.db_table, queries[0]["sql"]
+        )
+        self.assertNotIn("JOIN", queries[0]["sql"])
+
+    def test_invalid_ranges_are_rejected(self):
+        for params in (
+            {"from": "tomorrow"},
+            {"from": self.day, "to": self.day - timedelta(days=1)},
+            {"from": self.day, "to": self.day + timedelta(days=62)},
+            {"play": "hamlet"},
+        ):
+            res = self.client.get(CALENDAR_URL, params)
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
@@ -0,0 +1,144 @@
+import random
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase
+
+from theatre.datagen import BULK_CREATE, generate_dataset, ticket_quotas
+from theatre.models import MediaFile, Performance, Play, Reservation, Ticket
+
+
+class GenerateDatasetTest(TestCase):
+    def assert_consistent(self, counts):
+        self.assertEqual(Ticket.objects.count(), 900)
+        self.assertEqual(Performance.objects.count(), 5)
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Reservation.objects.count(), counts["reservations"])
+        self.assertEqual(Performance.objects.recount_tickets_sold(), 0)
+        self.assertFalse(
+            Reservation.objects.annotate(size=Count("tickets"))
+            .exclude(size__range=(1, 4))
+            .exists()
+        )
+
+    def test_counts_and_consistency(self):
+        counts = generate_dataset(
+            halls=2,
+            plays=4,
+            actors=6,
+            performances=5,
+            users=3,
+            tickets=900,
+            chunk_size=50,
+            seed=1,
+        )
+
+        self.assertEqual(counts["tickets"], 900)
+        self.assert_consistent(counts)
+        self.assertFalse(Play.objects.filter(search_vector=None).exists())
+
+    def test_bulk_create_method(self):
+        counts = generate_dataset(
+            halls=2,
+            plays=4,
+            actors=6,
+            performances=5,
+            users=3,
+            tickets=900,
+            method=BULK_CREATE,
+            chunk_size=50,
+            seed=1,
+        )
+
+        self.assert_consistent(counts)
+
+    def test_scale_is_validated(self):
+        for scale in (
+            {"halls": 0, "performances": 1},
+            {"users": 0, "tickets": 1},
+            {"actors": -1},
+        ):
+            with self.subTest(scale=scale), self.assertRaises(ValueError):
+                generate_dataset(**scale)
+
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_progress_is_reported(self):
+        report = mock.Mock()
+
+        generate_dataset(
+            halls=1,
+            plays=1,
+            actors=1,
+            performances=2,
+            users=1,
+            tickets=40,
+            chunk_size=5,
+            report=report,
+        )
+
+        stages = [call.args[0] for call in report.call_args_list]
+        self.assertIn("tickets", stages)
+        self.assertEqual(report.call_args_list[-1].args[1:3], (40, 40))
+
+    def test_users_share_one_password_hash(self):
+        generate_dataset(
+            halls=1,
+            plays=1,
+            actors=1,
+            performances=1,
+            users=3,
+            tickets=0,
+            password="secret",
+        )
+
+        users = get_user_model().objects.all()
+        self.assertEqual(len({user.password for user in users}), 1)
+        self.assertTrue(users[0].check_password("secret"))
+
+    def test_ticket_quotas_respect_capacity(self):
+        quotas = ticket_quotas([10, 3, 50], 60, random.Random(0))
+
+        self.assertEqual(sum(quotas), 60)
+        self.assertLessEqual(quotas[1], 3)
+        with self.assertRaises(ValueError):
+            ticket_quotas([10, 3], 14, random.Random(0))
+
+
+class PopulateDbTest(TransactionTestCase):
+    # TRUNCATE cannot run inside the transaction of a TestCase
+    @mock.patch(
+        "theatre.management.commands.populate_db.config",
+        return_value="secret",
+    )
+    def test_replaces_data_and_keeps_superusers(self, _):
+        superuser = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="secret"
+        )
+        MediaFile.objects.create(name="uploads/play/poster.png", refs=1)
+        output = StringIO()
+
+        for _ in range(2):
+            call_command(
+                "populate_db", "--tickets=60", "--seed=3", stdout=output
+            )
+
+        self.assertEqual(Ticket.objects.count(), 60)
+        self.assertEqual(Performance.objects.count(), 30)
+        self.assertTrue(get_user_model().objects.filter(pk=superuser.pk))
+        self.assertEqual(get_user_model().objects.count(), 11)
+        self.assertFalse(MediaFile.objects.exists())
+        self.assertIn("rows/s", output.getvalue())
+
+    def test_invalid_scale_keeps_the_data(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="secret"
+        )
+
+        with self.assertRaisesMessage(CommandError, "at least one hall"):
+            call_command("populate_db", "--halls=0", stdout=StringIO())
+
+        self.assertTrue(get_user_model().objects.filter(pk=user.pk).exists())
@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from theatre.images import VARIANT_SIZES, generate_variants
+from theatre.models import Play
+from theatre.tests.factories import PlayFactory, UserFactory
+
+PLAY_URL = reverse("theatre:play-list")
+
+
+def create_image(width=1200, height=800):
+    content = BytesIO()
+    Image.new("RGB", (width, height), "purple").save(content, "PNG")
+
+    return SimpleUploadedFile(
+        "poster.png", content.getvalue(), content_type="image/png"
+    )
+
+
+def detail_url(play_id):
+    return reverse("theatre:play-detail", args=(play_id,))
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_staff=True))
+
+    def upload(self, play=None, image=None):
+        image = image or create_image()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            if play is None:
+                res = self.client.post(
+                    PLAY_URL, {"title": "Hamlet", "image": image}
+                )
+            else:
+                res = self.client.patch(
+                    detail_url(play.id), {"image": image}
+                )
+
+        return Play.objects.get(pk=res.data["id"])
+
+    def test_variants_are_built_after_upload(self):
+        play = self.upload()
+
+        self.assertEqual(set(play.image_variants), set(VARIANT_SIZES))
+        for size, pixels in VARIANT_SIZES.items():
+            for extension, name in play.image_variants[size].items():
+                with default_storage.open(name) as variant:
+                    image = Image.open(variant)
+                    self.assertEqual(max(image.size), pixels)
+                    self.assertEqual(
+                        image.format,
+                        {"webp": "WEBP", "jpg": "JPEG"}[extension],
+                    )
+
+    def test_small_images_are_not_enlarged(self):
+        play = self.upload(image=create_image(200, 100))
+
+        with default_storage.open(
+            play.image_variants["medium"]["webp"]
+        ) as variant:
+            self.assertEqual(Image.open(variant).size, (200, 100))
+
+    def test_upload_does_not_wait_for_the_variants(self):
+        with override_settings(IMAGE_VARIANT_WORKERS=2), mock.patch(
+            "theatre.images.get_executor"
+        ) as get_executor:
+            play = self.upload()
+
+        self.assertEqual(play.image_variants, {})
+        get_executor.return_value.submit.assert_called_once()
+
+    def test_variants_replace_the_original_in_responses(self):
+        play = self.upload()
+
+        res = self.client.get(PLAY_URL)
+        listed = res.data["results"][0]
+        self.assertNotIn("image", listed)
+        self.assertTrue(
+            listed["image_variants"]["thumbnail"]["webp"].startswith(
+                "http://testserver/media/"
+            )
+        )
+
+        res = self.client.get(detail_url(play.id), {"image": "original"})
+        self.assertTrue(res.data["image"].endswith(play.image.name))
+        self.assertIn("image_variants", res.data)
+
+    def test_new_image_replaces_the_variants(self):
+        play = self.upload()
+        old_variants = play.image_variants
+
+        with mock.patch("theatre.signals.schedule_variants") as schedule:
+            play.title = "Renamed"
+            play.save()
+        schedule.assert_not_called()
+
+        play = self.upload(play, create_image(500, 500))
+        self.assertEqual(set(play.image_variants), set(VARIANT_SIZES))
+        self.assertNotEqual(play.image_variants, old_variants)
+
+    def test_variants_of_a_replaced_image_are_dropped(self):
+        old_name = self.upload().image.name
+        play = self.upload(Play.objects.get(), create_image(500, 500))
+        variants = play.image_variants
+
+        generate_variants(play.id, old_name)
+
+        play.refresh_from_db()
+        self.assertEqual(play.image_variants, variants)
+
+    def test_command_builds_missing_variants(self):
+        play = self.upload()
+        Play.objects.filter(pk=play.pk).update(image_variants={})
+        PlayFactory()
+        output = StringIO()
+
+        call_command("generate_image_variants", stdout=output)
+
+        play.refresh_from_db()
+        self.assertEqual(set(play.image_variants), set(VARIANT_SIZES))
+        self.assertIn("1 play(s)", output.getvalue())
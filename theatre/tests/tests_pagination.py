@@ -0,0 +1,110 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import FloatField, Value
+from django.db.models.functions import Cast
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Performance, Reservation
+from theatre.pagination import KeysetPagination
+from theatre.tests.factories import (
+    UserFactory,
+    PerformanceFactory,
+    ReservationFactory,
+)
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        show_time = timezone.now() + timezone.timedelta(days=3)
+
+        for hours in (0, 0, 0, 1, 2, 2, 3, 4, 5, 5, 5, 6):
+            PerformanceFactory(
+                show_time=show_time + timezone.timedelta(hours=hours)
+            )
+
+        self.expected_ids = list(
+            Performance.objects.order_by("-show_time", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def walk(self, url, link):
+        ids = []
+        pages = 0
+
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids.append([performance["id"] for performance in res.data["results"]])
+            url = res.data[link]
+            pages += 1
+            self.assertLess(pages, 10)
+
+        return ids, res.data
+
+    def test_walk_forward_and_back(self):
+        pages, last_page = self.walk(
+            f"{PERFORMANCE_URL}?pagination=cursor&limit=5", "next"
+        )
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual(sum(pages, []), self.expected_ids)
+        self.assertIsNone(last_page["next"])
+
+        back_pages, first_page = self.walk(last_page["previous"], "previous")
+
+        self.assertEqual(back_pages, pages[-2::-1])
+        self.assertIsNone(first_page["previous"])
+
+    def test_offset_pagination_is_default(self):
+        res = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(res.data["count"], len(self.expected_ids))
+
+    def test_invalid_cursor(self):
+        res = self.client.get(PERFORMANCE_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reservations_cursor_ordered_by_created_at(self):
+        user = UserFactory()
+        self.client.force_authenticate(user)
+        for _ in range(7):
+            ReservationFactory(user=user)
+
+        pages, _ = self.walk(
+            f"{RESERVATION_URL}?pagination=cursor&limit=3", "next"
+        )
+
+        self.assertEqual(
+            sum(pages, []),
+            list(
+                Reservation.objects.order_by("-created_at", "-id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+    def test_annotation_fields_must_round_trip(self):
+        pagination = KeysetPagination()
+        pagination.model = Performance
+        score = Value(0.5, output_field=FloatField())
+
+        with self.assertRaises(ImproperlyConfigured):
+            pagination.get_field(
+                Performance.objects.annotate(score=score), "score"
+            )
+
+        field = pagination.get_field(
+            Performance.objects.annotate(score=Cast(score, FloatField())),
+            "score",
+        )
+        self.assertEqual(pagination.to_python("score", field, 0.5), 0.5)
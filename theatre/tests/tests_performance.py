@@ -1,12 +1,25 @@
+import base64
+from io import StringIO
 from datetime import timedelta
+from unittest import mock
 
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Performance
+from theatre import seat_map
+from theatre.models import (
+    PERFORMANCE_PERIOD_FUNCTION,
+    Performance,
+    PerformanceAvailability,
+    Ticket,
+)
 from theatre.serializers import (
     PerformanceSerializer,
     PerformanceDetailSerializer,
@@ -16,9 +29,11 @@ from theatre.tests.factories import (
     PerformanceFactory,
     PlayFactory,
     TheatreHallFactory,
+    ReservationFactory,
 )
 
 PERFORMANCE_URL = reverse("theatre:performance-list")
+BULK_URL = reverse("theatre:performance-bulk")
 
 
 def create_payload():
@@ -36,6 +51,21 @@ def detail_url(id):
     return reverse("theatre:performance-detail", args=(id,))
 
 
+def seats_url(id):
+    return reverse("theatre:performance-seats", args=(id,))
+
+
+def create_tickets(performance, seats):
+    reservation = ReservationFactory()
+    for row, seat in seats:
+        Ticket.objects.create(
+            row=row,
+            seat=seat,
+            performance=performance,
+            reservation=reservation,
+        )
+
+
 class UnauthorizedPerformanceTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -53,6 +83,114 @@ class UnauthorizedPerformanceTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_taken_seats_list_is_opt_in(self):
+        performance = PerformanceFactory()
+        create_tickets(performance, [(1, 2), (2, 1)])
+
+        res = self.client.get(detail_url(performance.id))
+        self.assertNotIn("taken_seats", res.data)
+        self.assertEqual(res.data["seat_map"]["encoding"], seat_map.BITSET)
+
+        res = self.client.get(
+            detail_url(performance.id), {"taken_seats": "list"}
+        )
+        self.assertEqual(
+            res.data["taken_seats"],
+            [{"row": 1, "seat": 2}, {"row": 2, "seat": 1}],
+        )
+
+    def test_seats_bitset(self):
+        performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=5, seats_in_row=10)
+        )
+        create_tickets(performance, [(1, 1), (1, 10), (5, 10)])
+
+        res = self.client.get(seats_url(performance.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 5)
+        self.assertEqual(res.data["seats_in_row"], 10)
+        bitmap = base64.b64decode(res.data["taken"])
+        self.assertEqual(len(bitmap), 7)
+        self.assertEqual(
+            seat_map.unpack_bitset(bitmap, 5, 10),
+            [(1, 1), (1, 10), (5, 10)],
+        )
+
+    def test_seats_rle_and_list(self):
+        performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=2, seats_in_row=6)
+        )
+        create_tickets(performance, [(1, 3), (1, 4), (2, 1)])
+
+        res = self.client.get(seats_url(performance.id), {"encoding": "rle"})
+        self.assertEqual(res.data["taken"], [[2, 2, 2], [0, 1, 5]])
+
+        res = self.client.get(seats_url(performance.id), {"encoding": "list"})
+        self.assertEqual(
+            res.data["taken"],
+            [
+                {"row": 1, "seat": 3},
+                {"row": 1, "seat": 4},
+                {"row": 2, "seat": 1},
+            ],
+        )
+
+    def test_seats_unknown_encoding(self):
+        performance = PerformanceFactory()
+
+        res = self.client.get(seats_url(performance.id), {"encoding": "png"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_conditional_get(self):
+        performance = PerformanceFactory()
+        url = detail_url(performance.id)
+
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        create_tickets(performance, [(1, 1)])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_changes_when_ticket_released(self):
+        performance = PerformanceFactory()
+        create_tickets(performance, [(1, 1), (1, 2)])
+        url = detail_url(performance.id)
+        etag = self.client.get(url)["ETag"]
+
+        Ticket.objects.filter(seat=1).delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_when_ticket_moved(self):
+        performance = PerformanceFactory()
+        create_tickets(performance, [(1, 1)])
+        url = f"{detail_url(performance.id)}?taken_seats=list"
+        etag = self.client.get(url)["ETag"]
+
+        ticket = Ticket.objects.get()
+        ticket.seat = 2
+        ticket.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["taken_seats"], [{"row": 1, "seat": 2}])
+
+    def test_etag_for_missing_performance(self):
+        res = self.client.get(detail_url(0), HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_performance_forbidden(self):
         payload = create_payload()
 
@@ -77,6 +215,16 @@ class AuthorizedPerformanceTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data["results"]), len(serializer.data))
 
+    def test_tickets_available_uses_tickets_sold_counter(self):
+        performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=2, seats_in_row=5)
+        )
+        create_tickets(performance, [(1, 1), (1, 2)])
+
+        res = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 8)
+
     def test_not_admin_can_not_create_performance(self):
         payload = create_payload()
 
@@ -106,3 +254,216 @@ class AdminPerformanceTest(TestCase):
         self.assertAlmostEqual(
             payload["show_time"], performance.show_time, delta=timedelta(seconds=1)
         )
+
+
+class TicketsSoldCounterTest(TestCase):
+    def setUp(self):
+        self.performance = PerformanceFactory()
+
+    def assertTicketsSold(self, expected):
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, expected)
+
+    def test_counter_follows_ticket_create_and_delete(self):
+        create_tickets(self.performance, [(1, 1), (1, 2), (2, 2)])
+        self.assertTicketsSold(3)
+
+        Ticket.objects.filter(row=1).delete()
+        self.assertTicketsSold(1)
+
+    def test_counter_follows_reservation_cascade(self):
+        create_tickets(self.performance, [(1, 1), (1, 2)])
+
+        Ticket.objects.first().reservation.delete()
+
+        self.assertTicketsSold(0)
+
+    def test_reservation_delete_queries_do_not_grow_with_tickets(self):
+        query_counts = []
+        for seats in ([(1, 1)], [(2, seat) for seat in range(1, 9)]):
+            create_tickets(self.performance, seats)
+            reservation = Ticket.objects.get(
+                row=seats[0][0], seat=seats[0][1]
+            ).reservation
+
+            with CaptureQueriesContext(connection) as queries:
+                reservation.delete()
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertTicketsSold(0)
+
+    def test_counter_follows_ticket_moved_to_another_performance(self):
+        other_performance = PerformanceFactory()
+        create_tickets(self.performance, [(1, 1)])
+
+        ticket = Ticket.objects.get()
+        ticket.performance = other_performance
+        ticket.save()
+
+        self.assertTicketsSold(0)
+        other_performance.refresh_from_db()
+        self.assertEqual(other_performance.tickets_sold, 1)
+
+    def test_recount_availability_repairs_drift(self):
+        create_tickets(self.performance, [(1, 1), (1, 2)])
+        Performance.objects.update(tickets_sold=42)
+
+        call_command("recount_availability", stdout=StringIO())
+
+        self.assertTicketsSold(2)
+
+
+class HallOverlapTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_staff=True))
+        self.hall = TheatreHallFactory()
+        self.play = PlayFactory()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.performance = PerformanceFactory(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time=self.start,
+            duration=120,
+        )
+
+    def payload(self, hours, duration=120, hall=None):
+        return {
+            "play": self.play.id,
+            "theatre_hall": (hall or self.hall).id,
+            "show_time": self.start + timedelta(hours=hours),
+            "duration": duration,
+        }
+
+    def test_overlapping_performance_is_rejected(self):
+        res = self.client.post(PERFORMANCE_URL, self.payload(1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_time", res.data)
+
+    def test_back_to_back_and_other_halls_are_allowed(self):
+        other_hall = TheatreHallFactory()
+
+        for payload in (self.payload(2), self.payload(1, hall=other_hall)):
+            res = self.client.post(PERFORMANCE_URL, payload)
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(
+                parse_datetime(res.data["end_time"]),
+                payload["show_time"] + timedelta(minutes=120),
+            )
+
+    def test_update_does_not_conflict_with_itself(self):
+        res = self.client.patch(
+            detail_url(self.performance.id), {"duration": 150}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_overlap_missed_by_validation_is_a_bad_request(self):
+        # A concurrent write between the check and the save
+        other = PerformanceFactory(
+            play=self.play,
+            theatre_hall=self.hall,
+            show_time=self.start + timedelta(hours=3),
+        )
+        skip_serializer_check = mock.patch.object(
+            PerformanceSerializer, "validate", lambda serializer, attrs: attrs
+        )
+        skip_model_check = mock.patch.object(
+            Performance, "validate_constraints"
+        )
+
+        with skip_serializer_check, skip_model_check:
+            created = self.client.post(PERFORMANCE_URL, self.payload(1))
+            updated = self.client.patch(
+                detail_url(other.id),
+                {"show_time": self.start + timedelta(hours=1)},
+            )
+
+        for res in (created, updated):
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("show_time", res.data)
+        other.refresh_from_db()
+        self.assertEqual(other.show_time, self.start + timedelta(hours=3))
+        self.assertEqual(Performance.objects.count(), 2)
+
+    def test_constraint_holds_without_validation(self):
+        with self.assertRaises(IntegrityError):
+            Performance.objects.bulk_create(
+                [
+                    Performance(
+                        play=self.play,
+                        theatre_hall=self.hall,
+                        show_time=self.start + timedelta(hours=1),
+                    )
+                ]
+            )
+
+
+class BulkScheduleTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_staff=True))
+        self.hall = TheatreHallFactory()
+        self.play = PlayFactory()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.stored = PerformanceFactory(
+            play=self.play, theatre_hall=self.hall, show_time=self.start
+        )
+
+    def schedule(self, *hours):
+        return [
+            {
+                "play": self.play.id,
+                "theatre_hall": self.hall.id,
+                "show_time": (self.start + timedelta(hours=hour)).isoformat(),
+            }
+            for hour in hours
+        ]
+
+    def post(self, schedule):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BULK_URL, schedule, format="json")
+
+        conflict_checks = [
+            query
+            for query in queries
+            if PERFORMANCE_PERIOD_FUNCTION in query["sql"]
+        ]
+        self.assertEqual(len(conflict_checks), 1)
+        return res
+
+    def test_schedule_is_created(self):
+        res = self.post(self.schedule(3, 6, 9))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(Performance.objects.count(), 4)
+        self.assertEqual(PerformanceAvailability.objects.count(), 4)
+
+    def test_conflicts_are_reported_per_item(self):
+        res = self.post(self.schedule(4, 1, 8, 9))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn(
+            f"performance {self.stored.id}", res.data[1]["show_time"][0]
+        )
+        self.assertIn("item 3", res.data[2]["show_time"][0])
+        self.assertIn("item 2", res.data[3]["show_time"][0])
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_unknown_relations_are_reported_per_item(self):
+        schedule = self.schedule(3, 6, 9)
+        schedule[1]["play"] = self.play.id + 1000
+        schedule[2]["theatre_hall"] = "²"
+
+        res = self.client.post(BULK_URL, schedule, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn("play", res.data[1])
+        self.assertIn("theatre_hall", res.data[2])
+        self.assertEqual(Performance.objects.count(), 1)
@@ -89,6 +89,84 @@ class UnauthorizedPlayTest(TestCase):
         self.assertIn(serializer_play_title_2.data, res.data["results"])
         self.assertNotIn(serializer_play_title_3.data, res.data["results"])
 
+    def test_filter_plays_by_title_and_genres(self):
+        genre = GenreFactory()
+        play_with_genre = PlayFactory(title="Hamlet", genres=[genre])
+        PlayFactory(title="Hamlet")
+
+        res = self.client.get(PLAY_URL, {"title": "mle", "genres": genre.id})
+
+        self.assertEqual(
+            [play["id"] for play in res.data["results"]], [play_with_genre.id]
+        )
+
+    def test_filter_plays_by_title_prefix(self):
+        prince = PlayFactory(title="Prince of Denmark")
+        PlayFactory(title="Hamlet")
+
+        for title_prefix in ("prin den", "Denm"):
+            res = self.client.get(PLAY_URL, {"title_prefix": title_prefix})
+            self.assertEqual(
+                [play["id"] for play in res.data["results"]], [prince.id]
+            )
+
+        res = self.client.get(PLAY_URL, {"title_prefix": "mlet"})
+        self.assertEqual(res.data["results"], [])
+
+    def test_stop_word_title_prefix_falls_back_to_substring(self):
+        theatre = PlayFactory(title="Theatre of the Absurd")
+        PlayFactory(title="Hamlet")
+
+        for title_prefix in ("the", "The a"):
+            res = self.client.get(PLAY_URL, {"title_prefix": title_prefix})
+            self.assertEqual(
+                [play["id"] for play in res.data["results"]], [theatre.id]
+            )
+
+    def test_search_plays_in_title_and_description(self):
+        in_description = PlayFactory(
+            title="Another Title", description="A story about a ghost"
+        )
+        in_title = PlayFactory(title="The Ghost", description="Spooky")
+        PlayFactory(title="Other", description="Nothing to see")
+
+        res = self.client.get(PLAY_URL, {"search": "ghosts"})
+
+        self.assertEqual(
+            [play["id"] for play in res.data["results"]],
+            [in_title.id, in_description.id],
+        )
+
+    def test_search_plays_accent_insensitive(self):
+        play = PlayFactory(title="Café Müller", description="")
+
+        for query in ("cafe muller", "Café"):
+            res = self.client.get(PLAY_URL, {"search": query})
+            self.assertEqual(
+                [play["id"] for play in res.data["results"]], [play.id]
+            )
+
+    def test_search_cursor_pages_over_tied_ranks(self):
+        plays = [
+            PlayFactory(title=f"Ghost story {number}", description="")
+            for number in range(7)
+        ]
+        PlayFactory(title="Other", description="Nothing to see")
+
+        ids = []
+        url = f"{PLAY_URL}?search=ghost&pagination=cursor&limit=2"
+        for _ in range(len(plays)):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [play["id"] for play in res.data["results"]]
+            url = res.data["next"]
+            if url is None:
+                break
+
+        self.assertIsNone(url)
+        plays.sort(key=lambda play: play.title, reverse=True)
+        self.assertEqual(ids, [play.id for play in plays])
+
     def test_retrieve_play_detail(self):
         play = PlayFactory()
         url = detail_url(play.id)
@@ -98,6 +176,25 @@ class UnauthorizedPlayTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_conditional_get(self):
+        actor = ActorFactory()
+        play = PlayFactory(actors=[actor])
+        url = detail_url(play.id)
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        actor.first_name = "Renamed"
+        actor.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res["ETag"]
+
+        play.genres.add(GenreFactory())
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_create_play_forbidden(self):
         payload = create_payload()
 
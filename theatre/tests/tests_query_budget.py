@@ -0,0 +1,405 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from theatre.models import Ticket
+from theatre.tests.factories import (
+    ActorFactory,
+    GenreFactory,
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+    UserFactory,
+)
+
+# Fixture sizes every endpoint is measured at, pages are large enough to
+# hold the biggest one
+SIZES = (2, 7)
+LIST_PARAMS = "?limit=100"
+
+PASSWORD = "budget-password"
+
+# endpoint: (HTTP method, url name, query string, query budget). Names
+# are in the theatre namespace unless they name theirs.
+BUDGETS = {
+    "api-root": ("get", "api-root", "", 0),
+    "theatre-hall-list": ("get", "theatrehall-list", LIST_PARAMS, 2),
+    "theatre-hall-detail": ("get", "theatrehall-detail", "", 1),
+    "genre-list": ("get", "genre-list", LIST_PARAMS, 2),
+    "genre-detail": ("get", "genre-detail", "", 1),
+    "actor-list": ("get", "actor-list", LIST_PARAMS, 2),
+    "actor-detail": ("get", "actor-detail", "", 1),
+    "performance-list": ("get", "performance-list", LIST_PARAMS, 2),
+    "performance-list-cursor": (
+        "get",
+        "performance-list",
+        f"{LIST_PARAMS}&pagination=cursor",
+        1,
+    ),
+    "performance-detail": ("get", "performance-detail", "", 5),
+    "performance-detail-taken-seats": (
+        "get",
+        "performance-detail",
+        "?taken_seats=list",
+        5,
+    ),
+    "performance-detail-ids": (
+        "get",
+        "performance-detail",
+        "?expand=",
+        3,
+    ),
+    "performance-seats": ("get", "performance-seats", "", 2),
+    "performance-seats-rle": (
+        "get",
+        "performance-seats",
+        "?encoding=rle",
+        2,
+    ),
+    "performance-calendar": ("get", "performance-calendar", "", 1),
+    "performance-list-async": (
+        "get",
+        "performance-list-async",
+        LIST_PARAMS,
+        2,
+    ),
+    "performance-detail-async": ("get", "performance-detail-async", "", 4),
+    "performance-allocate": ("post", "performance-allocate", "", 12),
+    "performance-bulk": ("post", "performance-bulk", "", 7),
+    "play-list": ("get", "play-list", LIST_PARAMS, 2),
+    "play-list-search": (
+        "get",
+        "play-list",
+        f"{LIST_PARAMS}&search=play",
+        2,
+    ),
+    "play-detail": ("get", "play-detail", "", 4),
+    "play-detail-ids": ("get", "play-detail", "?expand=", 4),
+    "play-list-async": ("get", "play-list-async", LIST_PARAMS, 2),
+    "play-detail-async": ("get", "play-detail-async", "", 3),
+    "reservation-list": ("get", "reservation-list", LIST_PARAMS, 4),
+    "reservation-list-compact": (
+        "get",
+        "reservation-list",
+        f"{LIST_PARAMS}&layout=compact",
+        4,
+    ),
+    "reservation-detail": ("get", "reservation-detail", "", 2),
+    # Includes the availability rollup upsert
+    "reservation-create": ("post", "reservation-list", "", 12),
+    "user-register": ("post", "user:register", "", 2),
+    "user-me": ("get", "user:manage_user", "", 1),
+    "user-token": ("post", "user:token_obtain_pair", "", 1),
+    "user-token-refresh": ("post", "user:token_refresh", "", 0),
+    "user-token-verify": ("post", "user:token_verify", "", 0),
+}
+
+# Routes measured elsewhere, with the reason
+UNBUDGETED = {
+    # An endless event stream, tests_seat_events counts its queries
+    "theatre:performance-seat-events",
+}
+
+# Url names whose route takes the id of the fixture's object of the kind
+DETAIL_ROUTES = {
+    "detail": None,
+    "detail-async": None,
+    "seats": "performance",
+    "allocate": "performance",
+}
+
+
+def route_names(resolver=None, namespace=None):
+    """Namespaced names of every route of the theatre and user apps."""
+    resolver = resolver or get_resolver()
+
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern, pattern.namespace or namespace)
+        elif namespace in ("theatre", "user") and pattern.name:
+            yield f"{namespace}:{pattern.name}"
+
+
+def format_queries(queries) -> str:
+    """Numbered SQL of a run, statements that ran repeatedly first."""
+    runs = Counter(query["sql"] for query in queries)
+    lines = [
+        f"{index}. {query['sql']}"
+        for index, query in enumerate(queries, start=1)
+    ]
+    repeated = [
+        f"{count}x {sql}" for sql, count in runs.items() if count > 1
+    ]
+
+    return "\n".join(
+        [*(["Repeated:"] + repeated if repeated else []), "All:", *lines]
+    )
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Every endpoint runs a fixed number of queries, however many rows the
+    response carries. Endpoints are measured at each of SIZES and must
+    stay at the budget declared in BUDGETS.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        # Staff, so schedules can be posted too
+        self.user = UserFactory(is_staff=True, password=PASSWORD)
+        self.client.force_authenticate(self.user)
+        self.hall = TheatreHallFactory(rows=20, seats_in_row=20)
+        self.genres = []
+        self.actors = []
+        self.posted = 0
+        self.shows = 0
+
+    def show_time(self):
+        # One hall, so the shows must not overlap
+        self.shows += 1
+        return timezone.now() + timedelta(days=1, hours=4 * self.shows)
+
+    def grow(self, count):
+        """
+        Adds `count` plays with `count` actors and genres, each shown once
+        and booked by a reservation of `count` tickets.
+        """
+        while len(self.genres) < count:
+            self.genres.append(GenreFactory())
+            self.actors.append(ActorFactory())
+
+        plays = PlayFactory.create_batch(
+            count,
+            title="Budget play",
+            genres=self.genres[:count],
+            actors=self.actors[:count],
+        )
+        for play in plays:
+            performance = PerformanceFactory(
+                play=play,
+                theatre_hall=self.hall,
+                show_time=self.show_time(),
+            )
+            reservation = ReservationFactory(user=self.user)
+            for seat in range(1, count + 1):
+                Ticket.objects.create(
+                    row=1,
+                    seat=seat,
+                    performance=performance,
+                    reservation=reservation,
+                )
+
+        self.instances = {
+            "theatrehall": self.hall,
+            "genre": self.genres[0],
+            "actor": self.actors[0],
+            "play": plays[0],
+            "performance": performance,
+            "reservation": reservation,
+        }
+
+    def url(self, name, query):
+        if ":" not in name:
+            name = f"theatre:{name}"
+
+        kind, _, route = name.partition(":")[2].partition("-")
+        args = ()
+        if route in DETAIL_ROUTES:
+            args = (self.instances[DETAIL_ROUTES[route] or kind].id,)
+
+        return reverse(name, args=args) + query
+
+    def payload(self, name, size):
+        """Body of a POST to `name`, every one books or adds new rows."""
+        self.posted += 1
+        performance = self.instances["performance"]
+
+        if name == "reservation-list":
+            # Row 1 is booked by the fixture
+            return {
+                "tickets": [
+                    {
+                        "row": self.posted + 1,
+                        "seat": seat,
+                        "performance": performance.id,
+                    }
+                    for seat in range(1, size + 1)
+                ]
+            }
+        if name == "performance-allocate":
+            return {"size": size}
+        if name == "performance-bulk":
+            return [
+                {
+                    "play": performance.play_id,
+                    "theatre_hall": self.hall.id,
+                    "show_time": self.show_time().isoformat(),
+                }
+                for _ in range(size)
+            ]
+        if name == "user:register":
+            return {
+                "email": f"budget-{self.posted}@example.com",
+                "password": PASSWORD,
+            }
+        if name == "user:token_obtain_pair":
+            return {"email": self.user.email, "password": PASSWORD}
+        if name == "user:token_refresh":
+            return {"refresh": str(RefreshToken.for_user(self.user))}
+        if name == "user:token_verify":
+            return {
+                "token": str(RefreshToken.for_user(self.user).access_token)
+            }
+
+        raise ValueError(f"No payload for {name}")
+
+    def assert_budget(self, endpoint):
+        method, name, query, budget = BUDGETS[endpoint]
+        fixture_size = 0
+
+        for size in SIZES:
+            self.grow(size - fixture_size)
+            fixture_size = size
+            kwargs = (
+                {"data": self.payload(name, size), "format": "json"}
+                if method == "post"
+                else {}
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(
+                    self.url(name, query), **kwargs
+                )
+
+            self.assertLess(
+                response.status_code,
+                status.HTTP_400_BAD_REQUEST,
+                response.content,
+            )
+            self.assertEqual(
+                len(queries),
+                budget,
+                f"{endpoint} ran {len(queries)} queries at size {size}, "
+                f"the budget is {budget}\n{format_queries(queries)}",
+            )
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {
+            name if ":" in name else f"theatre:{name}"
+            for _, name, _, _ in BUDGETS.values()
+        }
+
+        self.assertEqual(
+            set(route_names()) - UNBUDGETED - budgeted, set()
+        )
+
+    def test_api_root(self):
+        self.assert_budget("api-root")
+
+    def test_theatre_hall_list(self):
+        self.assert_budget("theatre-hall-list")
+
+    def test_theatre_hall_detail(self):
+        self.assert_budget("theatre-hall-detail")
+
+    def test_genre_list(self):
+        self.assert_budget("genre-list")
+
+    def test_genre_detail(self):
+        self.assert_budget("genre-detail")
+
+    def test_actor_list(self):
+        self.assert_budget("actor-list")
+
+    def test_actor_detail(self):
+        self.assert_budget("actor-detail")
+
+    def test_performance_list(self):
+        self.assert_budget("performance-list")
+
+    def test_performance_list_cursor(self):
+        self.assert_budget("performance-list-cursor")
+
+    def test_performance_detail(self):
+        self.assert_budget("performance-detail")
+
+    def test_performance_detail_taken_seats(self):
+        self.assert_budget("performance-detail-taken-seats")
+
+    def test_performance_detail_ids(self):
+        self.assert_budget("performance-detail-ids")
+
+    def test_performance_seats(self):
+        self.assert_budget("performance-seats")
+
+    def test_performance_seats_rle(self):
+        self.assert_budget("performance-seats-rle")
+
+    def test_performance_calendar(self):
+        self.assert_budget("performance-calendar")
+
+    def test_performance_list_async(self):
+        self.assert_budget("performance-list-async")
+
+    def test_performance_detail_async(self):
+        self.assert_budget("performance-detail-async")
+
+    def test_performance_allocate(self):
+        self.assert_budget("performance-allocate")
+
+    def test_performance_bulk(self):
+        self.assert_budget("performance-bulk")
+
+    def test_play_list(self):
+        self.assert_budget("play-list")
+
+    def test_play_list_search(self):
+        self.assert_budget("play-list-search")
+
+    def test_play_detail(self):
+        self.assert_budget("play-detail")
+
+    def test_play_detail_ids(self):
+        self.assert_budget("play-detail-ids")
+
+    def test_play_list_async(self):
+        self.assert_budget("play-list-async")
+
+    def test_play_detail_async(self):
+        self.assert_budget("play-detail-async")
+
+    def test_reservation_list(self):
+        self.assert_budget("reservation-list")
+
+    def test_reservation_list_compact(self):
+        self.assert_budget("reservation-list-compact")
+
+    def test_reservation_detail(self):
+        self.assert_budget("reservation-detail")
+
+    def test_reservation_create(self):
+        self.assert_budget("reservation-create")
+
+    def test_user_register(self):
+        self.assert_budget("user-register")
+
+    def test_user_me(self):
+        self.assert_budget("user-me")
+
+    def test_user_token(self):
+        self.assert_budget("user-token")
+
+    def test_user_token_refresh(self):
+        self.assert_budget("user-token-refresh")
+
+    def test_user_token_verify(self):
+        self.assert_budget("user-token-verify")
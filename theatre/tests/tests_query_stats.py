@@ -0,0 +1,68 @@
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.models import Performance
+from theatre.tests.factories import PerformanceFactory
+from theatre_service.middleware import QueryStatsMiddleware
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def header_queries(response):
+    count, repeated = response["X-DB-Queries"].split("; repeated=")
+    return int(count), int(repeated)
+
+
+def performance_titles(request):
+    # Performance.__str__ loads the play of every performance on its own
+    performances = Performance.objects.all()
+    return HttpResponse(", ".join(map(str, performances)))
+
+
+class QueryStatsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        PerformanceFactory.create_batch(3)
+
+    def test_headers_report_queries(self):
+        response = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(header_queries(response), (2, 0))
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=\d+\.\d;desc="2 queries"$'
+        )
+
+    @override_settings(QUERY_STATS_LOG_COUNT=2)
+    def test_repeated_statements_are_counted_and_logged(self):
+        middleware = QueryStatsMiddleware(performance_titles)
+
+        with self.assertLogs("theatre_service.queries") as logs:
+            response = middleware(RequestFactory().get("/titles/"))
+
+        self.assertEqual(header_queries(response), (4, 2))
+        self.assertIn(
+            "GET /titles/ ran 4 queries (2 repeated)", logs.output[0]
+        )
+        self.assertIn("3x SELECT", logs.output[0])
+
+    def test_requests_under_thresholds_are_not_logged(self):
+        with self.assertNoLogs("theatre_service.queries"):
+            self.client.get(PERFORMANCE_URL)
+
+    @override_settings(QUERY_STATS_HEADERS=False)
+    def test_headers_can_be_turned_off(self):
+        middleware = QueryStatsMiddleware(performance_titles)
+
+        response = middleware(RequestFactory().get("/titles/"))
+
+        self.assertNotIn("X-DB-Queries", response)
+
+    async def test_async_view_queries_are_counted(self):
+        response = await AsyncClient().get(
+            reverse("theatre:performance-list-async")
+        )
+
+        self.assertEqual(header_queries(response), (2, 0))
@@ -1,15 +1,35 @@
-from django.test import TestCase
+import random
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Reservation
+from theatre.booking import SEAT_REPEATED_MESSAGE
+from theatre.models import Reservation, Ticket
 from theatre.serializers import ReservationSerializer
-from theatre.tests.factories import UserFactory, ReservationFactory
+from theatre.tests.factories import (
+    UserFactory,
+    ReservationFactory,
+    PerformanceFactory,
+    TheatreHallFactory,
+)
 
 RESERVATION_URL = reverse("theatre:reservation-list")
 
 
+def create_payload(performance, seats):
+    return {
+        "tickets": [
+            {"row": row, "seat": seat, "performance": performance.id}
+            for row, seat in seats
+        ]
+    }
+
+
 class UnauthorizedReservationTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -33,3 +53,305 @@ class AuthorizedReservationTest(TestCase):
         serializer = ReservationSerializer(reservations, many=True)
 
         self.assertEqual(res.data["results"], serializer.data)
+
+    def book(self, performance, seats):
+        reservation = ReservationFactory(user=self.user)
+        for row, seat in seats:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=performance,
+                reservation=reservation,
+            )
+        return reservation
+
+    def test_reservations_list_performances_are_annotated(self):
+        performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=2, seats_in_row=5)
+        )
+        self.book(performance, [(1, 1), (1, 2)])
+
+        res = self.client.get(RESERVATION_URL)
+
+        tickets = res.data["results"][0]["tickets"]
+        self.assertEqual(len(tickets), 2)
+        self.assertEqual(tickets[0]["performance"]["id"], performance.id)
+        self.assertEqual(tickets[0]["performance"]["tickets_available"], 8)
+
+    def test_compact_layout_sends_every_performance_once(self):
+        first, second = PerformanceFactory.create_batch(2)
+        older = self.book(first, [(1, 1), (1, 2)])
+        newer = self.book(second, [(2, 1)])
+        Ticket.objects.create(
+            row=2, seat=2, performance=first, reservation=newer
+        )
+
+        res = self.client.get(RESERVATION_URL, {"layout": "compact"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [reservation["id"] for reservation in res.data["results"]],
+            [newer.id, older.id],
+        )
+        self.assertCountEqual(
+            res.data["results"][0]["tickets"],
+            [
+                {"performance": first.id, "seats": [{"row": 2, "seat": 2}]},
+                {"performance": second.id, "seats": [{"row": 2, "seat": 1}]},
+            ],
+        )
+        self.assertEqual(
+            res.data["results"][1]["tickets"],
+            [
+                {
+                    "performance": first.id,
+                    "seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+                }
+            ],
+        )
+        self.assertEqual(
+            [performance["id"] for performance in res.data["performances"]],
+            [first.id, second.id],
+        )
+        self.assertIn("tickets_available", res.data["performances"][0])
+
+
+class CreateReservationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+        self.performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=10, seats_in_row=20)
+        )
+
+    def post(self, seats):
+        return self.client.post(
+            RESERVATION_URL,
+            create_payload(self.performance, seats),
+            format="json",
+        )
+
+    def test_create_reservation(self):
+        res = self.post([(1, 1), (1, 2), (2, 5)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(pk=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(
+            list(reservation.tickets.values_list("row", "seat")),
+            [(1, 1), (1, 2), (2, 5)],
+        )
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 3)
+
+    def test_seat_out_of_hall_range(self):
+        res = self.post([(1, 1), (11, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row", res.data["tickets"][1])
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_seat_repeated_in_request(self):
+        res = self.post([(1, 1), (1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][1]["seat"], [SEAT_REPEATED_MESSAGE]
+        )
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_seat_already_taken(self):
+        self.post([(3, 3)])
+
+        res = self.post([(3, 2), (3, 3)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["lost_seats"],
+            [{"performance": self.performance.id, "row": 3, "seat": 3}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 1)
+
+    def test_queries_do_not_grow_with_tickets(self):
+        query_counts = []
+
+        for row, seats_count in ((1, 1), (2, 20)):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.post(
+                    [(row, seat) for seat in range(1, seats_count + 1)]
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class ConcurrentReservationTest(TransactionTestCase):
+    threads_count = 8
+    requests_per_thread = 15
+
+    def setUp(self):
+        self.performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=3, seats_in_row=10)
+        )
+        self.users = UserFactory.create_batch(size=self.threads_count)
+
+    def book(self, user, results):
+        client = APIClient()
+        client.force_authenticate(user)
+        seats = [
+            (row, seat)
+            for row in range(1, 4)
+            for seat in range(1, 11)
+        ]
+
+        try:
+            for _ in range(self.requests_per_thread):
+                payload = create_payload(
+                    self.performance, random.sample(seats, k=3)
+                )
+                res = client.post(RESERVATION_URL, payload, format="json")
+                results.append((res.status_code, payload, res.data))
+        finally:
+            connection.close()
+
+    def test_no_double_booking_under_contention(self):
+        results = []
+        threads = [
+            threading.Thread(target=self.book, args=(user, results))
+            for user in self.users
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statuses = {code for code, _, _ in results}
+        self.assertLessEqual(
+            statuses, {status.HTTP_201_CREATED, status.HTTP_409_CONFLICT}
+        )
+
+        booked = [
+            (ticket["row"], ticket["seat"])
+            for code, payload, _ in results
+            if code == status.HTTP_201_CREATED
+            for ticket in payload["tickets"]
+        ]
+        self.assertEqual(len(booked), len(set(booked)))
+        self.assertEqual(
+            sorted(booked),
+            sorted(Ticket.objects.values_list("row", "seat")),
+        )
+
+        for code, _, data in results:
+            if code == status.HTTP_409_CONFLICT:
+                self.assertTrue(data["lost_seats"])
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, len(booked))
+
+
+class ConcurrentReleaseTest(TransactionTestCase):
+    rounds = 10
+
+    def setUp(self):
+        self.performances = [
+            PerformanceFactory(
+                theatre_hall=TheatreHallFactory(
+                    rows=self.rounds, seats_in_row=4
+                )
+            )
+            for _ in range(2)
+        ]
+        self.user = UserFactory()
+
+    def create_reservation(self, row):
+        # Tickets come back ordered by row, the later performance first
+        reservation = ReservationFactory(user=self.user)
+        for ticket_row, performance in zip(
+            (row, row + 1), reversed(self.performances)
+        ):
+            Ticket.objects.create(
+                row=ticket_row,
+                seat=1,
+                performance=performance,
+                reservation=reservation,
+            )
+        return reservation
+
+    def run_in_threads(self, *targets):
+        barrier = threading.Barrier(len(targets))
+        errors = []
+
+        def run(target):
+            try:
+                barrier.wait()
+                target()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=run, args=(target,)) for target in targets
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return errors
+
+    def test_counters_are_updated_in_lock_order(self):
+        reservation = self.create_reservation(1)
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation.delete()
+
+        updated = [
+            performance.id
+            for query in queries
+            if query["sql"].startswith('UPDATE "theatre_performance" SET')
+            for performance in self.performances
+            if query["sql"].endswith(f'"id" = {performance.id}')
+        ]
+        self.assertEqual(
+            updated, [performance.id for performance in self.performances]
+        )
+
+    def test_release_runs_concurrently_with_a_booking(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        responses = []
+
+        for row in range(1, self.rounds, 2):
+            reservation = self.create_reservation(row)
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": 2, "performance": performance.id}
+                    for performance in self.performances
+                ]
+            }
+
+            errors = self.run_in_threads(
+                reservation.delete,
+                lambda payload=payload: responses.append(
+                    client.post(RESERVATION_URL, payload, format="json")
+                ),
+            )
+
+            self.assertEqual(errors, [])
+
+        self.assertEqual(
+            {res.status_code for res in responses}, {status.HTTP_201_CREATED}
+        )
+        for performance in self.performances:
+            performance.refresh_from_db()
+            self.assertEqual(
+                performance.tickets_sold, performance.tickets.count()
+            )
+            self.assertEqual(performance.tickets_sold, len(responses))
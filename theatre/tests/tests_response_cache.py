@@ -0,0 +1,116 @@
+import tempfile
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.cache import RESPONSE_CACHE_ALIAS, get_stats, reset_stats
+from theatre.tests.factories import ActorFactory, GenreFactory, PlayFactory
+
+GENRE_URL = reverse("theatre:genre-list")
+PLAY_URL = reverse("theatre:play-list")
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    RESPONSE_CACHE_ALIAS: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "theatre-responses-test",
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        reset_stats()
+
+    def test_list_is_served_from_cache(self):
+        GenreFactory()
+
+        first = self.client.get(GENRE_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(GENRE_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(
+            get_stats()["GenreViewSet"], {"hit": 1, "miss": 1}
+        )
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get(GENRE_URL, {"limit": 1, "offset": 0})
+
+        res = self.client.get(GENRE_URL, {"offset": 0, "limit": 1})
+        self.assertEqual(res["X-Cache"], "HIT")
+
+        res = self.client.get(GENRE_URL, {"limit": 2})
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_save_invalidates(self):
+        self.client.get(GENRE_URL)
+
+        GenreFactory()
+        res = self.client.get(GENRE_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["count"], 1)
+
+    def test_play_m2m_change_invalidates(self):
+        play = PlayFactory()
+        self.client.get(PLAY_URL)
+
+        play.actors.add(ActorFactory())
+        res = self.client.get(PLAY_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"][0]["actors"]), 1)
+
+    def test_related_delete_invalidates_play(self):
+        genre = GenreFactory()
+        PlayFactory(genres=[genre])
+        self.client.get(PLAY_URL)
+
+        genre.delete()
+        res = self.client.get(PLAY_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["genres"], [])
+
+    def test_responses_cached_before_commit_are_not_read(self):
+        play = PlayFactory()
+        self.client.get(PLAY_URL)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            play.actors.add(ActorFactory())
+            # A read racing the commit caches under the bumped version
+            self.client.get(PLAY_URL)
+        res = self.client.get(PLAY_URL)
+
+        self.assertTrue(callbacks)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+
+class FileBasedResponseCacheTest(TestCase):
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_caches = {
+                **LOCMEM_CACHES,
+                RESPONSE_CACHE_ALIAS: {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": location,
+                },
+            }
+            with override_settings(CACHES=file_caches):
+                client = APIClient()
+                GenreFactory()
+
+                self.assertEqual(client.get(GENRE_URL)["X-Cache"], "MISS")
+                self.assertEqual(client.get(GENRE_URL)["X-Cache"], "HIT")
@@ -0,0 +1,163 @@
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Performance
+from theatre.tests.factories import (
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+)
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def day_at(days, hour=19):
+    day = timezone.localdate() + timedelta(days=days)
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+class ScheduleFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.plays = PlayFactory.create_batch(2)
+        self.halls = [
+            TheatreHallFactory(rows=1, seats_in_row=2),
+            TheatreHallFactory(),
+        ]
+        self.performances = [
+            PerformanceFactory(
+                play=self.plays[index % 2],
+                theatre_hall=self.halls[index // 2 % 2],
+                show_time=day_at(index + 1),
+            )
+            for index in range(4)
+        ]
+
+    def listed(self, **params) -> list:
+        res = self.client.get(PERFORMANCE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(item["id"] for item in res.data["results"])
+
+    def ids(self, *indexes) -> list:
+        return sorted(self.performances[index].id for index in indexes)
+
+    def test_play_and_hall(self):
+        self.assertEqual(self.listed(play=self.plays[0].id), self.ids(0, 2))
+        self.assertEqual(self.listed(hall=self.halls[1].id), self.ids(2, 3))
+        self.assertEqual(
+            self.listed(play=self.plays[1].id, hall=self.halls[0].id),
+            self.ids(1),
+        )
+
+    def test_date_range_includes_both_days(self):
+        first_day = timezone.localdate() + timedelta(days=2)
+
+        listed = self.listed(
+            date_from=first_day.isoformat(),
+            date_to=(first_day + timedelta(days=1)).isoformat(),
+        )
+
+        self.assertEqual(listed, self.ids(1, 2))
+
+    def test_available_only(self):
+        reservation = ReservationFactory()
+        for seat in (1, 2):
+            self.performances[0].tickets.create(
+                reservation=reservation, row=1, seat=seat
+            )
+
+        self.assertEqual(self.listed(available_only="true"), self.ids(1, 2, 3))
+
+    def test_invalid_filters(self):
+        for params, field in (
+            ({"play": "one"}, "play"),
+            ({"play": "²"}, "play"),
+            ({"hall": "١"}, "hall"),
+            ({"date_from": "tomorrow"}, "date_from"),
+            ({"date_from": "2030-01-02", "date_to": "2030-01-01"}, "date_to"),
+        ):
+            res = self.client.get(PERFORMANCE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+
+
+class ScheduleFilterPlanTest(TestCase):
+    """Every filter combination is answered from an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        plays = PlayFactory.create_batch(10)
+        halls = TheatreHallFactory.create_batch(5)
+        # Four shows a day in each hall, for 30 days
+        Performance.objects.bulk_create(
+            Performance(
+                play=plays[index % 10],
+                theatre_hall=halls[index % 5],
+                show_time=day_at(index // 20 + 1, index // 5 % 4 * 3 + 10),
+            )
+            for index in range(600)
+        )
+        cls.play, cls.hall = plays[0], halls[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE theatre_performance")
+
+    def plans(self, params) -> dict:
+        """{SQL: plan} of the list queries with sequential scans off."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PERFORMANCE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        plans = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in queries:
+                if '"theatre_performance"' in query["sql"]:
+                    cursor.execute(f"EXPLAIN {query['sql']}")
+                    plans[query["sql"]] = "\n".join(
+                        row[0] for row in cursor.fetchall()
+                    )
+            cursor.execute("RESET enable_seqscan")
+
+        self.assertTrue(plans)
+        return plans
+
+    def assert_uses_index(self, params, index=None):
+        """
+        No query scans the whole table; the page query reads `index`,
+        when it is the only one that can serve it. Which of the play or
+        hall index and the show time one the planner picks for the other
+        filters depends on their selectivity.
+        """
+        for sql, plan in self.plans(params).items():
+            with self.subTest(params=params):
+                self.assertNotIn("Seq Scan on theatre_performance", plan)
+                if index and "LIMIT" in sql:
+                    self.assertIn(index, plan)
+
+    def test_filter_combinations(self):
+        date_from = (timezone.localdate() + timedelta(days=10)).isoformat()
+        date_to = (timezone.localdate() + timedelta(days=20)).isoformat()
+        dates = {"date_from": date_from, "date_to": date_to}
+        play = {"play": self.play.id}
+        hall = {"hall": self.hall.id}
+        available = {"available_only": "true"}
+
+        self.assert_uses_index(play)
+        self.assert_uses_index({**play, **dates})
+        self.assert_uses_index(hall)
+        self.assert_uses_index({**hall, **dates})
+        self.assert_uses_index({**play, **hall})
+        self.assert_uses_index(dates, "performance_show_time_id_idx")
+        self.assert_uses_index(available)
+        self.assert_uses_index({**play, **dates, **available})
+        self.assert_uses_index({**hall, **available})
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.events import (
+    SEAT_RELEASED,
+    SEAT_TAKEN,
+    InProcessSeatEventHub,
+    PostgresSeatEventHub,
+    Subscription,
+)
+from theatre.models import Ticket
+from theatre.tests.factories import (
+    PerformanceFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+    UserFactory,
+)
+
+
+def seat_events_url(id):
+    return reverse("theatre:performance-seat-events", args=(id,))
+
+
+def parse_sse(chunk):
+    event_type, data = chunk.decode().strip().split("\n")
+    return event_type.removeprefix("event: "), json.loads(
+        data.removeprefix("data: ")
+    )
+
+
+class InProcessSeatEventHubTest(TestCase):
+    def test_dispatch_from_another_thread(self):
+        hub = InProcessSeatEventHub()
+
+        async def scenario():
+            subscription = hub.subscribe(1)
+            other = hub.subscribe(2)
+            thread = threading.Thread(
+                target=hub.dispatch, args=(1, {"type": SEAT_TAKEN})
+            )
+            thread.start()
+            thread.join()
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+            hub.unsubscribe(subscription)
+            hub.unsubscribe(other)
+            return event, other.queue.empty()
+
+        event, other_empty = asyncio.run(scenario())
+
+        self.assertEqual(event, {"type": SEAT_TAKEN})
+        self.assertTrue(other_empty)
+
+
+class PublishSeatEventsTest(TestCase):
+    def setUp(self):
+        self.hub = mock.Mock(spec=InProcessSeatEventHub)
+        patcher = mock.patch("theatre.events.get_hub", return_value=self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.performance = PerformanceFactory(
+            theatre_hall=TheatreHallFactory(rows=5, seats_in_row=5)
+        )
+
+    def sent_events(self):
+        return [call.args[1] for call in self.hub.send.call_args_list]
+
+    def test_reservation_publishes_taken_seats(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+
+        client.post(
+            reverse("theatre:reservation-list"),
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": self.performance.id},
+                    {"row": 1, "seat": 2, "performance": self.performance.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(
+            self.sent_events(),
+            [
+                {
+                    "type": SEAT_TAKEN,
+                    "performance": self.performance.id,
+                    "seats": [[1, 1], [1, 2]],
+                }
+            ],
+        )
+
+    def test_ticket_delete_publishes_released_seat(self):
+        ticket = Ticket.objects.create(
+            row=2,
+            seat=3,
+            performance=self.performance,
+            reservation=ReservationFactory(),
+        )
+        self.hub.reset_mock()
+
+        ticket.delete()
+
+        self.assertEqual(
+            self.sent_events(),
+            [
+                {
+                    "type": SEAT_RELEASED,
+                    "performance": self.performance.id,
+                    "seats": [[2, 3]],
+                }
+            ],
+        )
+
+
+    def test_reservation_delete_publishes_one_event_per_performance(self):
+        reservation = ReservationFactory()
+        for seat in (1, 2, 3):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+        self.hub.reset_mock()
+
+        reservation.delete()
+
+        self.assertEqual(
+            self.sent_events(),
+            [
+                {
+                    "type": SEAT_RELEASED,
+                    "performance": self.performance.id,
+                    "seats": [[1, 1], [1, 2], [1, 3]],
+                }
+            ],
+        )
+
+class SeatEventsStreamTest(TestCase):
+    async def test_stream_snapshot_and_deltas(self):
+        performance = await sync_to_async(PerformanceFactory)(
+            theatre_hall=await sync_to_async(TheatreHallFactory)(
+                rows=2, seats_in_row=4
+            )
+        )
+        hub = InProcessSeatEventHub()
+
+        with mock.patch("theatre.views.get_hub", return_value=hub):
+            response = await self.async_client.get(
+                seat_events_url(performance.id)
+            )
+            stream = response.streaming_content
+
+            event_type, snapshot = parse_sse(await anext(stream))
+            self.assertEqual(event_type, "snapshot")
+            self.assertEqual(snapshot["rows"], 2)
+
+            hub.dispatch(
+                performance.id,
+                {
+                    "type": SEAT_TAKEN,
+                    "performance": performance.id,
+                    "seats": [[1, 1]],
+                },
+            )
+            event_type, event = parse_sse(await anext(stream))
+            await stream.aclose()
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(event_type, SEAT_TAKEN)
+        self.assertEqual(event["seats"], [[1, 1]])
+
+    async def test_overflow_drops_deltas_older_than_the_snapshot(self):
+        performance = await sync_to_async(PerformanceFactory)(
+            theatre_hall=await sync_to_async(TheatreHallFactory)(
+                rows=2, seats_in_row=4
+            )
+        )
+        hub = InProcessSeatEventHub()
+
+        def dispatch(seat):
+            hub.dispatch(
+                performance.id,
+                {
+                    "type": SEAT_TAKEN,
+                    "performance": performance.id,
+                    "seats": [[1, seat]],
+                },
+            )
+
+        with mock.patch("theatre.views.get_hub", return_value=hub):
+            with mock.patch.object(Subscription, "max_pending", 2):
+                response = await self.async_client.get(
+                    seat_events_url(performance.id)
+                )
+                stream = response.streaming_content
+                await anext(stream)
+
+                for seat in (1, 2, 3):
+                    dispatch(seat)
+                # Lets the queued deliveries run, the third one overflows
+                await asyncio.sleep(0)
+
+                event_type, _ = parse_sse(await anext(stream))
+                dispatch(4)
+                next_type, event = parse_sse(await anext(stream))
+                await stream.aclose()
+
+        self.assertEqual(event_type, "snapshot")
+        self.assertEqual(next_type, SEAT_TAKEN)
+        self.assertEqual(event["seats"], [[1, 4]])
+
+    async def test_unread_stream_does_not_subscribe(self):
+        performance = await sync_to_async(PerformanceFactory)()
+        hub = InProcessSeatEventHub()
+
+        with mock.patch("theatre.views.get_hub", return_value=hub):
+            response = await self.async_client.get(
+                seat_events_url(performance.id)
+            )
+            response.close()
+
+        self.assertEqual(hub._subscriptions, {})
+
+    async def test_stream_missing_performance(self):
+        response = await self.async_client.get(seat_events_url(0))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class PostgresSeatEventHubTest(TransactionTestCase):
+    def test_notifications_are_delivered_after_commit(self):
+        hub = PostgresSeatEventHub()
+        self.addCleanup(hub.close)
+        event = {"type": SEAT_TAKEN, "performance": 7, "seats": [[1, 1]]}
+
+        def send():
+            try:
+                with transaction.atomic():
+                    hub.send(7, event)
+            finally:
+                connection.close()
+
+        async def scenario():
+            subscription = hub.subscribe(7)
+            await sync_to_async(hub._listening.wait)(5)
+            await sync_to_async(send, thread_sensitive=False)()
+            return await asyncio.wait_for(subscription.get(), timeout=5)
+
+        self.assertEqual(asyncio.run(scenario()), event)
@@ -0,0 +1,216 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.fieldsets import FieldSet
+from theatre.models import Ticket
+from theatre.tests.factories import (
+    ActorFactory,
+    GenreFactory,
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+    UserFactory,
+)
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+PLAY_URL = reverse("theatre:play-list")
+
+
+def performance_detail_url(performance_id):
+    return reverse("theatre:performance-detail", args=(performance_id,))
+
+
+def play_detail_url(play_id):
+    return reverse("theatre:play-detail", args=(play_id,))
+
+
+class FieldSetTest(SimpleTestCase):
+    def parse(self, fields=None, expand=None):
+        return FieldSet(
+            None if fields is None else frozenset(map(tuple, fields)),
+            None if expand is None else frozenset(map(tuple, expand)),
+        )
+
+    def test_everything_by_default(self):
+        fieldset = FieldSet()
+
+        self.assertTrue(fieldset.includes("anything"))
+        self.assertTrue(fieldset.expands("play"))
+        self.assertIsNone(fieldset.nested("play").fields)
+
+    def test_dotted_fields_select_nested_ones(self):
+        fieldset = self.parse(fields=[["id"], ["play", "title"]])
+
+        self.assertTrue(fieldset.includes("id", "show_time"))
+        self.assertFalse(fieldset.includes("show_time"))
+        self.assertTrue(fieldset.includes("play"))
+        self.assertEqual(fieldset.nested("play").fields, {("title",)})
+
+    def test_whole_nested_object(self):
+        fieldset = self.parse(fields=[["play"], ["play", "title"]])
+
+        self.assertIsNone(fieldset.nested("play").fields)
+
+    def test_expand(self):
+        fieldset = self.parse(expand=[["play", "actors"]])
+
+        self.assertTrue(fieldset.expands("play"))
+        self.assertFalse(fieldset.expands("theatre_hall"))
+        self.assertTrue(fieldset.nested("play").expands("actors"))
+        self.assertFalse(fieldset.nested("play").expands("genres"))
+
+    def test_nested_fields_expand_their_object(self):
+        fieldset = self.parse(fields=[["play", "title"]], expand=[])
+
+        self.assertTrue(fieldset.expands("play"))
+        self.assertFalse(fieldset.nested("play").expands("actors"))
+
+
+class SparsePerformanceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.actors = ActorFactory.create_batch(2)
+        self.genre = GenreFactory()
+        self.hall = TheatreHallFactory(rows=2, seats_in_row=3)
+        self.performance = PerformanceFactory(
+            theatre_hall=self.hall,
+            play=PlayFactory(actors=self.actors, genres=[self.genre]),
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            performance=self.performance,
+            reservation=ReservationFactory(),
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query["sql"] for query in queries]
+
+    def test_detail_fields(self):
+        res, queries = self.get(
+            performance_detail_url(self.performance.id),
+            {"fields": "id,show_time"},
+        )
+
+        self.assertEqual(set(res.data), {"id", "show_time"})
+        # The ETag version, then the performance alone: no join, no
+        # prefetch and no taken seats
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("JOIN", queries[1])
+
+    def test_detail_without_expand_sends_ids(self):
+        res, queries = self.get(
+            performance_detail_url(self.performance.id), {"expand": ""}
+        )
+
+        self.assertEqual(res.data["play"], self.performance.play_id)
+        self.assertEqual(res.data["theatre_hall"], self.hall.id)
+        self.assertEqual(res.data["seat_map"]["rows"], 2)
+        # The seat map still needs the hall geometry, not the play
+        self.assertEqual(len(queries), 3)
+        self.assertIn('"theatre_theatrehall"', queries[1])
+        self.assertNotIn('"theatre_play"', queries[1])
+
+    def test_detail_expand_nested_relations(self):
+        res, _ = self.get(
+            performance_detail_url(self.performance.id),
+            {
+                "fields": "play.title,play.actors,play.genres",
+                "expand": "play.actors",
+            },
+        )
+
+        self.assertEqual(set(res.data), {"play"})
+        self.assertEqual(set(res.data["play"]), {"title", "actors", "genres"})
+        self.assertEqual(
+            [actor["id"] for actor in res.data["play"]["actors"]],
+            sorted(actor.id for actor in self.actors),
+        )
+        self.assertEqual(
+            res.data["play"]["actors"][0]["first_name"],
+            min(self.actors, key=lambda actor: actor.id).first_name,
+        )
+        self.assertEqual(res.data["play"]["genres"], [self.genre.id])
+
+    def test_list_fields(self):
+        res, queries = self.get(PERFORMANCE_URL, {"fields": "id,show_time"})
+
+        self.assertEqual(set(res.data["results"][0]), {"id", "show_time"})
+        self.assertFalse(any("JOIN" in sql for sql in queries))
+
+    def test_list_available_only_without_the_field(self):
+        res, _ = self.get(
+            PERFORMANCE_URL, {"fields": "id", "available_only": "true"}
+        )
+
+        self.assertEqual(res.data["results"], [{"id": self.performance.id}])
+
+    def test_unknown_fields_are_ignored(self):
+        res, _ = self.get(PERFORMANCE_URL, {"fields": "id,nope"})
+
+        self.assertEqual(res.data["results"], [{"id": self.performance.id}])
+
+
+class SparsePlayTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.play = PlayFactory(
+            actors=ActorFactory.create_batch(2),
+            genres=GenreFactory.create_batch(2),
+        )
+
+    def test_list_skips_unsent_relations(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PLAY_URL, {"fields": "id,title,genres"})
+
+        self.assertEqual(
+            set(res.data["results"][0]), {"id", "title", "genres"}
+        )
+        # Count, plays and genres, actors are not loaded
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(
+            any('"theatre_actor"' in query["sql"] for query in queries)
+        )
+
+    def test_detail_sends_actor_ids_unless_expanded(self):
+        res = self.client.get(
+            play_detail_url(self.play.id), {"expand": "genres"}
+        )
+
+        self.assertEqual(
+            res.data["actors"],
+            sorted(actor.id for actor in self.play.actors.all()),
+        )
+        self.assertIn("name", res.data["genres"][0])
+
+
+class SparseWriteTest(TestCase):
+    def test_writes_ignore_fieldsets(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory(is_staff=True))
+
+        res = client.post(
+            reverse("theatre:theatrehall-list") + "?fields=id",
+            {"name": "Blue", "rows": 5, "seats_in_row": 6},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["name"], "Blue")
+
+    def test_other_endpoints_follow_fields(self):
+        hall = TheatreHallFactory()
+
+        res = APIClient().get(
+            reverse("theatre:theatrehall-list"), {"fields": "name"}
+        )
+
+        self.assertEqual(res.data["results"], [{"name": hall.name}])
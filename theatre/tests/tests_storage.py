@@ -0,0 +1,196 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from theatre.images import variant_names
+from theatre.models import MediaFile, Play
+from theatre.storage import (
+    IMMUTABLE_CACHE_CONTROL,
+    ContentAddressedStorage,
+    collect_garbage,
+    serve_media,
+)
+from theatre.tests.factories import UserFactory
+from theatre.tests.tests_images import create_image
+
+PLAY_URL = reverse("theatre:play-list")
+
+
+def detail_url(play_id):
+    return reverse("theatre:play-detail", args=(play_id,))
+
+
+class MediaRootMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class ContentAddressedStorageTest(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = ContentAddressedStorage(location=self.media_root)
+
+    def test_files_are_named_by_content(self):
+        content = os.urandom(200 * 1024)
+
+        name = self.storage.save("uploads/play/a.PNG", ContentFile(content))
+
+        self.assertEqual(
+            name, f"uploads/play/{hashlib.sha256(content).hexdigest()}.png"
+        )
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_equal_files_are_stored_once(self):
+        first = self.storage.save("uploads/play/a.png", ContentFile(b"a"))
+        second = self.storage.save("uploads/play/b.png", ContentFile(b"a"))
+        other = self.storage.save("uploads/play/c.png", ContentFile(b"c"))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(
+            sorted(os.listdir(self.storage.path("uploads/play"))),
+            sorted({os.path.basename(first), os.path.basename(other)}),
+        )
+        self.assertEqual(MediaFile.objects.get(name=first).refs, 0)
+
+
+    def test_files_of_rolled_back_saves_are_collected(self):
+        with transaction.atomic():
+            name = self.storage.save("uploads/play/a.png", ContentFile(b"a"))
+            transaction.set_rollback(True)
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+        self.assertEqual(
+            collect_garbage(timedelta(hours=1), storage=self.storage), []
+        )
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(
+            collect_garbage(timedelta(0), storage=self.storage), [name]
+        )
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+class MediaReferencesTest(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(UserFactory(is_staff=True))
+
+    def upload(self, play=None, image=None):
+        image = image or create_image()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            if play is None:
+                res = self.client.post(
+                    PLAY_URL, {"title": "Hamlet", "image": image}
+                )
+            else:
+                res = self.client.patch(detail_url(play.id), {"image": image})
+
+        return Play.objects.get(pk=res.data["id"])
+
+    def refs(self, play) -> dict:
+        names = [play.image.name, *variant_names(play.image_variants)]
+        return dict(
+            MediaFile.objects.filter(name__in=names).values_list(
+                "name", "refs"
+            )
+        )
+
+    def collect(self) -> list:
+        return collect_garbage(timedelta(0))
+
+    def test_plays_share_an_equal_image(self):
+        first = self.upload()
+        second = self.upload()
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        self.assertEqual(set(self.refs(first).values()), {2})
+
+        first.delete()
+
+        self.assertEqual(set(self.refs(second).values()), {1})
+        self.assertEqual(self.collect(), [])
+        self.assertTrue(default_storage.exists(second.image.name))
+
+    def test_replaced_image_is_collected(self):
+        old = self.upload()
+        new = self.upload(old, create_image(500, 500))
+
+        orphans = self.refs(old)
+        self.assertEqual(set(orphans.values()), {0})
+        self.assertEqual(set(self.refs(new).values()), {1})
+        self.assertCountEqual(self.collect(), orphans)
+        self.assertFalse(default_storage.exists(old.image.name))
+        self.assertTrue(default_storage.exists(new.image.name))
+
+    def test_stale_instances_release_the_stored_images(self):
+        stale = self.upload()
+        old_refs = self.refs(stale)
+        new = self.upload(Play.objects.get(pk=stale.pk), create_image(50, 50))
+
+        stale.delete()
+
+        self.assertEqual(set(self.refs(new).values()), {0})
+        self.assertEqual(
+            MediaFile.objects.filter(name__in=old_refs, refs__lt=0).count(),
+            0,
+        )
+
+    def test_recent_orphans_are_kept(self):
+        play = self.upload()
+        play.delete()
+
+        self.assertEqual(collect_garbage(timedelta(hours=1)), [])
+        self.assertTrue(default_storage.exists(play.image.name))
+
+    def test_command_dry_run_keeps_the_files(self):
+        play = self.upload()
+        play.delete()
+        output = StringIO()
+
+        call_command(
+            "collect_media_garbage", "--grace=0", "--dry-run", stdout=output
+        )
+
+        self.assertIn("Would delete 5 media file(s)", output.getvalue())
+        self.assertTrue(default_storage.exists(play.image.name))
+
+
+class ServeMediaTest(MediaRootMixin, TestCase):
+    def get(self, name):
+        request = RequestFactory().get(f"/media/{name}")
+        return serve_media(request, name, document_root=self.media_root)
+
+    def test_content_addressed_files_are_immutable(self):
+        name = default_storage.save("poster.png", ContentFile(b"poster"))
+
+        response = self.get(name)
+
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+    def test_other_files_are_revalidated(self):
+        with open(os.path.join(self.media_root, "poster.png"), "wb") as file:
+            file.write(b"poster")
+
+        response = self.get("poster.png")
+
+        self.assertNotIn("Cache-Control", response)
+        self.assertIn("Last-Modified", response)
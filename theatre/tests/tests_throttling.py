@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import ThrottleCounter
+from theatre.throttling import AnonCounterRateThrottle
+
+
+class FixedWindowThrottle(AnonCounterRateThrottle):
+    rate = "10/min"
+    sliding_window = False
+
+
+class SlidingWindowThrottle(AnonCounterRateThrottle):
+    rate = "10/min"
+
+
+class CounterRateThrottleTest(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1")
+        self.request.user = AnonymousUser()
+
+    def send(self, throttle_class, at, count=1):
+        """Sends `count` requests at second `at`, returns how many passed."""
+        allowed = 0
+        for _ in range(count):
+            throttle = throttle_class()
+            with mock.patch.object(throttle, "timer", return_value=at):
+                allowed += throttle.allow_request(self.request, None)
+        return allowed
+
+    def test_limit_is_enforced(self):
+        self.assertEqual(self.send(FixedWindowThrottle, 6000, 12), 10)
+
+        throttle = FixedWindowThrottle()
+        with mock.patch.object(throttle, "timer", return_value=6015):
+            self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertEqual(throttle.wait(), 45)
+
+    def test_fixed_window_resets(self):
+        self.send(FixedWindowThrottle, 6059, 10)
+
+        self.assertEqual(self.send(FixedWindowThrottle, 6060, 12), 10)
+
+    def test_sliding_window_weights_the_previous_window(self):
+        self.send(SlidingWindowThrottle, 6000, 10)
+
+        # Half of the previous window is still inside the sliding one
+        self.assertEqual(self.send(SlidingWindowThrottle, 6090, 10), 5)
+        # Two windows later nothing is carried over
+        self.assertEqual(self.send(SlidingWindowThrottle, 6180, 12), 10)
+
+    def test_denied_requests_are_not_counted(self):
+        self.send(FixedWindowThrottle, 6000, 30)
+
+        counter = ThrottleCounter.objects.get()
+        self.assertEqual(counter.count, 10)
+        self.assertEqual(counter.period, 100)
+
+    def test_purge_deletes_expired_counters(self):
+        self.send(FixedWindowThrottle, 6000)
+        ThrottleCounter.objects.create(
+            key="throttle_anon_old",
+            period=1,
+            count=1,
+            previous_count=0,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(ThrottleCounter.objects.purge(), 2)
+
+
+class ThrottledApiTest(TestCase):
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"anon": "2/min", "user": "2/min"},
+        }
+    )
+    def test_requests_over_the_rate_are_throttled(self):
+        client = APIClient()
+        url = reverse("theatre:genre-list")
+
+        responses = [client.get(url) for _ in range(3)]
+
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+        self.assertIn("Retry-After", responses[-1])
@@ -0,0 +1,135 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Play, Ticket
+from theatre.tests.factories import (
+    ActorFactory,
+    GenreFactory,
+    PerformanceFactory,
+    PlayFactory,
+    ReservationFactory,
+    TheatreHallFactory,
+)
+from theatre.views import LeanListMixin
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+PLAY_URL = reverse("theatre:play-list")
+
+
+class ValuesListTest(TestCase):
+    """
+    Lists built from values() rows are byte for byte the responses of the
+    model serializers.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        actors = [
+            ActorFactory(first_name="Zoë", last_name="Ødegaard"),
+            *ActorFactory.create_batch(2),
+        ]
+        genres = GenreFactory.create_batch(2)
+        self.genre = genres[1]
+
+        self.plays = [
+            PlayFactory(title="Hamlet", actors=actors, genres=genres),
+            PlayFactory(title="Macbeth", description=None, genres=genres[1:]),
+            PlayFactory(title="Hamlet again", actors=actors[1:]),
+        ]
+        Play.objects.filter(pk=self.plays[0].pk).update(
+            image="uploads/plays/hamlet.jpg",
+            image_variants={
+                "thumb": {
+                    "webp": "uploads/plays/variants/thumb.webp",
+                    "jpeg": "uploads/plays/variants/thumb.jpg",
+                }
+            },
+        )
+
+        halls = [
+            TheatreHallFactory(rows=1, seats_in_row=2),
+            TheatreHallFactory(),
+        ]
+        start = timezone.now().replace(microsecond=123456)
+        performances = [
+            PerformanceFactory(
+                play=self.plays[index % 3],
+                theatre_hall=halls[index % 2],
+                show_time=start + timedelta(days=index + 1),
+            )
+            for index in range(6)
+        ]
+        reservation = ReservationFactory()
+        for seat in (1, 2):
+            Ticket.objects.create(
+                performance=performances[0],
+                reservation=reservation,
+                row=1,
+                seat=seat,
+            )
+
+    def get(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.content)
+        return res
+
+    def assert_same_content(self, url):
+        """Returns the page of both paths, which must be identical."""
+        lean = self.get(url)
+        with mock.patch.object(
+            LeanListMixin, "lean", property(lambda view: False)
+        ):
+            model = self.get(url)
+
+        self.assertEqual(lean.content, model.content)
+        return json.loads(lean.content)
+
+    def test_performance_list(self):
+        for query in (
+            "",
+            "?limit=2&offset=3",
+            "?available_only=true",
+            f"?play={self.plays[0].id}",
+        ):
+            with self.subTest(query=query):
+                self.assert_same_content(PERFORMANCE_URL + query)
+
+    def test_play_list(self):
+        for query in (
+            "",
+            "?image=original",
+            "?search=hamlet",
+            f"?genres={self.genre.id}",
+            "?title=ham",
+            "?title_prefix=ham",
+        ):
+            with self.subTest(query=query):
+                self.assert_same_content(PLAY_URL + query)
+
+    def test_cursor_pages(self):
+        for url in (
+            PERFORMANCE_URL + "?pagination=cursor&limit=2",
+            PLAY_URL + "?pagination=cursor&limit=1&search=hamlet",
+        ):
+            with self.subTest(url=url):
+                page = self.assert_same_content(url)
+                self.assertIsNotNone(page["next"])
+                self.assert_same_content(page["next"])
+
+    def test_relations_in_id_order(self):
+        page = self.assert_same_content(PLAY_URL + "?search=macbeth")
+
+        self.assertEqual(page["results"][0]["actors"], [])
+        self.assertEqual(page["results"][0]["genres"], [self.genre.name])
+
+    def test_sparse_fieldsets_use_the_model_serializer(self):
+        res = self.get(PERFORMANCE_URL + "?fields=id")
+
+        self.assertEqual(set(res.data["results"][0]), {"id"})
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from theatre.models import ThrottleCounter
+
+
+class CounterRateThrottleMixin:
+    """
+    Rate throttling on ThrottleCounter rows instead of per-process cache
+    history lists: one upsert per request, shared by every worker, the
+    same cost whatever the rate.
+
+    With `sliding_window` the previous window's count is weighted by the
+    part of it still inside the sliding window (the usual two-counter
+    approximation). Otherwise the counters reset at every window start.
+    Denied requests are not counted.
+    """
+
+    sliding_window = True
+
+    def get_rate(self):
+        # Looked up per request, so overridden settings apply
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope"
+            )
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        period, elapsed = divmod(now, self.duration)
+        self.remaining = self.duration - elapsed
+
+        return ThrottleCounter.objects.hit(
+            self.key,
+            int(period),
+            1 - elapsed / self.duration if self.sliding_window else 0,
+            self.num_requests,
+            datetime.fromtimestamp(
+                now + self.remaining + self.duration, tz=timezone.utc
+            ),
+        )
+
+    def wait(self):
+        """
+        Until the current window ends. A sliding window may still deny
+        requests for a while after that.
+        """
+        return self.remaining
+
+
+class AnonCounterRateThrottle(CounterRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserCounterRateThrottle(CounterRateThrottleMixin, UserRateThrottle):
+    pass
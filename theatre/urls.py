@@ -8,6 +8,7 @@ from theatre.views import (
     GenreViewSet,
     ActorViewSet,
     ReservationViewSet,
+    performance_seat_events,
 )
 
 app_name = "theatre"
@@ -20,4 +21,31 @@ router.register("genres", GenreViewSet)
 router.register("actors", ActorViewSet)
 router.register("reservations", ReservationViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path(
+        "async/performances/",
+        PerformanceViewSet.as_async_view("list"),
+        name="performance-list-async",
+    ),
+    path(
+        "async/performances/<int:pk>/",
+        PerformanceViewSet.as_async_view("retrieve"),
+        name="performance-detail-async",
+    ),
+    path(
+        "async/plays/",
+        PlayViewSet.as_async_view("list"),
+        name="play-list-async",
+    ),
+    path(
+        "async/plays/<int:pk>/",
+        PlayViewSet.as_async_view("retrieve"),
+        name="play-detail-async",
+    ),
+    path(
+        "performances/<int:pk>/seats/events/",
+        performance_seat_events,
+        name="performance-seat-events",
+    ),
+    path("", include(router.urls)),
+]
@@ -1,73 +1,615 @@
-from django.db.models import Count, F
+import asyncio
+import json
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Concat
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
+from rest_framework import status, viewsets, serializers
 from rest_framework.authentication import TokenAuthentication
-
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from unidecode import unidecode
+
+from theatre import seat_map
+from theatre.async_views import AsyncReadMixin, aprefetch_many_to_many
+from theatre.events import get_hub
+from theatre.cache import CachedResponseMixin
+from theatre.conditional import ConditionalRetrieveMixin
+from theatre.fieldsets import FIELDSET_PARAMETERS, FieldSet
 from theatre.models import (
+    SEARCH_CONFIG,
     TheatreHall,
     Performance,
+    PerformanceAvailability,
     Play,
     Genre,
     Actor,
     Reservation,
+    Ticket,
 )
 from theatre.permissions import IsAuthenticatedForPostOrReadOnly
 from theatre.serializers import (
+    OVERLAP_MESSAGE,
+    PERFORMANCE_LIST_VALUES,
+    PLAY_LIST_VALUES,
     TheatreHallSerializer,
     PerformanceSerializer,
     PerformanceListSerializer,
+    PerformanceListValuesSerializer,
     PlaySerializer,
     PlayListSerializer,
+    PlayListValuesSerializer,
     GenreSerializer,
     ActorSerializer,
     PlayDetailSerializer,
     PerformanceDetailSerializer,
+    PerformanceCalendarSerializer,
     ReservationSerializer,
     ReservationListSerializer,
+    ReservationCompactSerializer,
+    SeatAllocationSerializer,
 )
 
 
-class TheatreHallViewSet(viewsets.ModelViewSet):
+def play_relations(fieldset, prefix="", nested=True):
+    """
+    Prefetches of the play actors and genres the fieldset sends, in id
+    order. With `nested` they load the columns of the nested serializers
+    only, or just the id when those are not expanded.
+    """
+    relations = []
+
+    for name, model in (("genres", Genre), ("actors", Actor)):
+        if not fieldset.includes(name):
+            continue
+
+        queryset = model.objects.order_by("id")
+        if nested:
+            queryset = queryset.only(
+                *(
+                    fieldset.nested(name).columns(model)
+                    if fieldset.expands(name)
+                    else ["id"]
+                )
+            )
+        relations.append(Prefetch(f"{prefix}{name}", queryset=queryset))
+
+    return relations
+
+
+def play_names(model, name):
+    """Array of `name` of the play actors or genres, in id order."""
+    return ArraySubquery(
+        model.objects.filter(plays=OuterRef("pk"))
+        .order_by("id")
+        .values_list(name)
+    )
+
+
+FIELDSET_SCHEMA = extend_schema(parameters=FIELDSET_PARAMETERS)
+
+
+class LeanListMixin:
+    """
+    `list` serves `values()` rows to a serializer that builds the dicts
+    itself, unless a sparse fieldset asks for the model serializer.
+    Viewsets switch their queryset and serializer on `lean`.
+    """
+
+    @property
+    def lean(self) -> bool:
+        return (
+            self.action == "list"
+            and FieldSet.from_request(self.request).fields is None
+        )
+
+
+@extend_schema_view(list=FIELDSET_SCHEMA, retrieve=FIELDSET_SCHEMA)
+class TheatreHallViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
+    cache_models = (TheatreHall,)
+
+
+CALENDAR_DEFAULT_DAYS = 7
+CALENDAR_MAX_DAYS = 62
+
+
+def _query_date(query_params, name, default):
+    value = query_params.get(name)
+    if not value:
+        return default
 
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise serializers.ValidationError(
+            {name: "Date must be in YYYY-MM-DD format."}
+        )
 
-class PerformanceViewSet(viewsets.ModelViewSet):
+
+def _query_id(query_params, name):
+    value = query_params.get(name)
+    if not value:
+        return None
+
+    # isdigit() also accepts digits like "²" that int() rejects
+    if not (value.isascii() and value.isdecimal()):
+        raise serializers.ValidationError({name: "Must be an id."})
+    return int(value)
+
+
+def _query_flag(query_params, name) -> bool:
+    return query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+@extend_schema_view(retrieve=FIELDSET_SCHEMA)
+class PerformanceViewSet(
+    LeanListMixin,
+    AsyncReadMixin,
+    ConditionalRetrieveMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Performance.objects.all()
     serializer_class = PerformanceSerializer
 
+    def get_etag_version(self):
+        """
+        The performance, its hall and play markers plus the ticket count
+        and the last ticket id, which change with every sold or released
+        seat.
+        """
+        last_ticket_id = (
+            Ticket.objects.filter(performance=OuterRef("pk"))
+            .order_by("-id")
+            .values("id")[:1]
+        )
+        return (
+            Performance.objects.filter(pk=self.kwargs[self.lookup_field])
+            .annotate(last_ticket_id=Subquery(last_ticket_id))
+            .values_list(
+                "updated_at",
+                "tickets_sold",
+                "last_ticket_id",
+                "theatre_hall__updated_at",
+                "play__updated_at",
+            )
+            .first()
+        )
+
     def get_serializer_class(self):
         serializer = self.serializer_class
 
         if self.action == "list":
-            serializer = PerformanceListSerializer
+            serializer = (
+                PerformanceListValuesSerializer
+                if self.lean
+                else PerformanceListSerializer
+            )
 
         if self.action == "retrieve":
             serializer = PerformanceDetailSerializer
 
+        if self.action == "calendar":
+            serializer = PerformanceCalendarSerializer
+
+        if self.action == "allocate":
+            serializer = SeatAllocationSerializer
+
         return serializer
 
     def get_queryset(self):
         queryset = self.queryset
+        fieldset = FieldSet.from_request(self.request)
 
         if self.action == "list":
-            queryset = queryset.select_related().annotate(
-                tickets_available=(
-                    F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
-                    - Count("tickets")
-                )
+            queryset = self.filter_schedule(
+                self.trim_list(queryset, fieldset)
             )
+            if self.lean:
+                queryset = queryset.values(*PERFORMANCE_LIST_VALUES)
 
         if self.action == "retrieve":
-            queryset = queryset.select_related()
+            queryset = self.trim_detail(queryset, fieldset)
+
+        if self.action in ("seats", "allocate"):
+            queryset = queryset.select_related("theatre_hall")
 
         return queryset
 
+    def trim_list(self, queryset, fieldset):
+        """Joins and columns PerformanceListSerializer sends."""
+        related = []
+        columns = ["id", "show_time"]
+
+        if fieldset.includes("play_title"):
+            related.append("play")
+            columns.append("play__title")
+        if fieldset.includes("theatre_hall_name", "theatre_hall_seats"):
+            related.append("theatre_hall")
+            columns += [
+                "theatre_hall__name",
+                "theatre_hall__rows",
+                "theatre_hall__seats_in_row",
+            ]
+
+        if related:
+            queryset = queryset.select_related(*related)
+        queryset = queryset.only(*columns)
+
+        # `available_only` filters on the annotation
+        if fieldset.includes("tickets_available") or _query_flag(
+            self.request.query_params, "available_only"
+        ):
+            queryset = queryset.with_tickets_available()
+        return queryset
+
+    def perform_create(self, serializer):
+        self.save_performance(serializer)
 
-class PlayViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        self.save_performance(serializer)
+
+    @staticmethod
+    def save_performance(serializer):
+        """
+        Saves a validated performance. A concurrent write to the hall can
+        still get in between the overlap check and the save; the
+        constraint holds and the overlap is reported like a checked one.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # An update has already set the new values on the instance
+            performance = serializer.instance or Performance(
+                **serializer.validated_data
+            )
+            if not Performance.objects.find_conflicts([performance]):
+                raise
+            raise serializers.ValidationError({"show_time": OVERLAP_MESSAGE})
+
+    @staticmethod
+    def trim_detail(queryset, fieldset):
+        """
+        Joins, prefetches and columns PerformanceDetailSerializer sends.
+        Hall and play that are not expanded are sent as ids, which need
+        no join.
+        """
+        related = []
+        prefetches = []
+        end_time = ("show_time", "duration")
+        columns = fieldset.columns(
+            Performance, *(end_time if fieldset.includes("end_time") else ())
+        )
+
+        if fieldset.includes("theatre_hall") and fieldset.expands(
+            "theatre_hall"
+        ):
+            related.append("theatre_hall")
+            columns += fieldset.nested("theatre_hall").columns(
+                TheatreHall, prefix="theatre_hall__"
+            )
+        if fieldset.includes("seat_map"):
+            related.append("theatre_hall")
+            columns += ["theatre_hall__rows", "theatre_hall__seats_in_row"]
+
+        if fieldset.includes("play") and fieldset.expands("play"):
+            play = fieldset.nested("play")
+            related.append("play")
+            columns += play.columns(
+                Play, "title", prefix="play__", exclude=("search_vector",)
+            )
+            prefetches = play_relations(play, "play__")
+
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns).prefetch_related(*prefetches)
+
+    def filter_schedule(self, queryset):
+        """
+        Applies the list filters. Show times are compared as ranges, so
+        `(play, show_time)`, `(theatre_hall, show_time)` and the
+        `show_time` index serve the filters and the ordering together.
+        """
+        query_params = self.request.query_params
+        play = _query_id(query_params, "play")
+        hall = _query_id(query_params, "hall")
+        date_from = _query_date(query_params, "date_from", None)
+        date_to = _query_date(query_params, "date_to", None)
+
+        if date_from and date_to and date_to < date_from:
+            raise serializers.ValidationError(
+                {"date_to": "Must not be before `date_from`."}
+            )
+
+        if play:
+            queryset = queryset.filter(play_id=play)
+        if hall:
+            queryset = queryset.filter(theatre_hall_id=hall)
+        if date_from:
+            queryset = queryset.filter(show_time__gte=_day_start(date_from))
+        if date_to:
+            queryset = queryset.filter(
+                show_time__lt=_day_start(date_to + timedelta(days=1))
+            )
+        if _query_flag(query_params, "available_only"):
+            queryset = queryset.filter(tickets_available__gt=0)
+
+        return queryset
+
+    async def aprefetch(self, performances):
+        if self.action != "retrieve":
+            return
+
+        fieldset = FieldSet.from_request(self.request)
+        if fieldset.includes("play") and fieldset.expands("play"):
+            plays = [performance.play for performance in performances]
+            for name in ("genres", "actors"):
+                if fieldset.nested("play").includes(name):
+                    await aprefetch_many_to_many(plays, name)
+
+        if fieldset.includes("seat_map", "taken_seats"):
+            for performance in performances:
+                performance.taken_seat_pairs = [
+                    seat
+                    async for seat in performance.tickets.values_list(
+                        "row", "seat"
+                    )
+                ]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=OpenApiTypes.STR,
+                enum=seat_map.ENCODINGS,
+                description=(
+                    "Seat map encoding (ex. ?encoding=rle), "
+                    "defaults to a base64 packed bitset"
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=True, methods=["get"], url_path="seats")
+    def seats(self, request, pk=None):
+        """Get taken seats of the performance as a compact seat map"""
+        encoding = request.query_params.get("encoding", seat_map.BITSET)
+
+        if encoding not in seat_map.ENCODINGS:
+            raise serializers.ValidationError(
+                {
+                    "encoding": f"Unknown encoding, expected one of: "
+                    f"{', '.join(seat_map.ENCODINGS)}"
+                }
+            )
+
+        performance = self.get_object()
+
+        return Response(
+            seat_map.build_seat_map(
+                performance.tickets.values_list("row", "seat"),
+                performance.theatre_hall.rows,
+                performance.theatre_hall.seats_in_row,
+                encoding,
+            )
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "play",
+                type=OpenApiTypes.INT,
+                description="Filter by play id (ex. ?play=3)",
+            ),
+            OpenApiParameter(
+                "hall",
+                type=OpenApiTypes.INT,
+                description="Filter by theatre hall id (ex. ?hall=2)",
+            ),
+            OpenApiParameter(
+                "date_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Shows on or after the day (ex. ?date_from=2024-09-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Shows on or before the day (ex. ?date_to=2024-09-07)"
+                ),
+            ),
+            OpenApiParameter(
+                "available_only",
+                type=OpenApiTypes.BOOL,
+                description=(
+                    "Only shows with free seats (ex. ?available_only=true)"
+                ),
+            ),
+            *FIELDSET_PARAMETERS,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        """Get list of performances, latest show first"""
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        request=PerformanceSerializer(many=True),
+        responses={status.HTTP_201_CREATED: PerformanceSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create a schedule of performances at once. Overlaps in a hall,
+        with stored performances or within the schedule, are reported per
+        item and nothing is created
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(responses={status.HTTP_201_CREATED: ReservationSerializer})
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="allocate",
+        permission_classes=(IsAuthenticated,),
+    )
+    def allocate(self, request, pk=None):
+        """
+        Book the best block of `size` adjacent free seats, front rows and
+        the middle of a row first
+        """
+        performance = self.get_object()
+        serializer = self.get_serializer(
+            data=request.data,
+            context={
+                **self.get_serializer_context(),
+                "performance": performance,
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        reservation = serializer.save(user=request.user)
+
+        return Response(
+            ReservationSerializer(
+                reservation, context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "First day (ex. ?from=2024-09-01), today by default"
+                ),
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    f"Last day, included (ex. ?to=2024-09-07), "
+                    f"{CALENDAR_DEFAULT_DAYS} days from `from` by default, "
+                    f"at most {CALENDAR_MAX_DAYS} days"
+                ),
+            ),
+            OpenApiParameter(
+                "play",
+                type=OpenApiTypes.INT,
+                description="Filter by play id (ex. ?play=3)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"], url_path="calendar")
+    def calendar(self, request):
+        """
+        Get performances with their availability grouped by day, read from
+        the precomputed availability rollup
+        """
+        first_day = _query_date(
+            request.query_params, "from", timezone.localdate()
+        )
+        last_day = _query_date(
+            request.query_params,
+            "to",
+            first_day + timedelta(days=CALENDAR_DEFAULT_DAYS - 1),
+        )
+
+        if last_day < first_day:
+            raise serializers.ValidationError(
+                {"to": "Must not be before `from`."}
+            )
+        if (last_day - first_day).days >= CALENDAR_MAX_DAYS:
+            raise serializers.ValidationError(
+                {"to": f"Range is limited to {CALENDAR_MAX_DAYS} days."}
+            )
+
+        queryset = PerformanceAvailability.objects.filter(
+            show_date__range=(first_day, last_day)
+        )
+        play = _query_id(request.query_params, "play")
+        if play:
+            queryset = queryset.filter(play_id=play)
+
+        days = {
+            first_day + timedelta(days=offset): []
+            for offset in range((last_day - first_day).days + 1)
+        }
+        for availability in queryset:
+            days[availability.show_date].append(availability)
+
+        return Response(
+            {
+                "from": first_day,
+                "to": last_day,
+                "days": [
+                    {
+                        "date": day,
+                        "performances": self.get_serializer(
+                            availabilities, many=True
+                        ).data,
+                    }
+                    for day, availabilities in days.items()
+                ],
+            }
+        )
+
+
+@extend_schema_view(retrieve=FIELDSET_SCHEMA)
+class PlayViewSet(
+    LeanListMixin,
+    AsyncReadMixin,
+    ConditionalRetrieveMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Play.objects.all()
     serializer_class = PlaySerializer
+    cache_models = (Play, Actor, Genre)
+
+    def get_etag_version(self):
+        """Play.updated_at also moves when its actors or genres change."""
+        return (
+            Play.objects.filter(pk=self.kwargs[self.lookup_field])
+            .values_list("updated_at")
+            .first()
+        )
 
     @staticmethod
     def _params_to_ints(query_string):
@@ -78,29 +620,116 @@ class PlayViewSet(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         if self.action == "list":
-            return PlayListSerializer
+            return (
+                PlayListValuesSerializer if self.lean else PlayListSerializer
+            )
 
         if self.action == "retrieve":
             return PlayDetailSerializer
 
         return PlaySerializer
 
+    @staticmethod
+    def _title_prefix_query(title):
+        """
+        Converts 'Hamlet, prin' to a tsquery matching title words by prefix
+        ('hamlet:*A & prin:*A'), `?title_prefix=` on the search index.
+        """
+        words = re.findall(r"[^\W_]+", unidecode(title).lower())
+        if not words:
+            return None
+
+        return SearchQuery(
+            " & ".join(f"{word}:*A" for word in words),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+
     def get_queryset(self):
         queryset = self.queryset
+        search = self.request.query_params.get("search")
         title = self.request.query_params.get("title")
+        title_prefix = self.request.query_params.get("title_prefix")
         genres = self.request.query_params.get("genres")
 
         if genres:
+            # A subquery rather than a join, plays match once and need no
+            # DISTINCT, which would also compute the values() arrays of
+            # every play before the page is cut
             genres = self._params_to_ints(genres)
-            queryset = queryset.filter(genres__id__in=genres)
+            queryset = queryset.filter(
+                id__in=Play.genres.through.objects.filter(
+                    genre_id__in=genres
+                ).values("play_id")
+            )
+
+        if search:
+            query = SearchQuery(
+                unidecode(search),
+                search_type="websearch",
+                config=SEARCH_CONFIG,
+            )
+            queryset = (
+                queryset.filter(search_vector=query)
+                # ts_rank() returns real, a float4 does not survive the
+                # JSON round trip of a keyset cursor, float8 does
+                .annotate(
+                    rank=Cast(
+                        SearchRank(F("search_vector"), query), FloatField()
+                    )
+                )
+                .order_by("-rank", *Play._meta.ordering)
+            )
 
         if title:
-            queryset = self.queryset.filter(title__icontains=title)
+            queryset = queryset.filter(title__icontains=title)
+
+        if title_prefix:
+            title_query = self._title_prefix_query(title_prefix)
+
+            if title_query is None:
+                queryset = queryset.filter(title__icontains=title_prefix)
+            else:
+                # Stop words ('the', 'a') leave an empty tsquery matching
+                # nothing, those prefixes fall back to a substring match.
+                # numnode() of the constant query is folded at planning,
+                # so the search index still serves the other prefixes.
+                queryset = queryset.alias(
+                    title_query_nodes=Func(
+                        title_query,
+                        function="numnode",
+                        output_field=IntegerField(),
+                    )
+                ).filter(
+                    Q(search_vector=title_query)
+                    | Q(title_query_nodes=0, title__icontains=title_prefix)
+                )
 
-        if self.action in ("list", "retrieve"):
-            queryset = queryset.prefetch_related("genres", "actors")
+        if self.lean:
+            # Keyset pages read the ordering values from the rows
+            queryset = queryset.annotate(
+                actor_names=play_names(
+                    Actor, Concat("first_name", Value(" "), "last_name")
+                ),
+                genre_names=play_names(Genre, "name"),
+            ).values(*PLAY_LIST_VALUES, *(("rank",) if search else ()))
+        elif self.action in ("list", "retrieve"):
+            # List actors and genres are slugs, not nested serializers
+            fieldset = FieldSet.from_request(self.request)
+            queryset = queryset.only(
+                *fieldset.columns(Play, "title", exclude=("search_vector",))
+            ).prefetch_related(
+                *play_relations(fieldset, nested=self.action == "retrieve")
+            )
+
+        return queryset
 
-        return queryset.distinct()
+    async def aprefetch(self, plays):
+        if self.action in ("list", "retrieve") and not self.lean:
+            fieldset = FieldSet.from_request(self.request)
+            for name in ("genres", "actors"):
+                if fieldset.includes(name):
+                    await aprefetch_many_to_many(plays, name)
 
     @extend_schema(
         parameters=[
@@ -109,11 +738,28 @@ class PlayViewSet(viewsets.ModelViewSet):
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter by genre id (ex. ?genres=2,5)",
             ),
+            OpenApiParameter(
+                "search",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Full-text search in title and description, "
+                    "ranked by relevance (ex. ?search=fiction)"
+                ),
+            ),
             OpenApiParameter(
                 "title",
                 type=OpenApiTypes.STR,
                 description="Filter by play title (ex. ?title=fiction)",
             ),
+            OpenApiParameter(
+                "title_prefix",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Plays with title words starting with every given "
+                    "word, on the search index (ex. ?title_prefix=pulp fic)"
+                ),
+            ),
+            *FIELDSET_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -121,24 +767,42 @@ class PlayViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=FIELDSET_SCHEMA, retrieve=FIELDSET_SCHEMA)
+class GenreViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=FIELDSET_SCHEMA, retrieve=FIELDSET_SCHEMA)
+class ActorViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
+    cache_models = (Actor,)
+
+
+COMPACT_LAYOUT = "compact"
 
 
+@extend_schema_view(retrieve=FIELDSET_SCHEMA)
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     permission_classes = (IsAuthenticatedForPostOrReadOnly,)
 
+    @property
+    def compact(self):
+        return (
+            self.action == "list"
+            and self.request.query_params.get("layout") == COMPACT_LAYOUT
+        )
+
     def get_serializer_class(self):
         serializer = self.serializer_class
 
+        if self.compact:
+            return ReservationCompactSerializer
+
         if self.action == "list":
             return ReservationListSerializer
 
@@ -149,13 +813,131 @@ class ReservationViewSet(viewsets.ModelViewSet):
             queryset = self.queryset.filter(user=self.request.user.id)
 
             if self.action == "list":
+                # Every performance is loaded once, with its hall and play
+                # joined and the `tickets_available` annotation
                 queryset = queryset.prefetch_related(
-                    "tickets__performance__play",
-                    "tickets__performance__theatre_hall",
+                    "tickets",
+                    Prefetch(
+                        "tickets__performance",
+                        queryset=Performance.objects.select_related(
+                            "play", "theatre_hall"
+                        ).with_tickets_available(),
+                    ),
                 )
 
             return queryset
         return Reservation.objects.none()
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "layout",
+                type=OpenApiTypes.STR,
+                enum=(COMPACT_LAYOUT,),
+                description=(
+                    "Group tickets by performance id and send every "
+                    "performance of the page once, in `performances` "
+                    "(ex. ?layout=compact)"
+                ),
+            ),
+            *FIELDSET_PARAMETERS,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        """Get reservations of the current user"""
+        if not self.compact:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        reservations = list(queryset) if page is None else page
+        data = self.get_serializer(reservations, many=True).data
+
+        if page is None:
+            response = Response({"results": data})
+        else:
+            response = self.get_paginated_response(data)
+
+        performances = {
+            ticket.performance_id: ticket.performance
+            for reservation in reservations
+            for ticket in reservation.tickets.all()
+        }
+        response.data["performances"] = PerformanceListSerializer(
+            sorted(performances.values(), key=lambda item: item.id),
+            many=True,
+        ).data
+
+        return response
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+SEAT_EVENTS_HEARTBEAT = 15
+
+
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _seat_snapshot(performance):
+    taken_seats = [
+        seat
+        async for seat in Ticket.objects.filter(
+            performance=performance
+        ).values_list("row", "seat")
+    ]
+    return seat_map.build_seat_map(
+        taken_seats,
+        performance.theatre_hall.rows,
+        performance.theatre_hall.seats_in_row,
+    )
+
+
+async def performance_seat_events(request, pk):
+    """
+    Server-sent events stream of a performance seat map: a `snapshot`
+    event with the bitset seat map, then `seat-taken` / `seat-released`
+    deltas as tickets are created or deleted. Needs an ASGI server.
+    """
+    try:
+        performance = await Performance.objects.select_related(
+            "theatre_hall"
+        ).aget(pk=pk)
+    except Performance.DoesNotExist:
+        raise Http404("No Performance matches the given query.")
+
+    hub = get_hub()
+
+    async def stream():
+        # Subscribed on the first iteration, so a response dropped before
+        # it never leaves a subscription behind. Subscribe before taking
+        # the snapshot, so no delta falls in between
+        subscription = hub.subscribe(performance.id)
+        try:
+            yield _sse("snapshot", await _seat_snapshot(performance))
+
+            while True:
+                if subscription.overflowed:
+                    subscription.reset()
+                    yield _sse("snapshot", await _seat_snapshot(performance))
+
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), timeout=SEAT_EVENTS_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _sse(event["type"], event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(
+        stream(), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,151 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("theatre_service.queries")
+
+_current_stats = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """Queries of one request: count, DB time and runs per statement."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    @property
+    def repeated(self) -> int:
+        """Queries that re-ran a statement already run by this request."""
+        return self.count - len(self.statements)
+
+    def most_repeated(self, limit=3) -> list:
+        return [
+            (sql, runs)
+            for sql, runs in self.statements.most_common(limit)
+            if runs > 1
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.duration += time.perf_counter() - started
+        stats.count += 1
+        stats.statements[sql] += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    Keeps `record_query` on the connection for good. It only measures
+    while a request collects stats, which also covers queries that async
+    views run in worker threads, as the context travels with them.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the queries of each request and their total time, and spots
+    statements run more than once (the N+1 pattern). Exposes them as
+    `Server-Timing` and `X-DB-Queries` headers and logs a warning for
+    requests above `QUERY_STATS_LOG_COUNT` queries or
+    `QUERY_STATS_LOG_MS` milliseconds of DB time.
+
+    Only a counter and a clock read are added per query, statements are
+    not formatted nor copied, so it is meant to stay on in production.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, "QUERY_STATS_HEADERS", True)
+        self.log_count = getattr(settings, "QUERY_STATS_LOG_COUNT", 50)
+        self.log_ms = getattr(settings, "QUERY_STATS_LOG_MS", 500)
+
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        return self.process_stats(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        return self.process_stats(request, response, stats)
+
+    def process_stats(self, request, response, stats):
+        duration_ms = stats.duration * 1000
+
+        if self.headers:
+            response["X-DB-Queries"] = (
+                f"{stats.count}; repeated={stats.repeated}"
+            )
+            response["Server-Timing"] = ", ".join(
+                filter(
+                    None,
+                    [
+                        response.get("Server-Timing"),
+                        f'db;dur={duration_ms:.1f};desc="{stats.count} '
+                        f'queries"',
+                    ],
+                )
+            )
+
+        if stats.count > self.log_count or duration_ms > self.log_ms:
+            logger.warning(
+                "%s %s ran %d queries (%d repeated) in %.1f ms%s",
+                request.method,
+                request.get_full_path(),
+                stats.count,
+                stats.repeated,
+                duration_ms,
+                "".join(
+                    f"\n  {runs}x {sql[:200]}"
+                    for sql, runs in stats.most_repeated()
+                ),
+            )
+
+        return response
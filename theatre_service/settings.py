@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "drf_spectacular",
@@ -60,6 +61,7 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "theatre_service.middleware.QueryStatsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -103,6 +105,39 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The "responses" cache holds catalog API responses, switch it to
+# django.core.cache.backends.filebased.FileBasedCache to share it
+# between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": config(
+            "RESPONSE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("RESPONSE_CACHE_LOCATION", "theatre-responses"),
+        "TIMEOUT": config("RESPONSE_CACHE_TIMEOUT", 300, cast=int),
+    },
+}
+
+# Seat map events
+# theatre.events.PostgresSeatEventHub shares events between workers
+
+SEAT_EVENTS_BACKEND = config(
+    "SEAT_EVENTS_BACKEND", "theatre.events.InProcessSeatEventHub"
+)
+
+# Per-request query stats: response headers and a warning log for
+# requests above either threshold
+QUERY_STATS_HEADERS = config("QUERY_STATS_HEADERS", "True").lower() == "true"
+QUERY_STATS_LOG_COUNT = config("QUERY_STATS_LOG_COUNT", 50, cast=int)
+QUERY_STATS_LOG_MS = config("QUERY_STATS_LOG_MS", 500, cast=float)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -144,6 +179,28 @@ STATIC_URL = "static/"
 MEDIA_ROOT = "/files/media"
 MEDIA_URL = "/media/"
 
+# Name uploads by their SHA-256, so equal files are stored once and
+# their URLs can be cached forever
+MEDIA_CONTENT_ADDRESSED = config(
+    "MEDIA_CONTENT_ADDRESSED", "True"
+).lower() == "true"
+
+STORAGES = {
+    "default": {
+        "BACKEND": (
+            "theatre.storage.ContentAddressedStorage"
+            if MEDIA_CONTENT_ADDRESSED
+            else "django.core.files.storage.FileSystemStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Threads resizing uploaded play images, 0 resizes right after the commit
+IMAGE_VARIANT_WORKERS = config("IMAGE_VARIANT_WORKERS", 2, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -153,16 +210,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "theatre.permissions.IsAdminOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS":
-        "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "theatre.pagination.SelectablePagination",
     "PAGE_SIZE": 5,
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication"
+        "user.authentication.CachedJWTAuthentication"
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "theatre.throttling.AnonCounterRateThrottle",
+        "theatre.throttling.UserCounterRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "300/day"},
 }
@@ -184,4 +240,12 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=15),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
 }
+
+# Users of JWT-authenticated requests: size and seconds to live of the
+# per-process cache, and whether is_staff/is_active claims of tokens are
+# trusted instead of looked up
+JWT_USER_CACHE_SIZE = config("JWT_USER_CACHE_SIZE", 1024, cast=int)
+JWT_USER_CACHE_TTL = config("JWT_USER_CACHE_TTL", 60, cast=float)
+JWT_TRUSTED_CLAIMS = config("JWT_TRUSTED_CLAIMS", "False").lower() == "true"
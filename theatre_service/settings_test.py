@@ -11,3 +11,22 @@ DATABASES = {
         "PORT": config("POSTGRES_PORT"),
     }
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+
+# Throttle counters are upserted on every request, which would show up in
+# every query count. Throttling tests override the rates.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    "DEFAULT_THROTTLE_RATES": {"anon": None, "user": None},
+}
+
+# Image variants are built right after the commit, tests see them
+IMAGE_VARIANT_WORKERS = 0
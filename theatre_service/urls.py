@@ -26,6 +26,8 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from theatre.storage import serve_media
+
 urlpatterns = (
     [
         path("admin/", admin.site.urls),
@@ -44,5 +46,9 @@ urlpatterns = (
         ),
     ]
     + debug_toolbar_urls()
-    + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    + static(
+        settings.MEDIA_URL,
+        view=serve_media,
+        document_root=settings.MEDIA_ROOT,
+    )
 )
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# User fields copied into tokens, enough for authentication and the
+# permission checks of the API
+TRUSTED_CLAIMS = ("is_staff", "is_active")
+
+
+class UserCache:
+    """
+    Thread-safe LRU of user field values keyed by user id. Entries expire
+    `ttl` seconds after they were loaded, which bounds how long another
+    process can serve a user changed elsewhere.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            expires, values = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL
+)
+
+
+def invalidate_user(user_id) -> None:
+    # Keys are token claims, which JSON may have turned into strings
+    user_cache.delete(user_id)
+    user_cache.delete(str(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving users from `user_cache` instead of a
+    query per request. Every request gets a fresh instance built from the
+    cached field values, so nothing is shared between requests.
+
+    With `JWT_TRUSTED_CLAIMS` tokens carrying the TRUSTED_CLAIMS give a
+    user with only the id and those fields loaded. Other fields are read
+    from the database on first access. The claims are as fresh as the
+    token is.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        if self.trusts_claims(validated_token):
+            user = self.build_user(
+                {
+                    api_settings.USER_ID_FIELD: user_id,
+                    **{
+                        claim: validated_token[claim]
+                        for claim in TRUSTED_CLAIMS
+                    },
+                }
+            )
+        else:
+            user = self.get_cached_user(user_id)
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+
+        return user
+
+    @staticmethod
+    def trusts_claims(validated_token) -> bool:
+        # Revocation needs the stored password hash
+        return (
+            settings.JWT_TRUSTED_CLAIMS
+            and not api_settings.CHECK_REVOKE_TOKEN
+            and all(claim in validated_token for claim in TRUSTED_CLAIMS)
+        )
+
+    def get_cached_user(self, user_id):
+        values = user_cache.get(user_id)
+
+        if values is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                )
+
+            values = {
+                field.attname: getattr(user, field.attname)
+                for field in self.user_model._meta.concrete_fields
+            }
+            user_cache.set(user_id, values)
+
+        return self.build_user(values)
+
+    def build_user(self, values: dict):
+        """A fresh user of `values`, fields missing from them are deferred."""
+        field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            field_names,
+            [values[name] for name in field_names],
+        )
@@ -1,6 +1,11 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import gettext as _
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+
+from user.authentication import TRUSTED_CLAIMS
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -17,20 +22,20 @@ class UserSerializer(serializers.ModelSerializer):
             }
         }
 
-        def create(self, validated_data):
-            """Create user with encrypted password."""
-            return get_user_model().objects.create_user(**validated_data)
+    def create(self, validated_data):
+        """Create user with encrypted password."""
+        return get_user_model().objects.create_user(**validated_data)
 
-        def update(self, instance, validated_data):
-            """Update user with encrypted password."""
-            password = validated_data.pop("password", None)
-            user = super().update(instance, validated_data)
+    def update(self, instance, validated_data):
+        """Update user with encrypted password."""
+        password = validated_data.pop("password", None)
+        user = super().update(instance, validated_data)
 
-            if password:
-                user.set_password(password)
-                user.save()
+        if password:
+            user.set_password(password)
+            user.save()
 
-            return user
+        return user
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -66,3 +71,16 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Adds the TRUSTED_CLAIMS to the refresh and access tokens."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+
+        for claim in TRUSTED_CLAIMS:
+            token[claim] = getattr(user, claim)
+
+        return token
@@ -1,3 +1,150 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.authentication import CachedJWTAuthentication, UserCache, user_cache
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+REGISTER_URL = reverse("user:register")
+ME_URL = reverse("user:manage_user")
+
+
+def bearer(token) -> dict:
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class UserCacheTest(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = UserCache(max_size=2, ttl=60)
+        cache.set(1, "one")
+        cache.set(2, "two")
+        cache.get(1)
+        cache.set(3, "three")
+
+        self.assertEqual(cache.get(1), "one")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), "three")
+
+    def test_entries_expire(self):
+        cache = UserCache(max_size=2, ttl=60)
+
+        with mock.patch("user.authentication.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            cache.set(1, "one")
+            monotonic.return_value = 161
+
+            self.assertIsNone(cache.get(1))
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="secret"
+        )
+        self.access = RefreshToken.for_user(self.user).access_token
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get("/", **bearer(token or self.access))
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+        self.assertIsNot(user, self.authenticate())
+
+    def test_save_invalidates_the_cached_user(self):
+        self.authenticate()
+        self.user.is_staff = True
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate().is_staff)
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(JWT_TRUSTED_CLAIMS=True)
+    def test_trusted_claims_skip_the_database(self):
+        res = self.client.post(
+            TOKEN_URL, {"email": "user@example.com", "password": "secret"}
+        )
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(res.data["access"])
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertFalse(user.is_staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    @override_settings(JWT_TRUSTED_CLAIMS=True)
+    def test_tokens_without_claims_are_looked_up(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+
+class ManageUserTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.client = APIClient()
+
+    def test_update_invalidates_the_cached_user(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="secret"
+        )
+        self.client.credentials(
+            **bearer(RefreshToken.for_user(user).access_token)
+        )
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "changed@example.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(user_cache.get(user.pk))
+        user.refresh_from_db()
+        self.assertEqual(user.email, "changed@example.com")
+
+
+class UserPasswordTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_hashes_the_password(self):
+        res = self.client.post(
+            REGISTER_URL, {"email": "new@example.com", "password": "secret"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("password", res.data)
+        user = get_user_model().objects.get(email="new@example.com")
+        self.assertNotEqual(user.password, "secret")
+        self.assertTrue(user.check_password("secret"))
+
+    def test_update_hashes_the_password(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="secret"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.patch(ME_URL, {"password": "changed"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("changed"))